@@ -0,0 +1,301 @@
+"""Headless benchmark harness for planners, sorters and simulated runs.
+
+Scenario families sweep grid size, obstacle density, station count, object
+count and capacity.  Layouts come from `stations_generator`, jobs from
+`task_generator`, and every random draw from one master seed
+(`models.seeding.rng_stream`), so two runs of the same commit see identical
+worlds.  Per scenario it measures:
+
+* each grid search in `PLANNERS` and `plan_path` (smoothed) over random
+  station pairs – latency percentiles and nodes expanded;
+* both `sort_tasks` implementations – latency and plan cost (true path
+  length via `StationOracle`);
+* a full simulated execution of each plan – makespan.
+
+A stage that raises is recorded with an ``error`` field instead of metrics.
+
+Peak memory of every stage is taken in a separate `tracemalloc` pass so the
+timings stay clean.  Results go to JSON or CSV (by file extension).
+
+Usage:
+    python benchmark.py run --out results.json [--quick] [--repeat 5] [--seed 42]
+    python benchmark.py compare old.json new.json [--tolerance 0.10] [--time-tolerance 0.25] [--min-ms 1]
+
+`compare` exits with status 1 if any metric regressed beyond tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from models.clock import SimClock
+from models.distances import StationOracle
+from models.map import Coordinate, GridMap
+from models.movement import PLANNERS, plan_path
+from models.robot import Robot
+from models.seeding import rng_stream
+from models.stations_generator import unique_coords
+from models.task_generator import build_random_jobs
+from models.tasks import Task
+from task_sorting import hamiltonian, task_sorter
+
+# name, rows, cols, obstacle density, stations, objects, capacity
+SCENARIOS: List[Tuple[str, int, int, float, int, int, int]] = [
+    ("small",          20,  20, 0.05, 10,  10, 3),
+    ("medium",         50,  50, 0.10, 25,  40, 3),
+    ("medium-dense",   50,  50, 0.25, 25,  40, 3),
+    ("medium-cap1",    50,  50, 0.10, 25,  40, 1),
+    ("large",         120, 120, 0.10, 60, 100, 3),
+    ("large-cap5",    120, 120, 0.10, 60, 100, 5),
+]
+QUICK = {"small", "medium"}
+
+PATH_PAIRS = 20                    # station pairs per path benchmark
+METRICS = ("p50_ms", "p90_ms", "p99_ms", "mean_ms", "expanded", "peak_kib", "cost")
+LOWER_IS_BETTER = METRICS          # every recorded metric
+
+
+# ---------------------------------------------------------------------------
+#  Scenario build
+# ---------------------------------------------------------------------------
+
+def build_scenario(name: str, rows: int, cols: int, density: float, n_stations: int,
+                   n_objects: int, seed: int):
+    """World, stations, oracle and tasks for one scenario (all seeded)."""
+    start: Coordinate = (0, 0)
+    coords = sorted(unique_coords(rows, cols, n_stations, {start}, rng_stream(seed, f"{name}/stations")))
+    stations = {f"S{i}": c for i, c in enumerate(coords, 1)}
+
+    grid = GridMap(rows, cols)
+    for c in coords:
+        grid.add_workstation(c)
+    grid.generate_random_obstacles(int(density * rows * cols), forbid={start},
+                                   rng=rng_stream(seed, f"{name}/obstacles"))
+    oracle = StationOracle.from_stations(grid, stations, extra=(start,))
+    # obstacles may wall stations in – keep only those reachable from start
+    stations = {s: c for s, c in stations.items() if oracle.distance(start, c) < float("inf")}
+
+    objects = [f"O{i}" for i in range(n_objects)]
+    rows_ = build_random_jobs(n_objects, stations, objects, rng=rng_stream(seed, f"{name}/jobs"))
+    tasks = [Task(r["station"], [r["objects"]], r["task_name"], r["points"]) for r in rows_]
+    return grid, start, stations, oracle, tasks
+
+
+# ---------------------------------------------------------------------------
+#  Measurement helpers
+# ---------------------------------------------------------------------------
+
+def _percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)."""
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[k]
+
+
+def _timed(fn: Callable[[], object], repeat: int) -> Tuple[List[float], object]:
+    samples, out = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return samples, out
+
+
+def _peak_kib(fn: Callable[[], object]) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+
+def _row(scenario: str, bench: str, samples: List[float], peak: float, **extra) -> dict:
+    row = {
+        "scenario": scenario,
+        "bench": bench,
+        "n": len(samples),
+        "p50_ms": _percentile(samples, 50),
+        "p90_ms": _percentile(samples, 90),
+        "p99_ms": _percentile(samples, 99),
+        "mean_ms": sum(samples) / len(samples),
+        "peak_kib": peak,
+    }
+    row.update(extra)
+    return row
+
+
+# ---------------------------------------------------------------------------
+#  Benchmarks
+# ---------------------------------------------------------------------------
+
+def bench_scenario(spec: Tuple, seed: int, repeat: int) -> List[dict]:
+    name, rows, cols, density, n_st, n_obj, cap = spec
+    grid, start, stations, oracle, tasks = build_scenario(name, rows, cols, density, n_st, n_obj, seed)
+    rng = rng_stream(seed, f"{name}/pairs")
+    names = sorted(stations)
+    pairs = [tuple(stations[s] for s in rng.sample(names, 2)) for _ in range(PATH_PAIRS)]
+    out: List[dict] = []
+
+    # -- grid searches -------------------------------------------------------
+    def searches(run: Callable[[Coordinate, Coordinate, dict], object]):
+        stats: dict = {}
+        samples = []
+        for a, b in pairs:
+            s, _ = _timed(lambda: run(a, b, stats), 1)
+            samples += s
+        return samples, stats.get("expanded", 0) / len(pairs)
+
+    for key, search in PLANNERS.items():
+        samples, expanded = searches(lambda a, b, st: search(a, b, rows, cols, grid.obstacles, st))
+        peak = _peak_kib(lambda: [search(a, b, rows, cols, grid.obstacles) for a, b in pairs[:3]])
+        out.append(_row(name, f"search/{key}", samples, peak, expanded=expanded))
+    samples, expanded = searches(lambda a, b, st: plan_path(rows, cols, a, b, grid.obstacles, stats=st))
+    peak = _peak_kib(lambda: [plan_path(rows, cols, a, b, grid.obstacles) for a, b in pairs[:3]])
+    out.append(_row(name, "plan_path/smooth", samples, peak, expanded=expanded))
+
+    # -- sorters -------------------------------------------------------------
+    dist = oracle.distance
+    sorters = {
+        "sort/hamiltonian": lambda: hamiltonian.sort_tasks(tasks, stations, start, cap=cap, dist=dist),
+        "sort/task_sorter": lambda: task_sorter.sort_tasks(tasks, stations, start, start, cap=cap, dist=dist,
+                                                           rng=rng_stream(seed, f"{name}/sorter")),
+    }
+    plans: Dict[str, List[Task]] = {}
+    for key, fn in sorters.items():
+        try:
+            samples, plan = _timed(fn, repeat)
+        except (ValueError, RuntimeError) as exc:      # recorded, not fatal
+            out.append({"scenario": name, "bench": key, "n": 0, "error": str(exc)})
+            continue
+        plans[key] = plan
+        out.append(_row(name, key, samples, _peak_kib(fn),
+                        cost=hamiltonian._plan_cost(plan, stations, start, dist)))
+
+    # -- full simulated execution --------------------------------------------
+    def execute(plan: List[Task]):
+        clock = SimClock()
+        robot = Robot(grid, start, oracle=oracle, clock=clock, rng=rng_stream(seed, f"{name}/robot"))
+        for task in plan:
+            robot.execute_task(task, stations)
+        return clock.now()
+
+    for key, plan in plans.items():
+        fn = lambda: execute(plan)
+        samples, makespan = _timed(fn, repeat)
+        out.append(_row(name, key.replace("sort/", "execute/"), samples, _peak_kib(fn), cost=makespan))
+    return out
+
+
+def run(out_path: Path, *, quick: bool, repeat: int, seed: int) -> List[dict]:
+    results: List[dict] = []
+    for spec in SCENARIOS:
+        if quick and spec[0] not in QUICK:
+            continue
+        t0 = time.perf_counter()
+        results += bench_scenario(spec, seed, repeat)
+        print(f"✔ {spec[0]:<14} {time.perf_counter() - t0:6.1f} s", file=sys.stderr)
+    meta = {"seed": seed, "repeat": repeat, "quick": quick, "python": platform.python_version(),
+            "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    save(out_path, meta, results)
+    return results
+
+
+# ---------------------------------------------------------------------------
+#  Result files
+# ---------------------------------------------------------------------------
+
+def save(path: Path, meta: dict, results: List[dict]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".csv":
+        fields = ["scenario", "bench", "n", *METRICS, "error"]
+        with path.open("w", newline="", encoding="utf-8") as f:
+            wr = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            wr.writeheader()
+            wr.writerows(results)
+    else:
+        path.write_text(json.dumps({"meta": meta, "results": results}, indent=2), encoding="utf-8")
+
+
+def load(path: Path) -> Dict[Tuple[str, str], dict]:
+    if path.suffix == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            rows = [{k: (float(v) if k in METRICS and v != "" else v) for k, v in r.items()}
+                    for r in csv.DictReader(f)]
+    else:
+        rows = json.loads(path.read_text(encoding="utf-8"))["results"]
+    return {(r["scenario"], r["bench"]): r for r in rows}
+
+
+def compare(old_path: Path, new_path: Path, *, tolerance: float, time_tolerance: float,
+            min_ms: float = 1.0) -> List[str]:
+    """Print a side-by-side table; return the regressions found.
+
+    Latencies must grow by more than `time_tolerance` *and* `min_ms` to
+    count, so sub-millisecond timer noise is not flagged.
+    """
+    old, new = load(old_path), load(new_path)
+    regressions = []
+    print(f"{'scenario':<14} {'bench':<22} {'metric':<9} {'old':>12} {'new':>12} {'change':>8}")
+    for key in sorted(old.keys() & new.keys()):
+        for metric in LOWER_IS_BETTER:
+            a, b = old[key].get(metric), new[key].get(metric)
+            if a in (None, "") or b in (None, ""):
+                continue
+            change = (b - a) / a if a else (0.0 if b == a else float("inf"))
+            if metric.endswith("_ms"):
+                worse = change > time_tolerance and b - a > min_ms
+            else:
+                worse = change > tolerance
+            flag = "  REGRESSION" if worse else ""
+            print(f"{key[0]:<14} {key[1]:<22} {metric:<9} {a:12.3f} {b:12.3f} {change:+8.1%}{flag}")
+            if flag:
+                regressions.append(f"{key[0]} {key[1]} {metric} {change:+.1%}")
+    for key in sorted(old.keys() - new.keys()):
+        print(f"{key[0]:<14} {key[1]:<22} missing in {new_path}")
+    for key in sorted(new.keys()):
+        if new[key].get("error") and not (old.get(key) or {}).get("error"):
+            print(f"{key[0]:<14} {key[1]:<22} failed: {new[key]['error']}  REGRESSION")
+            regressions.append(f"{key[0]} {key[1]} failed")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark planners, sorters and simulated runs.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="run the benchmark suite")
+    r.add_argument("--out", type=Path, default=Path("benchmark_results.json"))
+    r.add_argument("--quick", action="store_true", help=f"only {', '.join(sorted(QUICK))}")
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--seed", type=int, default=42)
+    c = sub.add_parser("compare", help="flag regressions between two result files")
+    c.add_argument("old", type=Path)
+    c.add_argument("new", type=Path)
+    c.add_argument("--tolerance", type=float, default=0.10, help="allowed relative growth of cost/memory/nodes")
+    c.add_argument("--time-tolerance", type=float, default=0.25, help="allowed relative growth of latencies")
+    c.add_argument("--min-ms", type=float, default=1.0, help="ignore latency growth below this many ms")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "run":
+        run(args.out, quick=args.quick, repeat=args.repeat, seed=args.seed)
+        print(f"✔ Saved results to {args.out}", file=sys.stderr)
+        return 0
+    regressions = compare(args.old, args.new, tolerance=args.tolerance,
+                          time_tolerance=args.time_tolerance, min_ms=args.min_ms)
+    if regressions:
+        print(f"✘ {len(regressions)} regression(s)", file=sys.stderr)
+        return 1
+    print("✔ No regressions", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,22 +3,32 @@
 from pathlib import Path
 from typing import Dict, List
 import random, time
-import matplotlib.pyplot as plt
 
 from models.config_reader import CONFIG
 from models.stations import load_workstations
 from models.tasks import Task
 from models.map import GridMap, Coordinate
 from models.robot import Robot
-#from task_sorting.task_sorter import sort_tasks   # enable import sort_tasks
+from models.clock import SimClock
+from models.distances import StationOracle
+from models.seeding import rng_stream
+from models import instrument
+from task_sorting.task_sorter import sort_tasks
 # ───────────────────── config values ──────────────────────
 ROWS: int = CONFIG["rows"]
 COLS: int = CONFIG["cols"]
 START: Coordinate = CONFIG["layout"]["start"]
 END:   Coordinate = CONFIG["layout"]["end"]
+DURATIONS: Dict[str, float] = CONFIG.get("durations", {})
+SEED = CONFIG.get("seed")          # None → non-reproducible run
+PROFILE = CONFIG.get("profile") or []   # e.g. instrument,trace,cprofile,tracemalloc
 
-WORKSTATIONS_CSV = Path(r"tasksorting\workstations.csv")
-TASKS_CSV        = Path(r"tasksorting\tasks.csv")
+profiler = instrument.RunProfiler(PROFILE)
+profiler.start()
+
+HERE             = Path(__file__).resolve().parent
+WORKSTATIONS_CSV = HERE / "workstations.csv"
+TASKS_CSV        = HERE / "tasks.csv"
 
 # ───────────────────── world build ────────────────────────
 station_lookup: Dict[str, Coordinate] = load_workstations(WORKSTATIONS_CSV)
@@ -28,10 +38,17 @@ for coord in station_lookup.values():
     grid.add_workstation(coord)
 
 # sprinkle random obstacles (optional demo)
-grid.generate_random_obstacles(10, forbid={START, END}, seed=42)
+grid.generate_random_obstacles(10, forbid={START, END}, rng=rng_stream(SEED, "obstacles"))
+
+# true path lengths between every station (+ START/END), one BFS each
+oracle = StationOracle.from_stations(grid, station_lookup, extra=(START, END))
 
 # instantiate robot once (no callable error)
-robot = Robot(grid=grid, start=START)
+# simulated clock: pick/place/travel durations cost no wall time
+clock = SimClock()
+robot = Robot(grid=grid, start=START, oracle=oracle, clock=clock, durations=DURATIONS,
+              rng=rng_stream(SEED, "robot"))
+instrument.watch("route_cache", robot.route_cache)
 
 # ───────────────────── task loading ───────────────────────
 try:
@@ -45,7 +62,8 @@ except FileNotFoundError:
         Task("S4", ["B"], "Place B",  10),
     ]
 # Optional advanced ordering
-task_list = sort_tasks(task_list, station_lookup, START, END)
+task_list = sort_tasks(task_list, station_lookup, START, END, dist=oracle.distance,
+                       rng=rng_stream(SEED, "sorter"))
 
 # ───────────────────── execute & log ──────────────────────
 print("=== RUN START ===")
@@ -68,17 +86,23 @@ print(f"[{len(robot.path):4}] +{len(robot.path)-prev_len:2}  Drive → END
 
 # ───────────────────── metrics summary ────────────────────
 elapsed_ms = (time.perf_counter() - start_wall) * 1000
-loaded_steps = sum(robot.loaded_log)
-util_pct = loaded_steps / len(robot.loaded_log) * 100
-print(f"=== RUN END | Total dist {len(robot.path)} | Makespan {len(robot.path)} | "
-      f"Loaded {loaded_steps} ({util_pct:.1f}%) | Idle {len(robot.path)-loaded_steps} | "
+trajectory = robot.trajectory
+loaded_steps = trajectory.loaded_steps()
+util_pct = trajectory.loaded_ratio() * 100
+print(f"=== RUN END | Total dist {len(trajectory)} cells | Path length {trajectory.distance():.1f} | "
+      f"Makespan {clock.now():.1f} s (sim) | "
+      f"Loaded {loaded_steps} ({util_pct:.1f}%) | Idle {len(trajectory)-loaded_steps} | "
       f"Tasks {len(task_list)} | CPU wall {elapsed_ms:.1f} ms ===")
+cache = robot.route_cache
+print(f"Route cache: {cache.hits} hits / {cache.misses} misses "
+      f"({cache.hit_rate * 100:.1f}% hit rate)")
+profiler.stop()
 
 # ───────────────────── plotting ───────────────────────────
 
 def _plot(grid: GridMap, robot: Robot):
-    xs = [c + 0.5 for _, c in robot.path]
-    ys = [r + 0.5 for r, _ in robot.path]
+    xs = [c + 0.5 for c in robot.trajectory.cols]
+    ys = [r + 0.5 for r in robot.trajectory.rows]
 
     fig, ax = plt.subplots(figsize=(6, 6))
     # grid lines
@@ -111,4 +135,9 @@ def _plot(grid: GridMap, robot: Robot):
     plt.show()
 
 if __name__ == "__main__":
-    _plot(grid, robot)
+    try:
+        import matplotlib.pyplot as plt     # optional: only needed for the plot
+    except ImportError:
+        print("matplotlib not installed – skipping plot")
+    else:
+        _plot(grid, robot)
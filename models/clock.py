@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple
+
+# seconds per action kind; "step" is the travel time for one grid cell
+DEFAULT_DURATIONS: Dict[str, float] = {"pick": 1.0, "place": 1.0, "other": 1.0, "step": 1.0}
+
+
+class Clock(ABC):
+    """Time source robots use to account for actions and travel.
+
+    `default_durations` are the per-kind durations a `Robot` on this clock
+    uses unless it is given its own.
+    """
+
+    default_durations: Dict[str, float] = DEFAULT_DURATIONS
+
+    @abstractmethod
+    def now(self) -> float:
+        """Current time in seconds."""
+
+    @abstractmethod
+    def sleep(self, seconds: float):
+        """Let `seconds` pass (blocking)."""
+
+    @abstractmethod
+    async def wait(self, seconds: float):
+        """Non-blocking counterpart of `sleep` for coroutines."""
+
+    def join(self):
+        """Register a coroutine that will `wait` on this clock."""
+
+    def leave(self):
+        """Unregister a coroutine registered with `join`."""
+
+
+class SimClock(Clock):
+    """Virtual clock: `sleep` advances time instantly (simulation, benchmarks).
+
+    For fleets, coroutines `join` the clock and `wait` on it; virtual time
+    only jumps to the next wake-up once every joined coroutine is waiting,
+    so many robots interleave correctly without spending wall time.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+        self._active = 0
+        self._woken = 0                          # woken but not yet resumed
+        self._seq = 0
+        self._waiters: List[Tuple[float, int, asyncio.Future]] = []
+
+    def now(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("Cannot sleep a negative duration")
+        self._now += seconds
+
+    async def wait(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("Cannot sleep a negative duration")
+        if not self._active:                    # nobody to interleave with
+            self._now += seconds
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (self._now + seconds, self._seq, fut))
+        self._seq += 1
+        self._advance()
+        await fut
+        self._woken -= 1
+
+    def join(self):
+        self._active += 1
+
+    def leave(self):
+        self._active -= 1
+        self._advance()
+
+    def _advance(self):
+        """Wake the earliest waiters once all joined coroutines are blocked."""
+        if self._woken or not self._waiters or len(self._waiters) < self._active:
+            return
+        wake = self._waiters[0][0]
+        self._now = max(self._now, wake)
+        while self._waiters and self._waiters[0][0] <= wake:
+            heapq.heappop(self._waiters)[2].set_result(None)
+            self._woken += 1
+
+
+class RealClock(Clock):
+    """Wall clock for hardware runs: `sleep` really blocks.
+
+    Travel takes no extra time by default: on hardware the drive itself is
+    the delay, so only pick / place / other actions wait (as the original
+    fixed one-second sleeps did).  Pass ``durations={"step": ...}`` to the
+    robot to pace simulated travel in real time.
+    """
+
+    default_durations = {**DEFAULT_DURATIONS, "step": 0.0}
+
+    def __init__(self):
+        self._t0 = time.perf_counter()
+
+    def now(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def sleep(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("Cannot sleep a negative duration")
+        time.sleep(seconds)
+
+    async def wait(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("Cannot sleep a negative duration")
+        await asyncio.sleep(seconds)
+
+
+def action_kind(task_name: str) -> str:
+    """Map a task name onto a duration key ("pick", "place" or "other")."""
+    name = task_name.lower()
+    if "pick" in name:
+        return "pick"
+    if "place" in name:
+        return "place"
+    return "other"
@@ -7,7 +7,7 @@ import ast   # safe literal_eval
 # 1)  Locate project root and the config file correctly
 # ------------------------------------------------------------------ #
 BASE_DIR     = Path(__file__).resolve().parent.parent   # one level above /models
-CONFIG_PATH  = BASE_DIR / "models\config.txt"                  # e.g. .../Tasksorting/config.txt
+CONFIG_PATH  = BASE_DIR / "models" / "config.txt"             # e.g. .../Tasksorting/models/config.txt
 
 # ------------------------------------------------------------------ #
 def _parse(val: str) -> Union[int, List[str], Dict[str, tuple]]:
@@ -16,7 +16,7 @@ def _parse(val: str) -> Union[int, List[str], Dict[str, tuple]]:
         return int(val)
     if val.startswith("{") and val.endswith("}"):
         out = ast.literal_eval(val)
-        return {k: tuple(v) for k, v in out.items()}
+        return {k: tuple(v) if isinstance(v, (list, tuple)) else v for k, v in out.items()}
     return [part.strip() for part in val.split(",") if part.strip()]
 
 # ------------------------------------------------------------------ #
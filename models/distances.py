@@ -0,0 +1,128 @@
+"""All-pairs station distances measured on the real `GridMap`.
+
+One BFS per point of interest (work-stations plus e.g. START / END) over the
+occupancy grid yields the true 4-neighbour path length to every other point,
+obstacles included.  Lengths live in one flat ``array('i')`` (n × n) and each
+BFS tree is kept as one byte per cell so paths can be rebuilt on demand
+without another search.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List
+
+import models.movement
+from models.map import Coordinate, GridMap
+
+_UNREACHABLE = -1
+
+
+class StationOracle:
+    """Precomputed path lengths / paths between a fixed set of grid points.
+
+    The tables are rebuilt lazily on the next query after `GridMap.version`
+    changes (i.e. after obstacles were added through the map API).
+    """
+
+    def __init__(self, grid: GridMap, points: Iterable[Coordinate], *,
+                 keep_paths: bool = True):
+        self.grid = grid
+        self.points: List[Coordinate] = list(dict.fromkeys(points))
+        for p in self.points:
+            if not grid.in_bounds(p):
+                raise ValueError(f"Point {p} outside grid")
+        self.index: Dict[Coordinate, int] = {p: i for i, p in enumerate(self.points)}
+        self.keep_paths = keep_paths
+        self._build()
+
+    @classmethod
+    def from_stations(cls, grid: GridMap, station_lookup: Dict[str, Coordinate],
+                      extra: Iterable[Coordinate] = (), **kwargs) -> "StationOracle":
+        """Oracle over every station coordinate plus `extra` points (START, END…)."""
+        return cls(grid, [*station_lookup.values(), *extra], **kwargs)
+
+    # ---------------- build ----------------
+    def _build(self):
+        self.version = self.grid.version
+        cols = self.grid.cols
+        self._blocked = self.grid.blocked_mask()
+        # tree code → offset from a cell to its BFS parent
+        self._step = (0, cols, -cols, 1, -1)
+
+        n = len(self.points)
+        self._dist = array("i", [_UNREACHABLE]) * (n * n)
+        self._trees: List[bytearray] = []
+        targets = [r * cols + c for r, c in self.points]
+        for i, src in enumerate(targets):
+            dist, tree = self._bfs(src)
+            row = i * n
+            for j, t in enumerate(targets):
+                self._dist[row + j] = dist[t]
+            if self.keep_paths:
+                self._trees.append(tree)
+
+    def _bfs(self, src: int):
+        rows, cols = self.grid.rows, self.grid.cols
+        blocked = self._blocked
+        dist = array("i", [_UNREACHABLE]) * (rows * cols)
+        tree = bytearray(rows * cols)
+        dist[src] = 0
+        queue = deque([src])
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            c = i % cols
+            # (neighbour, code pointing back to i)
+            if i >= cols:
+                n = i - cols
+                if dist[n] < 0 and not blocked[n]:
+                    dist[n] = d; tree[n] = 1; queue.append(n)
+            if i + cols < rows * cols:
+                n = i + cols
+                if dist[n] < 0 and not blocked[n]:
+                    dist[n] = d; tree[n] = 2; queue.append(n)
+            if c > 0:
+                n = i - 1
+                if dist[n] < 0 and not blocked[n]:
+                    dist[n] = d; tree[n] = 3; queue.append(n)
+            if c < cols - 1:
+                n = i + 1
+                if dist[n] < 0 and not blocked[n]:
+                    dist[n] = d; tree[n] = 4; queue.append(n)
+        return dist, tree
+
+    # ---------------- queries ----------------
+    def _refresh(self):
+        if self.version != self.grid.version:
+            self._build()
+
+    def knows(self, a: Coordinate, b: Coordinate) -> bool:
+        return a in self.index and b in self.index
+
+    def distance(self, a: Coordinate, b: Coordinate) -> float:
+        """True path length a → b (``math.inf`` when unreachable)."""
+        self._refresh()
+        d = self._dist[self.index[a] * len(self.points) + self.index[b]]
+        return math.inf if d == _UNREACHABLE else d
+
+    def path(self, a: Coordinate, b: Coordinate) -> List[Coordinate]:
+        """Shortest grid path a → b, both ends included."""
+        self._refresh()
+        i, j = self.index[a], self.index[b]
+        if self._dist[i * len(self.points) + j] == _UNREACHABLE:
+            raise RuntimeError("No path found – check obstacle layout")
+        if not self.keep_paths:
+            g = self.grid
+            return models.movement._a_star(a, b, g.rows, g.cols, g.obstacles)
+        # walk b's parents back towards the source a, then reverse
+        cols, step, tree = self.grid.cols, self._step, self._trees[i]
+        cur, src = b[0] * cols + b[1], a[0] * cols + a[1]
+        out = [cur]
+        while cur != src:
+            cur += step[tree[cur]]
+            out.append(cur)
+        out.reverse()
+        return [divmod(k, cols) for k in out]
@@ -0,0 +1,281 @@
+"""Hierarchical path planning (HPA*) for large factory floors.
+
+The `GridMap` is cut into square clusters.  Wherever two neighbouring
+clusters touch through free cells, *entrance* nodes are placed on both sides
+of the border; inside each cluster the entrance-to-entrance distances are
+precomputed once.  A query only searches this small abstract graph (plus the
+start / goal hooked into their clusters) and then refines each abstract edge
+with a search confined to one cluster.
+
+Paths are near-optimal (typically within a few percent), not guaranteed
+optimal.  Obstacles added through the map API only rebuild the clusters whose
+borders or interiors they touch.
+"""
+
+from __future__ import annotations
+
+import heapq
+from array import array
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from models.map import OBSTACLE, Coordinate, GridMap
+
+ClusterId = Tuple[int, int]
+Border = Tuple[ClusterId, ClusterId]
+Bounds = Tuple[int, int, int, int]          # r0, r1, c0, c1 (half-open)
+
+
+class HierarchicalPlanner:
+    """Abstract-graph planner usable as ``plan_path(..., planner=hpa)``."""
+
+    MIN_WIDE_ENTRANCE = 6   # runs this long get a transition at each end
+
+    def __init__(self, grid: GridMap, cluster_size: int = 10):
+        if cluster_size < 2:
+            raise ValueError("cluster_size must be at least 2")
+        self.grid = grid
+        self.size = cluster_size
+        self.crows = -(-grid.rows // cluster_size)
+        self.ccols = -(-grid.cols // cluster_size)
+        self._transitions: Dict[Border, List[Tuple[Coordinate, Coordinate]]] = {}
+        self._inter: Dict[Coordinate, Set[Coordinate]] = defaultdict(set)
+        self._intra: Dict[ClusterId, Dict[Coordinate, Dict[Coordinate, int]]] = {}
+        self.cluster_builds = 0
+        for border in self._all_borders():
+            self._scan_border(border)
+        for cid in self._all_clusters():
+            self._build_cluster(cid)
+        grid.subscribe(self._on_change)
+
+    # ---------------- geometry ----------------
+    def cluster_of(self, c: Coordinate) -> ClusterId:
+        return c[0] // self.size, c[1] // self.size
+
+    def bounds(self, cid: ClusterId) -> Bounds:
+        r0, c0 = cid[0] * self.size, cid[1] * self.size
+        return r0, min(r0 + self.size, self.grid.rows), c0, min(c0 + self.size, self.grid.cols)
+
+    def _all_clusters(self):
+        return [(r, c) for r in range(self.crows) for c in range(self.ccols)]
+
+    def _all_borders(self) -> List[Border]:
+        out = []
+        for r, c in self._all_clusters():
+            if c + 1 < self.ccols:
+                out.append(((r, c), (r, c + 1)))
+            if r + 1 < self.crows:
+                out.append(((r, c), (r + 1, c)))
+        return out
+
+    def _borders_of(self, cid: ClusterId) -> List[Border]:
+        r, c = cid
+        out = []
+        if c > 0:
+            out.append(((r, c - 1), cid))
+        if c + 1 < self.ccols:
+            out.append((cid, (r, c + 1)))
+        if r > 0:
+            out.append(((r - 1, c), cid))
+        if r + 1 < self.crows:
+            out.append((cid, (r + 1, c)))
+        return out
+
+    def _free(self, c: Coordinate) -> bool:
+        return c not in self.grid.obstacles
+
+    # ---------------- abstraction build ----------------
+    def _scan_border(self, border: Border):
+        """Recompute the transitions across one border; True if they changed."""
+        a, b = border
+        ar0, ar1, ac0, ac1 = self.bounds(a)
+        if a[0] == b[0]:        # side by side: vertical border line
+            pairs = [((r, ac1 - 1), (r, ac1)) for r in range(ar0, ar1)]
+        else:                   # stacked: horizontal border line
+            pairs = [((ar1 - 1, c), (ar1, c)) for c in range(ac0, ac1)]
+
+        new: List[Tuple[Coordinate, Coordinate]] = []
+        run: List[Tuple[Coordinate, Coordinate]] = []
+        for pair in pairs + [None]:
+            if pair is not None and self._free(pair[0]) and self._free(pair[1]):
+                run.append(pair)
+                continue
+            if run:
+                if len(run) >= self.MIN_WIDE_ENTRANCE:
+                    new.extend((run[0], run[-1]))
+                else:
+                    new.append(run[len(run) // 2])
+                run = []
+
+        old = self._transitions.get(border, [])
+        if old == new:
+            return False
+        for p, q in old:
+            self._inter[p].discard(q)
+            self._inter[q].discard(p)
+        for p, q in new:
+            self._inter[p].add(q)
+            self._inter[q].add(p)
+        self._transitions[border] = new
+        return True
+
+    def _nodes(self, cid: ClusterId) -> Set[Coordinate]:
+        nodes = set()
+        for border in self._borders_of(cid):
+            for p, q in self._transitions.get(border, ()):
+                nodes.add(p if self.cluster_of(p) == cid else q)
+        return nodes
+
+    def _build_cluster(self, cid: ClusterId):
+        nodes = list(self._nodes(cid))
+        bounds = self.bounds(cid)
+        mask = self._cluster_mask(bounds)
+        table: Dict[Coordinate, Dict[Coordinate, int]] = {}
+        for n in nodes:
+            dist, _ = self._local_bfs(n, bounds, mask)
+            table[n] = {}
+            for m in nodes:
+                d = dist[self._local_index(m, bounds)]
+                if m != n and d >= 0:
+                    table[n][m] = d
+        self._intra[cid] = table
+        self.cluster_builds += 1
+
+    def _on_change(self, cells: Set[Coordinate]):
+        touched = {self.cluster_of(c) for c in cells}
+        rebuild = set(touched)
+        for cid in touched:
+            for border in self._borders_of(cid):
+                if self._scan_border(border):
+                    rebuild.update(border)
+        for cid in rebuild:
+            self._build_cluster(cid)
+
+    # ---------------- local search ----------------
+    def _cluster_mask(self, bounds: Bounds) -> bytearray:
+        """Occupancy bytes of one cluster, padded with a border of obstacles."""
+        r0, r1, c0, c1 = bounds
+        w = c1 - c0 + 2
+        cols, occ = self.grid.cols, self.grid.occupancy
+        edge = bytes([OBSTACLE])
+        mask = bytearray(edge * w)
+        for r in range(r0, r1):
+            mask += edge + occ[r * cols + c0:r * cols + c1] + edge
+        mask += edge * w
+        return mask
+
+    @staticmethod
+    def _local_index(c: Coordinate, bounds: Bounds) -> int:
+        r0, _, c0, c1 = bounds
+        return (c[0] - r0 + 1) * (c1 - c0 + 2) + c[1] - c0 + 1
+
+    def _local_bfs(self, src: Coordinate, bounds: Bounds, mask: bytearray | None = None):
+        """BFS from `src` confined to `bounds`; returns flat local dist / parent arrays."""
+        if mask is None:
+            mask = self._cluster_mask(bounds)
+        w = bounds[3] - bounds[2] + 2
+        dist = array("i", [-1]) * len(mask)
+        parent = array("i", [-1]) * len(mask)
+        s = self._local_index(src, bounds)
+        dist[s] = 0
+        queue = deque([s])
+        pop, push = queue.popleft, queue.append
+        while queue:
+            cur = pop()
+            d = dist[cur] + 1
+            for nb in (cur - w, cur + w, cur - 1, cur + 1):
+                if dist[nb] < 0 and not mask[nb] & OBSTACLE:
+                    dist[nb] = d
+                    parent[nb] = cur
+                    push(nb)
+        return dist, parent
+
+    def _local_path(self, a: Coordinate, b: Coordinate, bounds: Bounds) -> Optional[List[Coordinate]]:
+        dist, parent = self._local_bfs(a, bounds)
+        cur = self._local_index(b, bounds)
+        if dist[cur] < 0:
+            return None
+        r0, _, c0, c1 = bounds
+        w = c1 - c0 + 2
+        out = [cur]
+        while parent[cur] >= 0:
+            cur = parent[cur]
+            out.append(cur)
+        out.reverse()
+        return [(i // w - 1 + r0, i % w - 1 + c0) for i in out]
+
+    def _hook(self, c: Coordinate, cid: ClusterId) -> Dict[Coordinate, int]:
+        """Distances from `c` to the entrance nodes of its cluster."""
+        bounds = self.bounds(cid)
+        dist, _ = self._local_bfs(c, bounds)
+        out = {}
+        for n in self._nodes(cid):
+            d = dist[self._local_index(n, bounds)]
+            if d >= 0:
+                out[n] = d
+        return out
+
+    # ---------------- query ----------------
+    def find_path(self, start: Coordinate, goal: Coordinate) -> List[Coordinate]:
+        if not (self.grid.in_bounds(start) and self.grid.in_bounds(goal)) \
+                or not self._free(start) or not self._free(goal):
+            raise RuntimeError("No path found – check obstacle layout")
+        if start == goal:
+            return [start]
+        cs, cg = self.cluster_of(start), self.cluster_of(goal)
+
+        direct = self._local_path(start, goal, self.bounds(cs)) if cs == cg else None
+
+        # hook start / goal into their clusters
+        start_edges = self._hook(start, cs)
+        goal_edges = self._hook(goal, cg)
+
+        def neighbours(n: Coordinate):
+            if n == start:
+                yield from start_edges.items()
+            yield from self._intra.get(self.cluster_of(n), {}).get(n, {}).items()
+            for m in self._inter.get(n, ()):
+                yield m, 1
+            if n in goal_edges:
+                yield goal, goal_edges[n]
+
+        h = lambda c: abs(c[0] - goal[0]) + abs(c[1] - goal[1])
+        frontier = [(h(start), 0, start)]
+        g_cost: Dict[Coordinate, int] = {start: 0}
+        parent: Dict[Coordinate, Coordinate] = {}
+        abstract: Optional[List[Coordinate]] = None
+        while frontier:
+            f, g, cur = heapq.heappop(frontier)
+            if direct is not None and f >= len(direct) - 1:
+                break   # the in-cluster path can't be beaten
+            if cur == goal:
+                abstract = [goal]
+                while abstract[-1] != start:
+                    abstract.append(parent[abstract[-1]])
+                abstract.reverse()
+                break
+            if g > g_cost[cur]:
+                continue
+            for nb, w in neighbours(cur):
+                ng = g + w
+                if nb not in g_cost or ng < g_cost[nb]:
+                    g_cost[nb] = ng
+                    parent[nb] = cur
+                    heapq.heappush(frontier, (ng + h(nb), ng, nb))
+
+        if abstract is None:
+            if direct is None:
+                raise RuntimeError("No path found – check obstacle layout")
+            return direct
+        return self._refine(abstract)
+
+    def _refine(self, abstract: List[Coordinate]) -> List[Coordinate]:
+        path = [abstract[0]]
+        for u, v in zip(abstract, abstract[1:]):
+            cu = self.cluster_of(u)
+            if cu != self.cluster_of(v):        # inter-cluster edge: one step
+                path.append(v)
+                continue
+            seg = self._local_path(u, v, self.bounds(cu))
+            path.extend(seg[1:])
+        return path
@@ -0,0 +1,262 @@
+"""Lightweight instrumentation for the planning / execution hot paths.
+
+Off by default.  While disabled every hook is a single module-attribute test
+(`timed` wrappers call straight through, `count` / `peak` return at once),
+so the instrumented functions cost the same as before to within noise.
+
+    from models import instrument
+    instrument.enable(trace=True)
+    ...                                   # run planners, sorters, robots
+    print(instrument.summary())
+    instrument.write_chrome_trace("trace.json")   # open in chrome://tracing / Perfetto
+
+Recorded data:
+* timers   – per-name call count, total / mean / max latency (`timed`, `span`);
+* counters – summed quantities such as nodes expanded (`count`);
+* peaks    – running maxima such as the A* frontier size (`peak`);
+* watched caches – anything with a ``stats()`` dict (`RouteCache`,
+  `DistanceCache`), read when the summary is built (`watch`).
+
+With ``trace=True`` every timed call is also kept as a Chrome trace
+"complete" event (capped at `max_events`).  `RunProfiler` bundles this with
+opt-in `cProfile` / `tracemalloc` around a whole run (see ``profile`` in
+config.txt).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List
+
+ENABLED = False
+
+_timers: Dict[str, List[float]] = {}        # name -> [calls, total_s, max_s]
+_counters: Dict[str, float] = {}
+_peaks: Dict[str, float] = {}
+_watched: Dict[str, object] = {}
+_events: List[dict] | None = None
+_max_events = 0
+_t0 = time.perf_counter()
+
+
+# ---------------------------------------------------------------------------
+#  Switches
+# ---------------------------------------------------------------------------
+
+def enable(trace: bool = False, max_events: int = 1_000_000):
+    """Start recording (and keep trace events if `trace`)."""
+    global ENABLED, _events, _max_events
+    ENABLED = True
+    _events = [] if trace else None
+    _max_events = max_events
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    """Drop everything recorded so far (the enabled state is kept)."""
+    global _t0
+    _timers.clear()
+    _counters.clear()
+    _peaks.clear()
+    _watched.clear()
+    if _events is not None:
+        _events.clear()
+    _t0 = time.perf_counter()
+
+
+# ---------------------------------------------------------------------------
+#  Hooks
+# ---------------------------------------------------------------------------
+
+def _record(name: str, start: float, end: float):
+    dur = end - start
+    t = _timers.get(name)
+    if t is None:
+        _timers[name] = [1, dur, dur]
+    else:
+        t[0] += 1
+        t[1] += dur
+        if dur > t[2]:
+            t[2] = dur
+    if _events is not None and len(_events) < _max_events:
+        _events.append({"name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                        "ts": (start - _t0) * 1e6, "dur": dur * 1e6})
+
+
+def timed(name: str | None = None) -> Callable:
+    """Decorator timing every call of the function under `name`."""
+    def deco(fn: Callable) -> Callable:
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _record(label, start, time.perf_counter())
+        return wrapper
+    return deco
+
+
+class span:
+    """Context manager timing an inline block: ``with instrument.span("x"): ...``."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        if ENABLED:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED and self.start:
+            _record(self.name, self.start, time.perf_counter())
+        return False
+
+
+def count(name: str, n: float = 1):
+    """Add `n` to counter `name`."""
+    if ENABLED:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def peak(name: str, value: float):
+    """Keep the largest `value` seen for `name`."""
+    if ENABLED and value > _peaks.get(name, float("-inf")):
+        _peaks[name] = value
+
+
+def watch(name: str, cache):
+    """Report `cache.stats()` (hits, misses, hit_rate, …) in the summary."""
+    _watched[name] = cache
+
+
+# ---------------------------------------------------------------------------
+#  Export
+# ---------------------------------------------------------------------------
+
+def snapshot() -> dict:
+    """Everything recorded so far as plain data (times in ms)."""
+    return {
+        "timers": {k: {"calls": int(c), "total_ms": tot * 1000, "mean_ms": tot / c * 1000, "max_ms": mx * 1000}
+                   for k, (c, tot, mx) in _timers.items()},
+        "counters": dict(_counters),
+        "peaks": dict(_peaks),
+        "caches": {k: c.stats() for k, c in _watched.items()},
+    }
+
+
+def summary() -> str:
+    """Human-readable table, slowest timers first."""
+    snap = snapshot()
+    lines = [f"{'timer':<44} {'calls':>8} {'total ms':>11} {'mean ms':>10} {'max ms':>10}"]
+    for name, t in sorted(snap["timers"].items(), key=lambda kv: -kv[1]["total_ms"]):
+        lines.append(f"{name:<44} {t['calls']:>8} {t['total_ms']:>11.2f} {t['mean_ms']:>10.3f} {t['max_ms']:>10.3f}")
+    if snap["counters"] or snap["peaks"]:
+        lines.append(f"{'counter':<44} {'value':>8}")
+        for name, v in sorted(snap["counters"].items()):
+            lines.append(f"{name:<44} {v:>8g}")
+        for name, v in sorted(snap["peaks"].items()):
+            lines.append(f"{name + ' (peak)':<44} {v:>8g}")
+    for name, s in sorted(snap["caches"].items()):
+        lines.append(f"{name:<44} {s['hits']} hits / {s['misses']} misses ({s['hit_rate'] * 100:.1f}% hit rate)")
+    return "\n".join(lines)
+
+
+def write_chrome_trace(path: str | Path):
+    """Write recorded spans (plus final counters) in Chrome trace-event JSON."""
+    if _events is None:
+        raise RuntimeError("Tracing is off – call instrument.enable(trace=True) first")
+    now = (time.perf_counter() - _t0) * 1e6
+    counters = [{"name": name, "ph": "C", "pid": os.getpid(), "ts": now, "args": {"value": v}}
+                for name, v in {**_counters, **_peaks}.items()]
+    Path(path).write_text(json.dumps({"traceEvents": _events + counters, "displayTimeUnit": "ms"}),
+                          encoding="utf-8")
+
+
+# ---------------------------------------------------------------------------
+#  Whole-run profiling
+# ---------------------------------------------------------------------------
+
+class RunProfiler:
+    """Opt-in profiling around a complete run.
+
+    `modes` is any subset of:
+    * ``instrument`` – hot-path timers/counters, summary printed at `stop`;
+    * ``trace``      – as ``instrument`` plus ``trace.json`` (Chrome trace);
+    * ``cprofile``   – `cProfile` of the run, top functions printed and the
+      raw stats saved to ``profile.pstats``;
+    * ``tracemalloc`` – peak traced memory and the top allocation sites.
+    Files go to `out_dir`.  With no modes, `start` / `stop` do nothing.
+    """
+
+    MODES = {"instrument", "trace", "cprofile", "tracemalloc"}
+
+    def __init__(self, modes: Iterable[str], out_dir: str | Path = ".", top: int = 15):
+        self.modes = set(modes)
+        unknown = self.modes - self.MODES
+        if unknown:
+            raise ValueError(f"Unknown profile mode(s) {sorted(unknown)} (choose from {', '.join(sorted(self.MODES))})")
+        self.out_dir = Path(out_dir)
+        self.top = top
+        self._profile: cProfile.Profile | None = None
+
+    def start(self):
+        if self.modes & {"instrument", "trace"}:
+            reset()
+            enable(trace="trace" in self.modes)
+        if "tracemalloc" in self.modes:
+            tracemalloc.start()
+        if "cprofile" in self.modes:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> str:
+        """Stop every active profiler and return (and print) the report."""
+        parts = []
+        if self._profile is not None:
+            self._profile.disable()
+        if "tracemalloc" in self.modes and tracemalloc.is_tracing():     # before any report allocations
+            current, peak_bytes = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:self.top]
+            tracemalloc.stop()
+            parts.append(f"Memory: {current / 1024:.1f} KiB live, {peak_bytes / 1024:.1f} KiB peak\n"
+                         + "\n".join(str(s) for s in stats))
+        if self._profile is not None:
+            path = self.out_dir / "profile.pstats"
+            self._profile.dump_stats(path)
+            buf = io.StringIO()
+            pstats.Stats(self._profile, stream=buf).sort_stats("cumulative").print_stats(self.top)
+            parts.append(buf.getvalue().strip() + f"\n(raw stats: {path})")
+            self._profile = None
+        if self.modes & {"instrument", "trace"}:
+            disable()
+            parts.append(summary())
+            if "trace" in self.modes:
+                path = self.out_dir / "trace.json"
+                write_chrome_trace(path)
+                parts.append(f"Chrome trace: {path}")
+        report = "\n\n".join(parts)
+        if report:
+            print(report)
+        return report
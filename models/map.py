@@ -1,8 +1,77 @@
+import inspect
 import random
-from typing import Set, Tuple, Iterable
+import weakref
+from collections.abc import MutableSet
+from typing import Callable, Iterator, List, Set, Tuple, Iterable
 
 Coordinate = Tuple[int, int]
 
+# occupancy flags (one byte per cell)
+OBSTACLE = 1
+WORKSTATION = 2
+
+# bytes.translate tables isolating one flag as 0/1
+_FLAG_ONLY = {flag: bytes(1 if b & flag else 0 for b in range(256))
+              for flag in (OBSTACLE, WORKSTATION)}
+
+
+class CellSetView(MutableSet):
+    """`Set[Coordinate]`-like view over one flag of a `GridMap` occupancy array.
+
+    Membership is an O(1) byte test and iteration scans the array in C, so the
+    map never holds per-cell tuples.  Mutating the view is the raw equivalent
+    of editing the old sets: no validation and no change notification.
+    """
+
+    __slots__ = ("grid", "flag", "_count")
+
+    def __init__(self, grid: "GridMap", flag: int):
+        self.grid = grid
+        self.flag = flag
+        self._count = 0
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return set(it)
+
+    def __contains__(self, c) -> bool:
+        try:
+            r, c1 = c
+        except (TypeError, ValueError):
+            return False
+        g = self.grid
+        return 0 <= r < g.rows and 0 <= c1 < g.cols and bool(g.occupancy[r * g.cols + c1] & self.flag)
+
+    def __iter__(self) -> Iterator[Coordinate]:
+        mask = self.grid.occupancy.translate(_FLAG_ONLY[self.flag])
+        cols = self.grid.cols
+        i = mask.find(1)
+        while i != -1:
+            yield divmod(i, cols)
+            i = mask.find(1, i + 1)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, c: Coordinate):
+        g = self.grid
+        if not g.in_bounds(c):
+            raise ValueError(f"Cell {c} outside grid")
+        i = c[0] * g.cols + c[1]
+        if not g.occupancy[i] & self.flag:
+            g.occupancy[i] |= self.flag
+            self._count += 1
+
+    def discard(self, c: Coordinate):
+        if c in self:
+            g = self.grid
+            g.occupancy[c[0] * g.cols + c[1]] &= ~self.flag & 0xFF
+            self._count -= 1
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({set(self)!r})"
+
+
 class GridMap:
     """2-D occupancy grid representing the factory floor.
 
@@ -10,6 +79,11 @@ class GridMap:
     * Add work-stations and obstacles with bounds checking.
     * `generate_random_obstacles` helper to sprinkle obstacles while avoiding
       reserved cells (work-stations + any caller-provided `forbid` set).
+    * `version` counter bumped on every obstacle change; `subscribe` callbacks
+      receive the set of newly blocked cells (used by route caches); bound
+      methods are held weakly, so dropped subscribers stop listening.
+    * Backed by one contiguous ``bytearray`` (`occupancy`, row-major, flat index
+      ``r * cols + c``); `obstacles` / `workstations` are set-like views on it.
     """
 
     def __init__(self, rows: int, cols: int):
@@ -17,14 +91,29 @@ class GridMap:
             raise ValueError("Grid dimensions must be positive")
         self.rows = rows
         self.cols = cols
-        self.workstations: Set[Coordinate] = set()
-        self.obstacles: Set[Coordinate] = set()
+        self.occupancy = bytearray(rows * cols)
+        self.workstations: CellSetView = CellSetView(self, WORKSTATION)
+        self.obstacles: CellSetView = CellSetView(self, OBSTACLE)
+        self.version: int = 0
+        self._listeners: List[Callable[[], Callable | None]] = []     # weak refs to callbacks
 
     # ---------------- geometry ----------------
     def in_bounds(self, c: Coordinate) -> bool:
         r, c1 = c
         return 0 <= r < self.rows and 0 <= c1 < self.cols
 
+    def index(self, c: Coordinate) -> int:
+        """Flat cell index of coordinate `c`."""
+        return c[0] * self.cols + c[1]
+
+    def coord(self, i: int) -> Coordinate:
+        """Coordinate of flat cell index `i`."""
+        return divmod(i, self.cols)
+
+    def blocked_mask(self) -> bytearray:
+        """Copy of the occupancy array with 1 for obstacles, 0 elsewhere."""
+        return self.occupancy.translate(_FLAG_ONLY[OBSTACLE])
+
     # ---------------- mutators ----------------
     def add_workstation(self, c: Coordinate):
         if not self.in_bounds(c):
@@ -36,18 +125,56 @@ class GridMap:
             raise ValueError("Obstacle outside grid")
         if c in self.workstations:
             raise ValueError("Cannot place obstacle on a workstation")
-        self.obstacles.add(c)
+        if c not in self.obstacles:
+            self.obstacles.add(c)
+            self._changed({c})
+
+    # ---------------- change notification ----
+    def subscribe(self, callback: Callable[[Set[Coordinate]], None]):
+        """Call `callback(cells)` whenever obstacles are added.
+
+        A bound method is only referenced weakly: once its object is garbage
+        collected the subscription lapses (no `unsubscribe` needed).  Plain
+        functions are kept alive until unsubscribed.
+        """
+        if inspect.ismethod(callback):
+            self._listeners.append(weakref.WeakMethod(callback))
+        else:
+            self._listeners.append(lambda: callback)
+
+    def unsubscribe(self, callback: Callable[[Set[Coordinate]], None]):
+        for i, ref in enumerate(self._listeners):
+            if ref() == callback:
+                del self._listeners[i]
+                return
+        raise ValueError("Callback is not subscribed")
+
+    def _changed(self, cells: Set[Coordinate]):
+        self.version += 1
+        self._listeners = [ref for ref in self._listeners if ref() is not None]
+        for ref in list(self._listeners):
+            cb = ref()
+            if cb is not None:
+                cb(cells)
 
     # ---------------- convenience -------------
     def generate_random_obstacles(self,
                                   count: int,
                                   *,
                                   forbid: Iterable[Coordinate] = (),
-                                  seed: int | None = None):
-        """Generate `count` random obstacles avoiding work-stations and `forbid`."""
-        rng = random.Random(seed)
+                                  seed: int | None = None,
+                                  rng: random.Random | None = None):
+        """Generate `count` random obstacles avoiding work-stations and `forbid`.
+
+        Draws from `rng` if given, else from a fresh ``Random(seed)``.
+        """
+        rng = rng if rng is not None else random.Random(seed)
         avoid = set(self.workstations).union(forbid)
+        added: Set[Coordinate] = set()
         while len(self.obstacles) < count:
             c = (rng.randint(0, self.rows - 1), rng.randint(0, self.cols - 1))
             if c not in self.obstacles and c not in avoid:
-                self.obstacles.add(c)
\ No newline at end of file
+                self.obstacles.add(c)
+                added.add(c)
+        if added:
+            self._changed(added)
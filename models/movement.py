@@ -1,13 +1,38 @@
 from __future__ import annotations
 import heapq
+import math
+from array import array
 from typing import Dict, List, Set, Tuple
 
+from models import instrument
+from models.map import CellSetView, GridMap, OBSTACLE
+
 Coordinate = Tuple[int, int]  # (row, col)
 
 
+def _count(stats: dict | None, expanded: int, frontier: int = 0):
+    """Add a search's expanded-node count to an optional `stats` dict.
+
+    Also feeds the `instrument` counters (expanded nodes, frontier peak)
+    when instrumentation is on.
+    """
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    if instrument.ENABLED:
+        instrument.count("search.expanded", expanded)
+        instrument.peak("search.frontier_peak", frontier)
+
+
+@instrument.timed("movement._a_star")
 def _a_star(start: Coordinate, goal: Coordinate, rows: int, cols: int,
-            obstacles: Set[Coordinate]) -> List[Coordinate]:
-    """Classic 4‑neighbour A* search on a rectangular grid."""
+            obstacles: Set[Coordinate], stats: dict | None = None) -> List[Coordinate]:
+    """Classic 4‑neighbour A* search on a rectangular grid.
+
+    Every search in this module accepts an optional `stats` dict and adds
+    the number of nodes it expanded under ``"expanded"``.
+    """
+    if isinstance(obstacles, CellSetView):
+        return _a_star_flat(start, goal, rows, cols, obstacles.grid.occupancy, stats)
 
     def in_bounds(c: Coordinate) -> bool:
         r, c1 = c
@@ -25,15 +50,21 @@ def _a_star(start: Coordinate, goal: Coordinate, rows: int, cols: int,
     frontier: List[Tuple[int, int, Coordinate]] = [(h(start), 0, start)]
     g_cost: Dict[Coordinate, int] = {start: 0}
     parent: Dict[Coordinate, Coordinate] = {}
+    expanded = peak = 0
+    track = instrument.ENABLED
 
     while frontier:
         f, g, cur = heapq.heappop(frontier)
         if cur == goal:
+            _count(stats, expanded, peak)
             path = [goal]
             while path[-1] != start:
                 path.append(parent[path[-1]])
             path.reverse()
             return path
+        expanded += 1
+        if track and len(frontier) > peak:
+            peak = len(frontier)
         for nb in neighbours(cur):
             ng = g + 1
             if nb not in g_cost or ng < g_cost[nb]:
@@ -41,44 +72,488 @@ def _a_star(start: Coordinate, goal: Coordinate, rows: int, cols: int,
                 parent[nb] = cur
                 heapq.heappush(frontier, (ng + h(nb), ng, nb))
 
+    _count(stats, expanded, peak)
+    raise RuntimeError("No path found – check obstacle layout")
+
+
+def _a_star_flat(start: Coordinate, goal: Coordinate, rows: int, cols: int,
+                 occupancy: bytearray, stats: dict | None = None) -> List[Coordinate]:
+    """A* over flat cell indices of a `GridMap` occupancy array.
+
+    Same expansion order (and therefore same path) as `_a_star`, but nodes
+    are plain ints, g-costs / parents live in flat arrays, neighbours are
+    fixed offsets and blocking is a byte test.
+    """
+    s = start[0] * cols + start[1]
+    t = goal[0] * cols + goal[1]
+    gr, gc = goal
+    size = rows * cols
+    push, pop = heapq.heappush, heapq.heappop
+    unseen = size + 1
+    g_cost = array("i", [unseen]) * size
+    parent = array("i", [-1]) * size
+    g_cost[s] = 0
+
+    frontier: List[Tuple[int, int, int]] = [(abs(start[0] - gr) + abs(start[1] - gc), 0, s)]
+    expanded = peak = 0
+    track = instrument.ENABLED
+
+    while frontier:
+        f, g, cur = pop(frontier)
+        if cur == t:
+            _count(stats, expanded, peak)
+            path = [t]
+            while path[-1] != s:
+                path.append(parent[path[-1]])
+            path.reverse()
+            return [divmod(i, cols) for i in path]
+        if g > g_cost[cur]:
+            continue  # stale heap entry
+        expanded += 1
+        if track and len(frontier) > peak:
+            peak = len(frontier)
+        ng = g + 1
+        r, c = divmod(cur, cols)
+        # neighbours in `_a_star` order: up, down, left, right
+        if r > 0:
+            nb = cur - cols
+            if ng < g_cost[nb] and not occupancy[nb] & OBSTACLE:
+                g_cost[nb] = ng; parent[nb] = cur
+                push(frontier, (ng + abs(r - 1 - gr) + abs(c - gc), ng, nb))
+        if r < rows - 1:
+            nb = cur + cols
+            if ng < g_cost[nb] and not occupancy[nb] & OBSTACLE:
+                g_cost[nb] = ng; parent[nb] = cur
+                push(frontier, (ng + abs(r + 1 - gr) + abs(c - gc), ng, nb))
+        if c > 0:
+            nb = cur - 1
+            if ng < g_cost[nb] and not occupancy[nb] & OBSTACLE:
+                g_cost[nb] = ng; parent[nb] = cur
+                push(frontier, (ng + abs(r - gr) + abs(c - 1 - gc), ng, nb))
+        if c < cols - 1:
+            nb = cur + 1
+            if ng < g_cost[nb] and not occupancy[nb] & OBSTACLE:
+                g_cost[nb] = ng; parent[nb] = cur
+                push(frontier, (ng + abs(r - gr) + abs(c + 1 - gc), ng, nb))
+
+    _count(stats, expanded, peak)
+    raise RuntimeError("No path found – check obstacle layout")
+
+
+def _obstacle_lookup(obstacles: Set[Coordinate]):
+    """Return a fast `blocked(r, c)` test for an obstacle set or grid view."""
+    if isinstance(obstacles, CellSetView):
+        grid = obstacles.grid
+        occ, rows, cols = grid.occupancy, grid.rows, grid.cols
+        return lambda r, c: 0 <= r < rows and 0 <= c < cols and occ[r * cols + c] & OBSTACLE
+    return lambda r, c: (r, c) in obstacles
+
+
+def _padded_mask(rows: int, cols: int, obstacles: Set[Coordinate]) -> bytearray:
+    """Blocked mask (1 = blocked) with a one‑cell blocked border.
+
+    Index of (r, c) is ``(r + 1) * (cols + 2) + c + 1``; the border removes
+    every bounds check from the inner search loops.
+    """
+    w = cols + 2
+    if isinstance(obstacles, CellSetView):
+        flat = obstacles.grid.blocked_mask()
+        mask = bytearray(b"\x01" * w)
+        for r in range(rows):
+            mask += b"\x01" + flat[r * cols:(r + 1) * cols] + b"\x01"
+        mask += b"\x01" * w
+        return mask
+    mask = bytearray(w * (rows + 2))
+    mask[:w] = mask[-w:] = b"\x01" * w
+    mask[::w] = mask[w - 1::w] = b"\x01" * (rows + 2)
+    for r, c in obstacles:
+        if 0 <= r < rows and 0 <= c < cols:
+            mask[(r + 1) * w + c + 1] = 1
+    return mask
+
+
+@instrument.timed("movement._jump_point_search")
+def _jump_point_search(start: Coordinate, goal: Coordinate, rows: int, cols: int,
+                       obstacles: Set[Coordinate], stats: dict | None = None) -> List[Coordinate]:
+    """Jump Point Search for 4‑neighbour uniform‑cost grids.
+
+    Straight runs are skipped until a *forced neighbour* (or the goal) makes a
+    cell interesting; vertical runs also probe sideways at every step.  Only
+    jump points enter the open list, and their straight‑line gaps are filled
+    back in, so the result is a cell‑by‑cell path of optimal length.
+    """
+    m = _padded_mask(rows, cols, obstacles)
+    w = cols + 2
+    s = (start[0] + 1) * w + start[1] + 1
+    t = (goal[0] + 1) * w + goal[1] + 1
+    if m[s] or m[t]:
+        raise RuntimeError("No path found – check obstacle layout")
+    gr, gc = goal[0] + 1, goal[1] + 1
+
+    def jump_h(i: int, d: int):                 # d = ±1
+        while True:
+            i += d
+            if m[i]:
+                return None
+            if i == t:
+                return i
+            if (not m[i - w] and m[i - w - d]) or (not m[i + w] and m[i + w - d]):
+                return i
+
+    def jump_v(i: int, d: int):                 # d = ±w
+        while True:
+            i += d
+            if m[i]:
+                return None
+            if i == t:
+                return i
+            if (not m[i - 1] and m[i - 1 - d]) or (not m[i + 1] and m[i + 1 - d]):
+                return i
+            if jump_h(i, 1) is not None or jump_h(i, -1) is not None:
+                return i
+
+    def successors(i: int, par: int):
+        if par < 0:
+            cands = (jump_v(i, -w), jump_v(i, w), jump_h(i, -1), jump_h(i, 1))
+        elif abs(i - par) < w:                  # arrived horizontally
+            cands = (jump_v(i, -w), jump_v(i, w), jump_h(i, 1 if i > par else -1))
+        else:                                   # arrived vertically
+            cands = (jump_h(i, -1), jump_h(i, 1), jump_v(i, w if i > par else -w))
+        return [j for j in cands if j is not None]
+
+    def h(i: int) -> int:
+        r, c = divmod(i, w)
+        return abs(r - gr) + abs(c - gc)
+
+    frontier: List[Tuple[int, int, int]] = [(h(s), 0, s)]
+    g_cost: Dict[int, int] = {s: 0}
+    parent: Dict[int, int] = {}
+    expanded = 0
+
+    while frontier:
+        f, g, cur = heapq.heappop(frontier)
+        if cur == t:
+            _count(stats, expanded)
+            jumps = [t]
+            while jumps[-1] != s:
+                jumps.append(parent[jumps[-1]])
+            jumps.reverse()
+            path = [s]
+            for a, b in zip(jumps, jumps[1:]):
+                step = (w if b > a else -w) if abs(b - a) >= w else (1 if b > a else -1)
+                path.extend(range(a + step, b + step, step))
+            return [(i // w - 1, i % w - 1) for i in path]
+        if g > g_cost[cur]:
+            continue
+        expanded += 1
+        cr, cc = divmod(cur, w)
+        for jp in successors(cur, parent.get(cur, -1)):
+            jr, jc = divmod(jp, w)
+            ng = g + abs(jr - cr) + abs(jc - cc)
+            if jp not in g_cost or ng < g_cost[jp]:
+                g_cost[jp] = ng
+                parent[jp] = cur
+                heapq.heappush(frontier, (ng + abs(jr - gr) + abs(jc - gc), ng, jp))
+
+    _count(stats, expanded)
     raise RuntimeError("No path found – check obstacle layout")
 
 
+@instrument.timed("movement._bidirectional_a_star")
+def _bidirectional_a_star(start: Coordinate, goal: Coordinate, rows: int, cols: int,
+                          obstacles: Set[Coordinate], stats: dict | None = None) -> List[Coordinate]:
+    """A* grown from both ends at once, meeting in the middle.
+
+    Each side uses Manhattan distance to the opposite end.  The best meeting
+    cost `mu` is only accepted once either frontier's smallest f reaches it,
+    which keeps the result optimal.
+    """
+    m = _padded_mask(rows, cols, obstacles)
+    w = cols + 2
+    s = (start[0] + 1) * w + start[1] + 1
+    t = (goal[0] + 1) * w + goal[1] + 1
+    if m[s] or m[t]:
+        raise RuntimeError("No path found – check obstacle layout")
+    if s == t:
+        return [start]
+
+    sides = []
+    for root, (tr, tc) in ((s, divmod(t, w)), (t, divmod(s, w))):
+        r, c = divmod(root, w)
+        h0 = abs(r - tr) + abs(c - tc)
+        # (open list, g-costs, parents, target row, target col)
+        sides.append(([(h0, 0, root)], {root: 0}, {}, tr, tc))
+    fwd, bwd = sides
+    mu, meet = math.inf, -1
+    expanded = 0
+
+    while fwd[0] and bwd[0]:
+        if fwd[0][0][0] >= mu or bwd[0][0][0] >= mu:
+            break
+        mine, other = (fwd, bwd) if len(fwd[0]) <= len(bwd[0]) else (bwd, fwd)
+        frontier, g_mine, par, tr, tc = mine
+        g_other = other[1]
+        f, g, cur = heapq.heappop(frontier)
+        if g > g_mine[cur]:
+            continue
+        expanded += 1
+        ng = g + 1
+        for nb in (cur - w, cur + w, cur - 1, cur + 1):
+            if m[nb]:
+                continue
+            if nb not in g_mine or ng < g_mine[nb]:
+                g_mine[nb] = ng
+                par[nb] = cur
+                r, c = divmod(nb, w)
+                heapq.heappush(frontier, (ng + abs(r - tr) + abs(c - tc), ng, nb))
+                if nb in g_other and ng + g_other[nb] < mu:
+                    mu, meet = ng + g_other[nb], nb
+
+    _count(stats, expanded)
+    if meet < 0:
+        raise RuntimeError("No path found – check obstacle layout")
+    path = [meet]
+    while path[-1] != s:
+        path.append(fwd[2][path[-1]])
+    path.reverse()
+    while path[-1] != t:
+        path.append(bwd[2][path[-1]])
+    return [(i // w - 1, i % w - 1) for i in path]
+
+
+PLANNERS = {
+    "astar": _a_star,
+    "jps": _jump_point_search,
+    "bidirectional": _bidirectional_a_star,
+}
+
+
+class DStarLite:
+    """Incremental planner (D* Lite) that repairs its route as obstacles appear.
+
+    The search runs backwards from `goal`, so when the robot moves only
+    `start` changes and nothing is recomputed.  The planner subscribes to the
+    `GridMap`; cells blocked via `add_obstacle` / `generate_random_obstacles`
+    are queued and repaired on the next query, re-expanding only the
+    vertices whose cost actually changed.  Call `close()` when done (or use
+    the planner as a context manager).
+    """
+
+    def __init__(self, grid: GridMap, start: Coordinate, goal: Coordinate):
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+        self.expanded = 0
+        self._last = start
+        self._km = 0
+        self._g: Dict[Coordinate, float] = {}
+        self._rhs: Dict[Coordinate, float] = {goal: 0}
+        self._queue: List[Tuple[float, float, Coordinate]] = []
+        self._keys: Dict[Coordinate, Tuple[float, float]] = {}
+        self._pending: Set[Coordinate] = set()
+        self._push(goal)
+        grid.subscribe(self._on_change)
+        self._compute()
+
+    # ---------------- bookkeeping ----------------
+    def _h(self, c: Coordinate) -> int:
+        return abs(c[0] - self.start[0]) + abs(c[1] - self.start[1])
+
+    def _key(self, c: Coordinate) -> Tuple[float, float]:
+        m = min(self._g.get(c, math.inf), self._rhs.get(c, math.inf))
+        return m + self._h(c) + self._km, m
+
+    def _push(self, c: Coordinate):
+        key = self._key(c)
+        self._keys[c] = key
+        heapq.heappush(self._queue, (key[0], key[1], c))
+
+    def _top(self):
+        while self._queue:
+            k1, k2, c = self._queue[0]
+            if self._keys.get(c) == (k1, k2):
+                return (k1, k2), c
+            heapq.heappop(self._queue)         # stale entry
+        return (math.inf, math.inf), None
+
+    def _neighbours(self, c: Coordinate):
+        r, c1 = c
+        for n in ((r - 1, c1), (r + 1, c1), (r, c1 - 1), (r, c1 + 1)):
+            if self.grid.in_bounds(n):
+                yield n
+
+    def _cost(self, a: Coordinate, b: Coordinate) -> float:
+        obstacles = self.grid.obstacles
+        return math.inf if a in obstacles or b in obstacles else 1
+
+    def _update(self, u: Coordinate):
+        if u != self.goal:
+            self._rhs[u] = min((self._cost(u, s) + self._g.get(s, math.inf)
+                                for s in self._neighbours(u)), default=math.inf)
+        self._keys.pop(u, None)
+        if self._g.get(u, math.inf) != self._rhs.get(u, math.inf):
+            self._push(u)
+
+    def _compute(self):
+        while True:
+            k_old, u = self._top()
+            g_start = self._g.get(self.start, math.inf)
+            if u is None or (k_old >= self._key(self.start)
+                             and self._rhs.get(self.start, math.inf) == g_start):
+                return
+            heapq.heappop(self._queue)
+            del self._keys[u]
+            self.expanded += 1
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u)
+            elif self._g.get(u, math.inf) > self._rhs.get(u, math.inf):
+                self._g[u] = self._rhs[u]
+                for p in self._neighbours(u):
+                    self._update(p)
+            else:
+                self._g[u] = math.inf
+                self._update(u)
+                for p in self._neighbours(u):
+                    self._update(p)
+
+    def _on_change(self, cells: Set[Coordinate]):
+        self._pending |= cells
+
+    def _repair(self):
+        if not self._pending:
+            return
+        self._km += abs(self._last[0] - self.start[0]) + abs(self._last[1] - self.start[1])
+        self._last = self.start
+        cells, self._pending = self._pending, set()
+        for c in cells:
+            self._update(c)
+            for n in self._neighbours(c):
+                self._update(n)
+        self._compute()
+
+    # ---------------- public API ----------------
+    def move_to(self, c: Coordinate):
+        """Tell the planner the robot now stands on `c`."""
+        self.start = c
+
+    def next_step(self) -> Coordinate:
+        """Best neighbouring cell towards the goal (after repairing changes)."""
+        self._repair()
+        if self.start == self.goal:
+            return self.goal
+        if self._g.get(self.start, math.inf) == math.inf:
+            raise RuntimeError("No path found – check obstacle layout")
+        return min(self._neighbours(self.start),
+                   key=lambda s: (self._cost(self.start, s) + self._g.get(s, math.inf), s))
+
+    def path(self) -> List[Coordinate]:
+        """Current best route from `start` to `goal`, both ends included."""
+        self._repair()
+        if self._g.get(self.start, math.inf) == math.inf:
+            raise RuntimeError("No path found – check obstacle layout")
+        out, cur = [self.start], self.start
+        while cur != self.goal:
+            cur = min(self._neighbours(cur),
+                      key=lambda s: (self._cost(cur, s) + self._g.get(s, math.inf), s))
+            out.append(cur)
+        return out
+
+    def close(self):
+        """Stop listening to map changes."""
+        self.grid.unsubscribe(self._on_change)
+
+    def __enter__(self) -> "DStarLite":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+@instrument.timed("movement._elastic_band")
 def _elastic_band(path: List[Coordinate], obstacles: Set[Coordinate], *,
                   iterations: int = 200, spring: float = 0.3,
-                  repel: float = 2.0, obstacle_radius: float = 1.5
-                  ) -> List[Tuple[float, float]]:
-    """Simple elastic‑band (TEB‑style) smoothing over an A* seed path."""
+                  repel: float = 2.0, obstacle_radius: float = 1.5,
+                  tol: float = 1e-3) -> List[Tuple[float, float]]:
+    """Simple elastic‑band (TEB‑style) smoothing over an A* seed path.
+
+    Obstacles are integer cells, so repulsion only looks at the cells within
+    `obstacle_radius` of each band point (bucket lookup) instead of scanning
+    every obstacle.  Stops early once no point moves more than `tol`.
+    """
 
     pts = [[float(r), float(c)] for r, c in path]
     r_sq = obstacle_radius ** 2
+    inv_r_sq = 1.0 / r_sq
 
-    for _ in range(iterations):
+    # few obstacles → scanning them all beats probing the neighbourhood
+    reach = obstacle_radius
+    probe_cells = (2 * math.ceil(reach) + 1) ** 2
+    every = list(obstacles) if len(obstacles) <= probe_cells else None
+    blocked = _obstacle_lookup(obstacles)
+    floor, ceil = math.floor, math.ceil
+
+    done = 0
+    for done in range(1, iterations + 1):
+        moved = 0.0
         for i in range(1, len(pts) - 1):
             prev, cur, nxt = pts[i - 1], pts[i], pts[i + 1]
+            x0, y0 = cur
             # spring force
             cur[0] += spring * ((prev[0] + nxt[0]) / 2 - cur[0])
             cur[1] += spring * ((prev[1] + nxt[1]) / 2 - cur[1])
+            x, y = cur
             # obstacle repulsion
+            if every is None:
+                near = [(ox, oy)
+                        for ox in range(ceil(x - reach), floor(x + reach) + 1)
+                        for oy in range(ceil(y - reach), floor(y + reach) + 1)
+                        if blocked(ox, oy)]
+            else:
+                near = every
             fx = fy = 0.0
-            for ox, oy in obstacles:
-                dx, dy = cur[0] - ox, cur[1] - oy
+            for ox, oy in near:
+                dx, dy = x - ox, y - oy
                 d2 = dx * dx + dy * dy or 1e-6
                 if d2 < r_sq:
-                    fac = 1.0 / d2 - 1.0 / r_sq
+                    fac = 1.0 / d2 - inv_r_sq
                     fx += dx * fac
                     fy += dy * fac
-            cur[0] += repel * fx
-            cur[1] += repel * fy
+            cur[0] = x + repel * fx
+            cur[1] = y + repel * fy
+            step = max(abs(cur[0] - x0), abs(cur[1] - y0))
+            if step > moved:
+                moved = step
+        if moved < tol:
+            break
 
+    instrument.count("elastic_band.iterations", done)
     return [(p[0], p[1]) for p in pts]
 
 
+@instrument.timed("movement.plan_path")
 def plan_path(rows: int, cols: int, start: Coordinate, goal: Coordinate,
-              obstacles: Set[Coordinate], *, smooth: bool = True
-              ) -> List[Tuple[float, float]]:
-    """Public API – A* path, optionally smoothed."""
-    grid_path = _a_star(start, goal, rows, cols, obstacles)
+              obstacles: Set[Coordinate], *, smooth: bool = True,
+              oracle=None, planner="astar", stats: dict | None = None) -> List[Tuple[float, float]]:
+    """Public API – grid path, optionally smoothed.
+
+    `planner` picks the search from `PLANNERS` ("astar", "jps",
+    "bidirectional"); all return paths of the same optimal length.  A
+    stateful planner object with a `find_path(start, goal)` method (e.g.
+    `models.hpa.HierarchicalPlanner`) may be passed instead.
+    If a `StationOracle` knowing both ends is given, its precomputed path is
+    used instead of a fresh search.  `stats` collects the search's
+    expanded-node count (see `_a_star`).
+    """
+    if isinstance(planner, str) and planner not in PLANNERS:
+        raise ValueError(f"Unknown planner '{planner}' (choose from {', '.join(PLANNERS)})")
+    if oracle is not None and oracle.knows(start, goal):
+        grid_path = oracle.path(start, goal)
+    elif isinstance(planner, str):
+        grid_path = PLANNERS[planner](start, goal, rows, cols, obstacles, stats)
+    else:
+        grid_path = planner.find_path(start, goal)
     if smooth:
         return _elastic_band(grid_path, obstacles)
     return [(float(r), float(c)) for r, c in grid_path]
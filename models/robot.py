@@ -1,73 +1,169 @@
-from typing import List, Tuple, Dict
+from typing import List, Dict
 
+from models import instrument
+from models.clock import Clock, SimClock, action_kind
 from models.map import Coordinate, GridMap
 import models.movement
+from models.route_cache import RouteCache
 from models.tasks import Task
-import random, time
+from models.trajectory import Trajectory, rasterize
+import random
 
 class Robot:
     """Mobile agent that logs every grid step and load status."""
 
-    def __init__(self, grid: GridMap, start: Coordinate):
+    def __init__(self, grid: GridMap, start: Coordinate, *, oracle=None,
+                 route_cache: RouteCache | None = None, planner="astar",
+                 clock: Clock | None = None, durations: Dict[str, float] | None = None,
+                 rng: random.Random | None = None):
         if not grid.in_bounds(start):
             raise ValueError("Robot start outside the grid")
         self.grid = grid
+        self.oracle = oracle                        # optional StationOracle
+        self.planner = planner                      # PLANNERS key or planner object (HPA*)
+        self.replanner = None                       # D* Lite state of the leg being driven
+        # simulated time by default; pass RealClock() when driving hardware
+        self.clock: Clock = clock if clock is not None else SimClock()
+        self.durations: Dict[str, float] = {**self.clock.default_durations, **(durations or {})}
+        # pick/place failure draws; pass a seeded stream for reproducible runs
+        self.rng = rng if rng is not None else random.Random()
+        # legs repeat constantly in pick/place runs – share a cache across robots if desired
+        self.route_cache = route_cache if route_cache is not None else RouteCache(grid)
         self.pos: Coordinate = start
         self.carrying: List[str] = []               # objects currently onboard
-        # Path log – list of (row, col) floats *after* each step
-        self.path: List[Tuple[float, float]] = [tuple(map(float, start))]
-        # Parallel log – True if robot is loaded *after* that step
-        self.loaded_log: List[bool] = [False]
+        # Trajectory log – cell, arrival time and load status *after* each step
+        self.trajectory = Trajectory(start, self.clock.now(), extent=max(grid.rows, grid.cols))
         self.score: int = 0
 
+    @property
+    def path(self):
+        """(row, col) floats *after* each step (read-only view of `trajectory`)."""
+        return self.trajectory.points
+
+    @property
+    def loaded_log(self):
+        """True if the robot is loaded *after* that step (parallel to `path`)."""
+        return self.trajectory.loaded
+
     # ------------------------------------------------------------------
     def _append_step(self, step: Coordinate):
         """Record a single grid move and current load status."""
         self.pos = step
-        self.path.append(tuple(map(float, step)))
-        self.loaded_log.append(bool(self.carrying))
+        self.trajectory.append(step, bool(self.carrying), self.clock.now())
+
+    # ------------------------------------------------------------------
+    def move_to(self, goal: Coordinate, *, smooth: bool = True, incremental: bool = False):
+        """Plan a path (or reuse a cached one) then step through it, logging each grid cell.
+
+        With `incremental=True` the leg is driven cell by cell via `drive`.
+        """
+        if incremental:
+            for _ in self.drive(goal):
+                pass
+            return
+        steps = self._plan_leg(goal, smooth)
+        dt = self.durations["step"]
+        if type(self.clock) is SimClock and steps:
+            # virtual time: nothing can observe the leg in between, log it at once
+            t0 = self.clock.now()
+            self.clock.sleep(dt * len(steps))
+            self.trajectory.extend(steps, bool(self.carrying), t0, dt)
+            self.pos = steps[-1]
+            return
+        for step in steps:                          # real / custom clocks see every cell
+            self.clock.sleep(dt)
+            self._append_step(step)
+
+    def _plan_leg(self, goal: Coordinate, smooth: bool) -> List[Coordinate]:
+        """Grid cells from the current position to `goal` (start excluded)."""
+        steps = self.route_cache.get(self.pos, goal, smooth)
+        if steps is None:
+            start = self.pos
+            segment = models.movement.plan_path(
+                self.grid.rows,
+                self.grid.cols,
+                start,
+                goal,
+                self.grid.obstacles,
+                smooth=smooth,
+                oracle=self.oracle,
+                planner=self.planner,
+            )
+            # Skip the first waypoint (equals current position)
+            steps = rasterize(segment[1:])
+            self.route_cache.put(start, goal, smooth, steps)
+        return steps
 
     # ------------------------------------------------------------------
-    def move_to(self, goal: Coordinate, *, smooth: bool = True):
-        """Plan a path then step through it, logging each grid cell."""
-        segment = models.movement.plan_path(
-            self.grid.rows,
-            self.grid.cols,
-            self.pos,
-            goal,
-            self.grid.obstacles,
-            smooth=smooth,
-        )
-        # Skip the first waypoint (equals current position)
-        for r_f, c_f in segment[1:]:
-            self._append_step((int(round(r_f)), int(round(c_f))))
+    def drive(self, goal: Coordinate):
+        """Step towards `goal` one cell at a time, yielding after every step.
+
+        A per-leg `DStarLite` planner is kept in `self.replanner`; obstacles
+        added to the grid between steps are repaired incrementally instead of
+        triggering a fresh search from the current position.
+        """
+        self.replanner = models.movement.DStarLite(self.grid, self.pos, goal)
+        try:
+            while self.pos != goal:
+                step = self.replanner.next_step()
+                self.clock.sleep(self.durations["step"])
+                self._append_step(step)
+                self.replanner.move_to(step)
+                yield step
+        finally:
+            self.replanner.close()
+            self.replanner = None
 
     # ------------------------------------------------------------------
+    @instrument.timed("Robot.execute_task")
     def execute_task(self, task: Task, station_lookup: Dict[str, Coordinate]):
-        """Travel to the task's station, perform pick/place with delay & failure, update logs, and return success."""
+        """Travel to the task's station, perform pick/place with delay & failure, update logs, and return success.
+
+        The pick/place delay comes from `self.durations` and is spent on `self.clock`.
+        """
         if task.station not in station_lookup:
             raise ValueError(f"Station '{task.station}' not found in map")
 
         # 1) Move to the station
         self.move_to(station_lookup[task.station])
 
-# 2) Simulate pick/place action with delay and possible failure
-        action_name = task.task_name.lower()
-        if "pick" in action_name:
-            time.sleep(1)  # simulate a 1-second pick delay
-            if random.random() < 0.1:    # 10% chance to fail picking
+        # 2) Simulate pick/place action with delay and possible failure
+        self.clock.sleep(self.durations[action_kind(task.task_name)])  # simulated (or real) action delay
+        return self._perform(task)
+
+    # ------------------------------------------------------------------
+    async def execute_task_async(self, task: Task, station_lookup: Dict[str, Coordinate], *,
+                                 smooth: bool = True):
+        """Coroutine twin of `execute_task` for fleets sharing one clock.
+
+        Every grid step and the pick/place delay are awaited on
+        `self.clock.wait`, so other robots run in between.
+        """
+        if task.station not in station_lookup:
+            raise ValueError(f"Station '{task.station}' not found in map")
+        step_time = self.durations["step"]
+        for step in self._plan_leg(station_lookup[task.station], smooth):
+            await self.clock.wait(step_time)
+            self._append_step(step)
+        await self.clock.wait(self.durations[action_kind(task.task_name)])
+        return self._perform(task)
+
+    # ------------------------------------------------------------------
+    def _perform(self, task: Task) -> bool:
+        """Apply the pick/place outcome (random failure) to load, logs and score."""
+        if action_kind(task.task_name) == "pick":
+            if self.rng.random() < 0.1:    # 10% chance to fail picking
                 success = False
             else:
                 success = True
                 # On success, add the object(s) to the robot's load
                 self.carrying.extend(task.objects)
         else:
-            time.sleep(1)  # simulate a 1-second place (or other task) delay
             # If any required object is not currently carried, the place fails
             if any(obj not in self.carrying for obj in task.objects):
                 success = False
             else:
-                if random.random() < 0.1:  # 10% chance to fail placing
+                if self.rng.random() < 0.1:  # 10% chance to fail placing
                     success = False
                 else:
                     success = True
@@ -75,7 +171,7 @@ class Robot:
                     for obj in task.objects:
                         self.carrying.remove(obj)
         # Update load status for the current cell (after action, no movement happened here)
-        self.loaded_log[-1] = bool(self.carrying)
+        self.trajectory.set_loaded(bool(self.carrying))
         # 3) Update score only if the task succeeded
         if success:
             self.score += task.points
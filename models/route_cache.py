@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import List, Optional, Set, Tuple
+
+from models.map import Coordinate, GridMap
+
+RouteKey = Tuple[Coordinate, Coordinate, bool]   # (start, goal, smooth)
+
+
+class RouteCache:
+    """Bounded LRU cache of planned legs, kept in sync with a `GridMap`.
+
+    Entries store the grid steps a robot drives for (start, goal, smooth) and
+    the map `version` they were planned against.  Adding obstacles only lengthens
+    paths, so a cached leg stays optimal unless a new obstacle lands on it
+    (or, for smoothed legs, within the elastic-band repulsion range) – only
+    those entries are dropped, the rest are re-stamped with the new version.
+    """
+
+    SMOOTH_MARGIN = 2   # cells around a smoothed leg that can bend the band
+
+    def __init__(self, grid: GridMap, capacity: int = 1024):
+        if capacity <= 0:
+            raise ValueError("Cache capacity must be positive")
+        self.grid = grid
+        self.capacity = capacity
+        self._entries: "OrderedDict[RouteKey, Tuple[int, Set[Coordinate], List[Coordinate]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        grid.subscribe(self._on_change)
+
+    # ---------------- lookup ----------------
+    def get(self, start: Coordinate, goal: Coordinate, smooth: bool) -> Optional[List[Coordinate]]:
+        key = (start, goal, smooth)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != self.grid.version:
+            if entry is not None:           # map changed behind our back
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, start: Coordinate, goal: Coordinate, smooth: bool, steps: List[Coordinate]):
+        key = (start, goal, smooth)
+        self._entries[key] = (self.grid.version, set(steps), steps)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def close(self):
+        """Stop listening to the grid (the cache is then invalid; drop it)."""
+        self.grid.unsubscribe(self._on_change)
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------------- invalidation ----------
+    def _on_change(self, cells: Set[Coordinate]):
+        m = self.SMOOTH_MARGIN
+        near = {(r + dr, c + dc) for r, c in cells
+                for dr in range(-m, m + 1) for dc in range(-m, m + 1)}
+        version = self.grid.version
+        for key, (_, visited, steps) in list(self._entries.items()):
+            if not visited.isdisjoint(near if key[2] else cells):
+                del self._entries[key]
+                self.invalidations += 1
+            else:
+                self._entries[key] = (version, visited, steps)
+
+    # ---------------- stats -----------------
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+        }
@@ -7,22 +7,23 @@ Coordinate = Tuple[int, int]
 rows = 20
 cols = 20
 n_ws = 10
-def unique_coords(rows: int, cols: int, k: int, forbid: Set[Coordinate]) -> Set[Coordinate]:
+def unique_coords(rows: int, cols: int, k: int, forbid: Set[Coordinate],
+                  rng: random.Random) -> Set[Coordinate]:
     coords: Set[Coordinate] = set()
     while len(coords) < k:
-        c = (random.randint(0, rows - 1), random.randint(0, cols - 1))
+        c = (rng.randint(0, rows - 1), rng.randint(0, cols - 1))
         if c not in coords and c not in forbid:
             coords.add(c)
     return coords
 
 def main(out_csv: str, seed: int):
-    random.seed(seed)
+    rng = random.Random(seed)       # own stream – leaves the global generator alone
 
     # reserve robot start
-    start: Coordinate = (random.randint(0, rows - 1), random.randint(0, cols - 1))
+    start: Coordinate = (rng.randint(0, rows - 1), rng.randint(0, cols - 1))
 
     # generate work-station coordinates (avoid start)
-    w_coords = unique_coords(rows, cols, n_ws, {start})
+    w_coords = unique_coords(rows, cols, n_ws, {start}, rng)
 
     # write CSV
     path = pathlib.Path(out_csv)
@@ -4,16 +4,16 @@ Generate tasks.csv so that:
   • robot starts empty
   • every object is picked at one station and placed at *another* station
   • pick & place appear consecutively
-Run:
-    python generate_tasks.py --count 4      # one pick+place per object
+Run (from the project root):
+    python -m models.task_generator --count 4      # one pick+place per object
 """
 
 import csv, random, argparse
 from pathlib import Path
 from typing import Dict, List, Tuple
 
-from stations import load_workstations   # your existing CSV loader
-from config_reader import CONFIG                    # rows, cols, objects list
+from models.stations import load_workstations   # your existing CSV loader
+from models.config_reader import CONFIG         # rows, cols, objects list
 
 Coordinate = Tuple[int, int]
 
@@ -22,12 +22,14 @@ Coordinate = Tuple[int, int]
 def build_random_jobs(n_obj: int,
                       stations: Dict[str, Coordinate],
                       objects: List[str],
-                      seed: int = 1) -> List[dict]:
+                      seed: int = 1,
+                      rng: random.Random | None = None) -> List[dict]:
     """
     Create 2*n_obj rows: Pick X @ A, Place X @ B, ensuring B ≠ A.
     One distinct object per job.  Reuses objects if n_obj > len(objects).
+    Draws from `rng` if given, else from ``Random(seed)``.
     """
-    rng = random.Random(seed)
+    rng = rng if rng is not None else random.Random(seed)
     task_rows: List[dict] = []
 
     # cycle through object list if caller requests more than unique objects
@@ -0,0 +1,117 @@
+"""Streaming task ingestion for large order feeds.
+
+`iter_tasks` parses a CSV or JSON Lines file row by row and yields `Task`
+objects as soon as each row is read and validated; `iter_chunks` groups them
+into fixed-size lists (or `TaskTable`s).  Nothing holds the whole file, so a
+rolling-horizon planner (`task_sorting.rolling`) can start on the first wave
+while the rest of the dump is still on disk.
+
+Row fields (CSV header or JSON keys): ``station``, ``objects``,
+``task_name`` and optional ``points``.  ``objects`` is a comma-separated
+string (CSV) or a string / list of strings (JSONL).  Missing points are
+computed as in `Task.from_csv` (base points once per station and feed).
+"""
+
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+from pathlib import Path
+from typing import Callable, Container, Iterator, List, Set
+
+from models.tasks import Task, TaskTable
+
+ErrorFn = Callable[[int, str], None]        # (line number, message)
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def _rows(path: Path, fmt: str) -> Iterator[tuple]:
+    """Yield (line number, raw row dict) without reading ahead."""
+    with path.open(newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_no, f"invalid JSON ({exc.msg})"
+                    continue
+                yield line_no, row if isinstance(row, dict) else "expected a JSON object"
+
+
+def _parse(row, stations: Container[str] | None, visited: Set[str]) -> Task:
+    """Validated Task from one raw row; raises ValueError with the reason."""
+    if isinstance(row, str):
+        raise ValueError(row)
+    station = str(row.get("station") or "").strip()
+    task_name = str(row.get("task_name") or "").strip()
+    objects = row.get("objects") or ""
+    if isinstance(objects, str):
+        objects = [obj.strip() for obj in objects.split(",")]
+    elif isinstance(objects, list):
+        objects = [str(obj).strip() for obj in objects]
+    else:
+        raise ValueError("objects must be a string or a list")
+    objects = [obj for obj in objects if obj]
+    if not station:
+        raise ValueError("missing station")
+    if not task_name:
+        raise ValueError("missing task_name")
+    if not objects:
+        raise ValueError("missing objects")
+    if stations is not None and station not in stations:
+        raise ValueError(f"unknown station '{station}'")
+    points = row.get("points")
+    if points in (None, ""):
+        return Task(station, objects, task_name, visited=visited)
+    try:
+        points = int(points)
+    except (TypeError, ValueError):
+        raise ValueError(f"points must be an integer, got {points!r}") from None
+    if points < 0:
+        raise ValueError("Points must be a non-negative integer.")
+    return Task(station, objects, task_name, points)
+
+
+def iter_tasks(path, *, fmt: str | None = None, stations: Container[str] | None = None,
+               on_error: ErrorFn | None = None) -> Iterator[Task]:
+    """Yield tasks from a CSV / JSONL file one row at a time.
+
+    `fmt` ("csv" or "jsonl") defaults to the file extension.  If `stations`
+    is given, rows naming other stations are invalid.  An invalid row raises
+    ``ValueError("<file>:<line>: <reason>")`` unless `on_error` is given, in
+    which case it receives ``(line, reason)`` and the row is skipped.
+    """
+    path = Path(path)
+    fmt = fmt or FORMATS.get(path.suffix.lower())
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown task feed format for '{path.name}' (use .csv or .jsonl)")
+    visited: Set[str] = set()
+    for line_no, row in _rows(path, fmt):
+        try:
+            task = _parse(row, stations, visited)
+        except ValueError as exc:
+            if on_error is None:
+                raise ValueError(f"{path}:{line_no}: {exc}") from None
+            on_error(line_no, str(exc))
+            continue
+        yield task
+
+
+def iter_chunks(path, size: int, *, table: bool = False, **kwargs) -> Iterator[List[Task] | TaskTable]:
+    """`iter_tasks` in lists of up to `size` tasks (`TaskTable`s if `table`)."""
+    if size <= 0:
+        raise ValueError("Chunk size must be positive")
+    tasks = iter_tasks(path, **kwargs)
+    while True:
+        chunk = list(itertools.islice(tasks, size))
+        if not chunk:
+            return
+        yield TaskTable.from_tasks(chunk) if table else chunk
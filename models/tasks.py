@@ -1,41 +1,32 @@
 import csv
-from typing import List
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
 
+from models.clock import action_kind
 
-class Task:
-    """Represents a single pick/place or processing task."""
-
-    def __init__(self, station, objects, task_name: str, points: int = None):
-        self._station = station
-        self._objects = objects
-        self._task_name = task_name
-        self._points = points if points is not None else self._calculate_points()
-
-    # ──────────────── Properties ────────────────
 
-    @property
-    def station(self):
-        return self._station
+class Task:
+    """Represents a single pick/place or processing task.
 
-    @station.setter
-    def station(self, value):
-        self._station = value
+    Slotted: no per-instance ``__dict__``, so large task lists stay small.
+    For very large order waves use the columnar `TaskTable` instead.
 
-    @property
-    def objects(self):
-        return self._objects
+    Without explicit `points` they are calculated; `visited` is the set of
+    stations already credited by the same loader (see `_points_for`), so
+    pass one set to every task of a feed.
+    """
 
-    @objects.setter
-    def objects(self, value):
-        self._objects = value
+    __slots__ = ("station", "objects", "task_name", "_points")
 
-    @property
-    def task_name(self):
-        return self._task_name
+    def __init__(self, station, objects, task_name: str, points: int = None, *,
+                 visited: Set[str] | None = None):
+        self.station = station
+        self.objects = objects
+        self.task_name = task_name
+        self._points = points if points is not None else self._calculate_points(visited)
 
-    @task_name.setter
-    def task_name(self, value):
-        self._task_name = value
+    # ──────────────── Properties ────────────────
 
     @property
     def points(self):
@@ -53,36 +44,40 @@ class Task:
 
     # ──────────────── Private Instance Methods ────────────────
 
-    _visited_stations = set()  # Class-level variable to track visited stations
-    def _calculate_points(self):
+    def _calculate_points(self, visited: Set[str] | None = None):
+        return Task._points_for(self.station, self.objects, visited if visited is not None else set())
+
+    @staticmethod
+    def _points_for(station, objects, visited: Set[str]) -> int:
         """
         Calculate points based on the station, objects, and task name.
-        If the station has already been visited, no base points are given.
+        If the station is already in `visited`, no base points are given;
+        otherwise it is added there.
         """
         base_points = 0
 
         # Award base points only if station is new
-        station_id = self._station.upper() if isinstance(self._station, str) else str(self._station)
-        if station_id not in Task._visited_stations:
+        station_id = station.upper() if isinstance(station, str) else str(station)
+        if station_id not in visited:
             base_points += 100
-            Task._visited_stations.add(station_id)
+            visited.add(station_id)
 
         # Add points based on number of objects
-        base_points += len(self._objects) * 100
+        base_points += len(objects) * 100
 
         # Task-specific bonus
-        # if isinstance(self._task_name, str):
-        #     task_lower = self._task_name.lower()
+        # if isinstance(task_name, str):
+        #     task_lower = task_name.lower()
         #     if "pick" in task_lower:
         #         base_points += 100
         #     elif "place" in task_lower:
         #         base_points += 0
 
         # Station-specific modifier
-        # if isinstance(self._station, str):
-        #     if "A" in self._station.upper():
+        # if isinstance(station, str):
+        #     if "A" in station.upper():
         #         base_points += 1
-        #     elif "B" in self._station.upper():
+        #     elif "B" in station.upper():
         #         base_points += 0
         #     else:
         #         base_points -= 1
@@ -90,19 +85,9 @@ class Task:
         return base_points
 
 
-    def recalculate_points(self):
+    def recalculate_points(self, visited: Set[str] | None = None):
         """Recalculate points if task data is changed."""
-        self._points = self._calculate_points()
-
-    # ──────────────── Private Class Methods ────────────────
-
-    @classmethod
-    def _read_csv(cls, filepath):
-        """
-        Read CSV file and return a list of dictionaries (raw data).
-        """
-        with open(filepath, mode='r', newline='', encoding='utf-8') as file:
-            return list(csv.DictReader(file))
+        self._points = self._calculate_points(visited)
 
     # ──────────────── Public Class Methods ────────────────
 
@@ -110,20 +95,23 @@ class Task:
     def from_csv(cls, filepath):
         """
         Create a list of Task instances from a CSV file.
-        Points will be calculated automatically.
+        Points will be calculated automatically (a station earns its base
+        points once per file).
+        Rows are parsed as they are read; for feeds too large for one list
+        see `models.task_stream`.
 
         CSV format: station,objects,task_name
         Example:
         StationA,"Bolt,Nut",Pick
         """
         task_list = []
-        rows = cls._read_csv(filepath)
-
-        for row in rows:
-            station = row['station']
-            objects = [obj.strip() for obj in row['objects'].split(',')]
-            task_name = row['task_name']
-            task_list.append(cls(station, objects, task_name))  # No points provided
+        visited: Set[str] = set()
+        with open(filepath, mode='r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                station = row['station']
+                objects = [obj.strip() for obj in row['objects'].split(',')]
+                task_name = row['task_name']
+                task_list.append(cls(station, objects, task_name, visited=visited))  # No points provided
 
         return task_list
 
@@ -138,3 +126,151 @@ class Task:
         """
         tasks = cls.from_csv(filepath)
         return sorted(tasks, key=lambda t: t.points, reverse=descending)
+
+
+# ──────────────── Columnar storage ────────────────
+
+KINDS = ("pick", "place", "other")         # `TaskTable.kind` codes
+_KIND_CODE = {k: i for i, k in enumerate(KINDS)}
+
+
+class TaskTable:
+    """Column-oriented task list for large order waves.
+
+    One row per task; every string is interned once in a vocabulary and the
+    rows hold integer codes in flat arrays:
+
+    * ``station[i]`` – index into `stations`
+    * ``kind[i]``    – index into `KINDS` (pick / place / other)
+    * ``name[i]``    – index into `names` (the original task_name text)
+    * ``points[i]``
+    * ``obj_codes[obj_start[i]:obj_start[i + 1]]`` – indices into `objects`
+
+    `task(i)` / `to_tasks()` materialise `Task` objects on demand and
+    `from_tasks` goes the other way, so both sorters accept either form.
+    """
+
+    __slots__ = ("stations", "objects", "names", "_codes",
+                 "station", "kind", "name", "points", "obj_start", "obj_codes")
+
+    def __init__(self):
+        self.stations: List[str] = []
+        self.objects: List[str] = []
+        self.names: List[str] = []
+        self._codes: Tuple[Dict[str, int], Dict[str, int], Dict[str, int]] = ({}, {}, {})
+        self.station = array("i")
+        self.kind = array("b")
+        self.name = array("i")
+        self.points = array("i")
+        self.obj_start = array("i", [0])
+        self.obj_codes = array("i")
+
+    @staticmethod
+    def _intern(vocab: List[str], codes: Dict[str, int], value: str) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(vocab)
+            vocab.append(value)
+        return code
+
+    # ---------------- building ----------------
+    def append(self, station: str, objects: Iterable[str], task_name: str, points: int):
+        s_codes, o_codes, n_codes = self._codes
+        self.station.append(self._intern(self.stations, s_codes, station))
+        self.kind.append(_KIND_CODE[action_kind(task_name)])
+        self.name.append(self._intern(self.names, n_codes, task_name))
+        self.points.append(points)
+        for obj in objects:
+            self.obj_codes.append(self._intern(self.objects, o_codes, obj))
+        self.obj_start.append(len(self.obj_codes))
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task]) -> "TaskTable":
+        table = cls()
+        for t in tasks:
+            table.append(t.station, t.objects, t.task_name, t.points)
+        return table
+
+    @classmethod
+    def from_csv(cls, filepath) -> "TaskTable":
+        """Same input and points as `Task.from_csv`, without building Task objects."""
+        table = cls()
+        visited: Set[str] = set()
+        with open(filepath, mode='r', newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                objects = [obj.strip() for obj in row['objects'].split(',')]
+                table.append(row['station'], objects, row['task_name'],
+                             Task._points_for(row['station'], objects, visited))
+        return table
+
+    # ---------------- access ------------------
+    def __len__(self) -> int:
+        return len(self.station)
+
+    def object_codes(self, i: int) -> array:
+        return self.obj_codes[self.obj_start[i]:self.obj_start[i + 1]]
+
+    def task(self, i: int) -> Task:
+        return Task(self.stations[self.station[i]],
+                    [self.objects[c] for c in self.object_codes(i)],
+                    self.names[self.name[i]], self.points[i])
+
+    def __iter__(self) -> Iterator[Task]:
+        return (self.task(i) for i in range(len(self)))
+
+    def to_tasks(self) -> List[Task]:
+        return list(self)
+
+    def pairs(self) -> Dict[str, Tuple[int, int]]:
+        """Object → (pick row, place row), keyed by each task's first object.
+
+        Later rows win, objects missing either half are dropped (the same
+        rules as the sorters' own pairing), computed on the integer columns.
+        """
+        pick, place = _KIND_CODE["pick"], _KIND_CODE["place"]
+        found: Dict[int, List[int]] = {}
+        start, codes, kind = self.obj_start, self.obj_codes, self.kind
+        for i in range(len(self.station)):
+            if start[i] == start[i + 1] or kind[i] not in (pick, place):
+                continue
+            found.setdefault(codes[start[i]], [-1, -1])[kind[i]] = i
+        return {self.objects[o]: (p, q) for o, (p, q) in found.items() if p >= 0 and q >= 0}
+
+    def task_pairs(self) -> "TablePairs":
+        """`pairs` as a lazy object → (pick `Task`, place `Task`) mapping."""
+        return TablePairs(self)
+
+
+class TablePairs(Mapping):
+    """Object → (pick, place) over a `TaskTable`, paired on its columns.
+
+    `stations` reads the pick / place stations straight from the integer
+    columns, so the sorters batch and order objects without any `Task`
+    objects; a pair's two tasks are built only when it is looked up (once,
+    so identities stay stable).
+    """
+
+    __slots__ = ("table", "rows", "_tasks")
+
+    def __init__(self, table: TaskTable):
+        self.table = table
+        self.rows: Dict[str, Tuple[int, int]] = table.pairs()
+        self._tasks: Dict[str, Tuple[Task, Task]] = {}
+
+    def __getitem__(self, obj: str) -> Tuple[Task, Task]:
+        pair = self._tasks.get(obj)
+        if pair is None:
+            p, q = self.rows[obj]
+            pair = self._tasks[obj] = (self.table.task(p), self.table.task(q))
+        return pair
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def stations(self, half: int) -> Dict[str, str]:
+        """Object → station of its pick (``half=0``) or place (``half=1``)."""
+        names, column = self.table.stations, self.table.station
+        return {obj: names[column[rows[half]]] for obj, rows in self.rows.items()}
@@ -0,0 +1,162 @@
+"""Compact robot trajectory log.
+
+A robot used to log every grid step as a ``(float, float)`` tuple plus a
+``bool`` in two Python lists – well over 100 bytes per cell, which dominates
+memory on long simulated shifts.  `Trajectory` keeps the same information in
+flat typed columns instead:
+
+* ``rows`` / ``cols`` – int16 (``array('h')``) cell coordinates, int32 when
+  the grid is too large for int16;
+* ``times``           – float64 clock time at which each cell was reached;
+* load flags          – one *bit* per cell in a ``bytearray``.
+
+That is about 12 bytes per cell.  Under a `SimClock` whole legs are appended
+at once (`extend`); other clocks log cell by cell so observers never see a
+stale position.  The run metrics are reductions over the columns (`distance`,
+`loaded_steps`, `loaded_ratio`) rather than Python loops over tuples.
+
+`points` and `loaded` are read-only sequence views that still look like the
+old lists (``(float, float)`` tuples and bools, equal to lists holding the
+same values), so ``robot.path`` / ``robot.loaded_log`` keep working.
+"""
+
+from __future__ import annotations
+
+import math
+import operator
+from array import array
+from collections.abc import Sequence
+from typing import Iterable, Iterator, List, Tuple
+
+from models.map import Coordinate
+
+INT16_MAX = 2 ** 15 - 1
+
+
+def rasterize(points: Iterable[Tuple[float, float]]) -> List[Coordinate]:
+    """Round (smoothed) float waypoints to the grid cells they fall in."""
+    return list(zip(*(map(round, axis) for axis in zip(*points))))
+
+
+class Trajectory:
+    """Cells visited by one robot, with arrival times and load flags."""
+
+    __slots__ = ("rows", "cols", "times", "_flags")
+
+    def __init__(self, start: Coordinate, t0: float = 0.0, *, extent: int = INT16_MAX):
+        # int16 covers grids up to 32767 cells per side; beyond that use int32
+        code = "h" if extent <= INT16_MAX else "i"
+        self.rows = array(code, [start[0]])
+        self.cols = array(code, [start[1]])
+        self.times = array("d", [t0])
+        self._flags = bytearray(1)                 # bit i = loaded after cell i; bits ≥ len are 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    # ---------------- appends ----------------
+    def _set_bits(self, start: int, stop: int):
+        """Set load bits ``start .. stop-1`` (bytes already allocated)."""
+        flags = self._flags
+        while start < stop and start & 7:
+            flags[start >> 3] |= 1 << (start & 7)
+            start += 1
+        full = (stop - start) >> 3
+        if full:
+            flags[start >> 3:(start >> 3) + full] = b"\xff" * full
+            start += full << 3
+        while start < stop:
+            flags[start >> 3] |= 1 << (start & 7)
+            start += 1
+
+    def append(self, cell: Coordinate, loaded: bool, t: float):
+        """Log one cell reached at time `t`."""
+        self.extend((cell,), loaded, t, 0.0)
+
+    def extend(self, cells: List[Coordinate], loaded: bool, t0: float, dt: float):
+        """Log a whole leg: ``cells[k]`` is reached at ``t0 + (k + 1) * dt``."""
+        if not cells:
+            return
+        n0 = len(self.times)
+        rows, cols = zip(*cells)
+        self.rows.extend(rows)                     # OverflowError if a cell exceeds the typecode
+        self.cols.extend(cols)
+        self.times.extend([t0 + dt * k for k in range(1, len(cells) + 1)] if dt else [t0] * len(cells))
+        n = len(self.times)
+        self._flags.extend(bytes((n + 7) // 8 - len(self._flags)))
+        if loaded:
+            self._set_bits(n0, n)
+
+    def set_loaded(self, loaded: bool, i: int = -1):
+        """Overwrite the load flag of cell `i` (e.g. after a pick / place)."""
+        i = range(len(self.times))[i]
+        if loaded:
+            self._flags[i >> 3] |= 1 << (i & 7)
+        else:
+            self._flags[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    # ---------------- views ------------------
+    def point(self, i: int) -> Tuple[float, float]:
+        return float(self.rows[i]), float(self.cols[i])
+
+    def is_loaded(self, i: int) -> bool:
+        i = range(len(self.times))[i]
+        return bool(self._flags[i >> 3] >> (i & 7) & 1)
+
+    @property
+    def points(self) -> "_View":
+        """``(row, col)`` float tuples, one per cell (like the old ``path`` list)."""
+        return _View(self, Trajectory.point)
+
+    @property
+    def loaded(self) -> "_View":
+        """Load flag per cell (like the old ``loaded_log`` list)."""
+        return _View(self, Trajectory.is_loaded)
+
+    # ---------------- reductions -------------
+    def distance(self) -> float:
+        """Euclidean length of the logged path, in cells."""
+        r, c = self.rows, self.cols
+        return math.fsum(map(math.hypot, map(operator.sub, r[1:], r[:-1]), map(operator.sub, c[1:], c[:-1])))
+
+    def loaded_steps(self) -> int:
+        """Number of cells logged as loaded (popcount of the flag bits)."""
+        return int.from_bytes(self._flags, "little").bit_count()
+
+    def loaded_ratio(self) -> float:
+        return self.loaded_steps() / len(self.times)
+
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers."""
+        return (len(self.rows) * self.rows.itemsize + len(self.cols) * self.cols.itemsize
+                + len(self.times) * self.times.itemsize + len(self._flags))
+
+
+class _View(Sequence):
+    """Read-only, list-like window on one logical column of a `Trajectory`."""
+
+    __slots__ = ("_traj", "_get")
+
+    def __init__(self, traj: Trajectory, get):
+        self._traj = traj
+        self._get = get
+
+    def __len__(self) -> int:
+        return len(self._traj)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._get(self._traj, k) for k in range(len(self._traj))[i]]
+        return self._get(self._traj, i)
+
+    def __iter__(self) -> Iterator:
+        traj, get = self._traj, self._get
+        return (get(traj, k) for k in range(len(traj)))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
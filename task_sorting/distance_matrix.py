@@ -0,0 +1,148 @@
+"""Distance tables for the task planners.
+
+* `DistanceMatrix` – per-plan table over the stations one `sort_tasks` call
+  touches.  Filled lazily (only the legs actually asked for are stored),
+  shared by every heuristic of that call and dropped with it.
+* `DistanceCache` – optional process-wide memo for an expensive metric
+  (e.g. `StationOracle.distance`) with a fixed capacity and LRU eviction, so
+  a long-running dispatcher keeps a flat memory profile.
+
+Both are plain ``dist(a, b)`` callables and slot into any ``dist=`` argument.
+A `fill`ed matrix is packed into one flat ``array('d')`` that can be copied
+into a foreign buffer (e.g. a `multiprocessing.shared_memory` block) and
+re-opened there, so worker processes read one copy.
+"""
+
+from __future__ import annotations
+
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from models.map import Coordinate
+
+DistFn = Callable[[Coordinate, Coordinate], float]
+
+_UNKNOWN = -1.0
+
+
+class DistanceMatrix:
+    """n × n distances between a fixed set of points, computed on first use.
+
+    Lengths are keyed ``i * n + j`` by point id: in a dict holding only the
+    pairs computed so far, or – after `fill` / over a shared buffer – in one
+    flat ``array('d')`` (`data`).  Calling the matrix with two coordinates
+    looks both ids up, so it is a drop-in `dist`.  Pairs involving other
+    coordinates fall through to the base metric uncached.
+    """
+
+    def __init__(self, points: Iterable[Coordinate], dist: DistFn | None, data=None):
+        self.dist = dist
+        self.points: List[Coordinate] = list(dict.fromkeys(points))
+        self.index: Dict[Coordinate, int] = {p: i for i, p in enumerate(self.points)}
+        self.n = len(self.points)
+        if data is not None and len(data) != self.n * self.n:
+            raise ValueError("Matrix buffer does not match the number of points")
+        self.data = data                    # flat n² buffer, only once filled / shared
+        self._known: Dict[int, float] = {}
+
+    @classmethod
+    def over_buffer(cls, points: Iterable[Coordinate], buf, dist: DistFn | None = None) -> "DistanceMatrix":
+        """Matrix reading (and writing) the doubles in `buf` instead of its own array.
+
+        Without `dist`, every entry must already be filled and unknown points
+        raise `KeyError`.
+        """
+        return cls(points, dist, memoryview(buf).cast("d"))
+
+    @classmethod
+    def for_stations(cls, station_loc: Dict[str, Coordinate], stations: Iterable[str], dist: DistFn,
+                     extra: Iterable[Coordinate] = ()) -> "DistanceMatrix":
+        """Matrix over the given station names plus `extra` points (start, end…)."""
+        return cls([*(station_loc[s] for s in stations), *extra], dist)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def fill(self) -> "DistanceMatrix":
+        """Compute every entry now into the flat `data` array (before sharing it)."""
+        if self.data is None:
+            self.data = array("d", [_UNKNOWN]) * (self.n * self.n)
+            for k, d in self._known.items():
+                self.data[k] = d
+            self._known.clear()
+        for i in range(self.n):
+            for j in range(self.n):
+                self.between(i, j)
+        return self
+
+    def between(self, i: int, j: int) -> float:
+        """Distance from point id `i` to point id `j`."""
+        k = i * self.n + j
+        if self.data is None:
+            d = self._known.get(k)
+            if d is None:
+                d = self._known[k] = self.dist(self.points[i], self.points[j])
+            return d
+        d = self.data[k]
+        if d < 0:
+            d = self.data[k] = self.dist(self.points[i], self.points[j])
+        return d
+
+    def __call__(self, a: Coordinate, b: Coordinate) -> float:
+        i = self.index.get(a)
+        j = self.index.get(b)
+        if i is None or j is None:
+            if self.dist is None:
+                raise KeyError(f"No distance for {a} -> {b} in this matrix")
+            return self.dist(a, b)
+        return self.between(i, j)
+
+
+class DistanceCache:
+    """Bounded LRU memo of ``dist(a, b)`` shared across planning calls."""
+
+    def __init__(self, dist: DistFn, capacity: int = 100_000):
+        if capacity <= 0:
+            raise ValueError("Cache capacity must be positive")
+        self.dist = dist
+        self.capacity = capacity
+        self._entries: "OrderedDict[Tuple[Coordinate, Coordinate], float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, a: Coordinate, b: Coordinate) -> float:
+        key = (a, b)
+        d = self._entries.get(key)
+        if d is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return d
+        self.misses += 1
+        d = self._entries[key] = self.dist(a, b)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return d
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------------- stats -----------------
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
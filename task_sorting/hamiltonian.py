@@ -4,37 +4,59 @@ A faster, memory‑lean pipeline for RoboCup@Work pick‑and‑place.
 
 Highlights
 ----------
-* **Hybrid TSP** – exact bit‑mask DP for ≤ 12 stations; NN + 2‑opt afterwards.
-* **Distance caching** – `math.hypot` + `@lru_cache` slashes duplicate work.
-* **Greedy batching** – `heapq.nsmallest` chooses the cheapest ≤ *cap* objects.
+* **Hybrid TSP** – exact iterative bit‑mask DP for ≤ 13 stations; NN + 2‑opt afterwards.
+* **Distance matrix** – one lazily filled `DistanceMatrix` per call, shared by
+  every heuristic and freed afterwards (no process-wide growth).
+* **Pluggable metric** – pass `dist=oracle.distance` (see `models.distances`)
+  to score orderings with true obstacle-aware path lengths.
+* **Greedy batching** – per-station heaps (`_BatchQueue`) hand out the cheapest ≤ *cap* objects.
 * **3‑object load limit** baked in (override with `cap`).
+* **PDP local search** – opt-in relocate / exchange / or‑opt over the whole
+  plan (`task_sorting.pdp_search`), bounded by `local_search_ms`; off by
+  default, so the greedy plan is returned as before.
+* **Anytime mode** – `time_budget_ms=` keeps improving (LNS + annealing)
+  until the deadline and reports each new best via `on_progress`.
 * Drop‑in compatible: public signature is still `sort_tasks(tasks, station_loc, start, end=None, cap=3)`.
 
 """
 
 from __future__ import annotations
 
-import functools
 import heapq
 import itertools
 import math
-from typing import Dict, List, Sequence, Tuple
+import operator
+import random
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
 
 # Project models – adjust import paths if required
-from models.tasks import Task
+from models import instrument
+from models.tasks import TablePairs, Task, TaskTable
 from models.map import Coordinate  # Coordinate = tuple[float, float]
+from task_sorting.distance_matrix import DistanceMatrix
+from task_sorting.spatial_index import GridIndex, at_least_euclidean, is_at_least_euclidean
+from task_sorting.pdp_search import ProgressFn, anytime_plan, improve_plan
 
 __all__ = [
     "sort_tasks",
 ]
 
+DistFn = Callable[[Coordinate, Coordinate], float]
+
+# largest station count solved exactly (13 runs in about the time 12 took
+# with the old recursive lru_cache DP)
+_EXACT_MAX = 13
+
+_EPS = 1e-6       # minimum gain for an improving move
+
 # ---------------------------------------------------------------------------
 #  Distance helpers
 # ---------------------------------------------------------------------------
 
-@functools.lru_cache(maxsize=None)
+@at_least_euclidean
 def _euclidean(a: Coordinate, b: Coordinate) -> float:  # noqa: D401
-    """Fast Euclidean distance via `math.hypot`, memoised."""
+    """Fast Euclidean distance via `math.hypot`."""
     return math.hypot(a[0] - b[0], a[1] - b[1])
 
 
@@ -42,57 +64,137 @@ def _euclidean(a: Coordinate, b: Coordinate) -> float:  # noqa: D401
 #  Quick heuristics (when exact DP is too slow)
 # ---------------------------------------------------------------------------
 
-def _nearest_neighbour(stations: Sequence[str], coords: Dict[str, Coordinate], start: Coordinate) -> List[str]:
-    unvisited = set(stations)
-    current = min(unvisited, key=lambda s: _euclidean(start, coords[s]))
-    route = [current]
-    unvisited.remove(current)
+def _nearest_neighbour(stations: Sequence[str], coords: Dict[str, Coordinate], start: Coordinate,
+                       dist: DistFn = _euclidean) -> List[str]:
+    """Greedy tour; each step asks a `GridIndex` of unvisited stations.
+
+    Same tour as scanning every unvisited station (ties go to the earlier
+    one in *stations*) for any *dist*; metrics the index cannot bound are
+    scanned linearly by `GridIndex.nearest`.
+    """
+    unvisited = GridIndex((s, coords[s]) for s in dict.fromkeys(stations))
+    route: List[str] = []
+    here = start
     while unvisited:
-        nxt = min(unvisited, key=lambda s: _euclidean(coords[current], coords[s]))
+        nxt = unvisited.nearest(here, dist=dist)[0]
         route.append(nxt)
         unvisited.remove(nxt)
-        current = nxt
+        here = coords[nxt]
     return route
 
 
-def _tour_length(tour: List[str], coords: Dict[str, Coordinate], start: Coordinate) -> float:
+def _tour_length(tour: List[str], coords: Dict[str, Coordinate], start: Coordinate,
+                 dist: DistFn = _euclidean) -> float:
     if not tour:
         return 0.0
-    dist = _euclidean(start, coords[tour[0]])
+    length = dist(start, coords[tour[0]])
     for a, b in zip(tour, tour[1:]):
-        dist += _euclidean(coords[a], coords[b])
-    return dist
-
-
-def _two_opt(tour: List[str], coords: Dict[str, Coordinate], start: Coordinate, rounds: int = 2) -> List[str]:
-    best = tour
-    best_len = _tour_length(best, coords, start)
-    n = len(tour)
-    for _ in range(rounds):
-        improved = False
-        for i in range(1, n - 2):
-            for j in range(i + 1, n):
-                if j - i == 1:
-                    continue  # adjacent – skip
-                new = best[:i] + best[i:j][::-1] + best[j:]
-                new_len = _tour_length(new, coords, start)
-                if new_len < best_len - 1e-6:
-                    best, best_len = new, new_len
-                    improved = True
-        if not improved:
-            break
-    return best
+        length += dist(coords[a], coords[b])
+    return length
+
+
+def _two_opt(tour: List[str], coords: Dict[str, Coordinate], start: Coordinate,
+             dist: DistFn = _euclidean, neighbours: int = 8) -> List[str]:
+    """2‑opt + Or‑opt on the open path *start* → *tour*, run to a local optimum.
+
+    Every move is scored in O(1) from the edges it changes (symmetric *dist*
+    assumed).  A node only tries its *neighbours* nearest stations as new
+    partners, and a node whose moves all failed is skipped (don't‑look bit)
+    until one of its edges changes.
+    """
+    m = len(tour) + 1
+    if m < 4:
+        return list(tour)
+    pts = [start] + [coords[s] for s in tour]
+    D = [[dist(a, b) for b in pts] for a in pts]
+    near = [heapq.nsmallest(neighbours, (j for j in range(1, m) if j != i), key=D[i].__getitem__)
+            for i in range(m)]
+    path = list(range(m))       # node 0 is the start and never moves
+    pos = list(range(m))
+
+    def edge(x: int) -> float:
+        """Cost of the edge leaving position x (0 past the open end)."""
+        return D[path[x]][path[x + 1]] if x + 1 < m else 0.0
+
+    def reverse(x: int, y: int):
+        path[x:y + 1] = path[x:y + 1][::-1]
+        for k in range(x, y + 1):
+            pos[path[k]] = k
+
+    def two_opt(a: int) -> Tuple[int, int] | None:
+        for c in near[a]:
+            x, y = sorted((pos[a], pos[c]))
+            px, py = path[x], path[y]
+            # reverse path[x+1..y]: new edges (px, py) and (path[x+1], path[y+1])
+            if y > x + 1:
+                tail = D[path[x + 1]][path[y + 1]] if y + 1 < m else 0.0
+                if edge(x) + edge(y) - D[px][py] - tail > _EPS:
+                    reverse(x + 1, y)
+                    return x, y + 1
+            # reverse path[x..y-1]: new edges (path[x-1], path[y-1]) and (px, py)
+            if x >= 1 and y - 1 > x:
+                if edge(x - 1) + edge(y - 1) - D[path[x - 1]][path[y - 1]] - D[px][py] > _EPS:
+                    reverse(x, y - 1)
+                    return x - 1, y
+        return None
+
+    def or_opt(a: int) -> Tuple[int, int] | None:
+        i = pos[a]
+        if i == 0:
+            return None
+        for length in (1, 2, 3):
+            j = i + length - 1                      # segment path[i..j]
+            if j >= m:
+                break
+            first, last = path[i], path[j]
+            gain = edge(i - 1) + edge(j) - (D[path[i - 1]][path[j + 1]] if j + 1 < m else 0.0)
+            for c in near[a]:
+                for q in (pos[c] - 1, pos[c]):       # insert between path[q] and path[q+1]
+                    if q < 0 or i - 1 <= q <= j:
+                        continue
+                    u = path[q]
+                    v = path[q + 1] if q + 1 < m else None
+                    base = edge(q)
+                    fwd = D[u][first] + (D[last][v] if v is not None else 0.0) - base
+                    rev = D[u][last] + (D[first][v] if v is not None else 0.0) - base
+                    if min(fwd, rev) - gain < -_EPS:
+                        seg = path[i:j + 1] if fwd <= rev else path[i:j + 1][::-1]
+                        del path[i:j + 1]
+                        at = q + 1 if q < i else q + 1 - length
+                        path[at:at] = seg
+                        lo, hi = min(i, at), max(j, at + length - 1)
+                        for k in range(lo, hi + 1):
+                            pos[path[k]] = k
+                        return lo - 1, min(hi + 1, m - 1)
+        return None
+
+    active = deque(range(m))
+    queued = [True] * m
+    while active:
+        a = active.popleft()
+        queued[a] = False
+        span = two_opt(a) or or_opt(a)
+        if span is None:
+            continue                                # don't look at `a` again for now
+        lo, hi = span
+        for k in (lo, lo + 1, hi - 1, hi, pos[a]):
+            if 0 <= k < m and not queued[path[k]]:
+                queued[path[k]] = True
+                active.append(path[k])
+    return [tour[k - 1] for k in path[1:]]
 
 
 # ---------------------------------------------------------------------------
 #  Exact / hybrid TSP solver (Hamiltonian path from *start*)
 # ---------------------------------------------------------------------------
 
-def _tsp_order(stations: Sequence[str], coords: Dict[str, Coordinate], start: Coordinate) -> List[str]:
+@instrument.timed("hamiltonian._tsp_order")
+def _tsp_order(stations: Sequence[str], coords: Dict[str, Coordinate], start: Coordinate,
+               dist: DistFn = _euclidean) -> List[str]:
     """Return stations in near‑optimal visiting order.
 
-    * n ≤ 12 → exact O(2ⁿ n²) DP (still fast for cap ≤ 3).
-    * n > 12 → NN heuristic + light 2‑opt.
+    * n ≤ _EXACT_MAX → exact O(2ⁿ n²) DP (`_held_karp`).
+    * larger n → NN heuristic + light 2‑opt.
     """
     n = len(stations)
     if n <= 1:
@@ -100,79 +202,170 @@ def _tsp_order(stations: Sequence[str], coords: Dict[str, Coordinate], start: Co
     if n <= 3:  # brute force tiny cases
         best, best_cost = list(stations), math.inf
         for perm in itertools.permutations(stations):
-            cost = _euclidean(start, coords[perm[0]]) + sum(
-                _euclidean(coords[perm[i]], coords[perm[i + 1]]) for i in range(n - 1)
+            cost = dist(start, coords[perm[0]]) + sum(
+                dist(coords[perm[i]], coords[perm[i + 1]]) for i in range(n - 1)
             )
             if cost < best_cost:
                 best_cost, best = cost, list(perm)
         return best
 
-    if n > 12:
-        return _two_opt(_nearest_neighbour(stations, coords, start), coords, start)
-
-    # --- exact DP for n ≤ 12 ------------------------------------------------
-    # Cache pairwise distances to avoid repeated look‑ups
-    dist = [[_euclidean(coords[a], coords[b]) for b in stations] for a in stations]
-    start_d = [_euclidean(start, coords[s]) for s in stations]
-
-    @functools.lru_cache(maxsize=None)
-    def dp(mask: int, last: int) -> float:
-        if mask == 0:
-            return start_d[last]
-        best = math.inf
-        m = mask
-        while m:
-            j = (m & -m).bit_length() - 1  # next set‑bit index
-            m ^= 1 << j
-            cand = dp(mask ^ (1 << j), j) + dist[j][last]
-            if cand < best:
-                best = cand
-        return best
+    if n > _EXACT_MAX:
+        return _two_opt(_nearest_neighbour(stations, coords, start, dist), coords, start, dist=dist)
 
-    full = (1 << n) - 1
-    last = min(range(n), key=lambda j: dp(full ^ (1 << j), j) + start_d[j])
-    order_idx = [last]
-    mask = full ^ (1 << last)
+    # --- exact DP ------------------------------------------------------
+    d = [[dist(coords[a], coords[b]) for b in stations] for a in stations]
+    start_d = [dist(start, coords[s]) for s in stations]
+    return [stations[i] for i in _held_karp(d, start_d)]
 
-    while mask:
-        nxt = min(
-            (j for j in range(n) if mask & (1 << j)),
-            key=lambda j: dp(mask ^ (1 << j), j) + dist[j][last],
-        )
-        order_idx.append(nxt)
-        mask ^= 1 << nxt
-        last = nxt
 
-    return [stations[i] for i in reversed(order_idx)]
+@instrument.timed("hamiltonian._held_karp")
+def _held_karp(d: List[List[float]], start_d: List[float]) -> List[int]:
+    """Exact shortest open path from the start through all n nodes (indices).
+
+    Iterative bit-mask DP: ``rows[mask][k]`` is the cheapest path from the
+    start covering *mask* and ending at *k*.  Each entry is one C-level
+    ``min(map(add, ...))`` over the predecessor row, and the tour is
+    recovered by re-deriving the argmin along the optimal path only, so no
+    parent table or recursion is needed.  All tables die with the call.
+    """
+    n = len(start_d)
+    full = 1 << n
+    blank = [math.inf] * n
+    rows: List[List[float]] = [blank] * full
+    for j in range(n):
+        rows[1 << j] = list(blank)
+        rows[1 << j][j] = start_d[j]
+    into = [[d[j][k] for j in range(n)] for k in range(n)]   # into[k][j] = d[j][k]
+    bits = [(1 << k, k) for k in range(n)]
+    add = operator.add
+    for mask in range(3, full):
+        if not mask & (mask - 1):
+            continue                        # single nodes seeded above
+        row = list(blank)
+        for low, k in bits:
+            if mask & low:
+                row[k] = min(map(add, rows[mask ^ low], into[k]))
+        rows[mask] = row
+    instrument.count("held_karp.states", n * (full >> 1))     # (mask, last) pairs filled
+
+    mask = full - 1
+    last = min(range(n), key=rows[mask].__getitem__)
+    order = [last]
+    while mask & (mask - 1):
+        mask ^= 1 << last
+        prev = rows[mask]
+        last = min((j for j in range(n) if mask >> j & 1), key=lambda j: prev[j] + d[j][last])
+        order.append(last)
+    order.reverse()
+    return order
 
 
 # ---------------------------------------------------------------------------
 #  Greedy batching under load constraint
 # ---------------------------------------------------------------------------
 
-def _select_batch(objs: List[str], pick: Dict[str, str], place: Dict[str, str], loc: Dict[str, Coordinate], cur: Coordinate, cap: int) -> List[str]:
-    if len(objs) <= cap:
-        return list(objs)
-    # (estimated_cost, obj) pairs – cheapest *cap* chosen
-    costs = (
-        (_euclidean(cur, loc[pick[o]]) + _euclidean(loc[pick[o]], loc[place[o]]), o)
-        for o in objs
-    )
-    return [o for _, o in heapq.nsmallest(cap, costs)]
+class _BatchQueue:
+    """Remaining objects, bucketed by pick station, handed out in cheap batches.
+
+    An object's estimated cost from *cur* is ``dist(cur, pick) + dist(pick,
+    place)``.  The second term is fixed, so each pick station keeps a heap of
+    ``(leg, obj)`` and its top is always the station's cheapest object
+    wherever *cur* is.  `take` therefore scores stations, not objects, and
+    only promising ones.  Two sorted accesses run in turn – rings of a
+    `GridIndex` outwards from *cur* (lower bound on the approach) and a heap
+    of station tops by leg (lower bound on the leg) – and a candidate is
+    taken once it beats the sum of both bounds, which no unscored station
+    can.  An object leaves the queue in O(log) – no rescans of the
+    remaining list.  The ring bound only holds for metrics never shorter
+    than the straight line (`is_at_least_euclidean`); for any other *dist*
+    every station is scored, which gives the same batches.
+    """
+
+    def __init__(self, objs: Iterable[str], pick: Dict[str, str], place: Dict[str, str],
+                 loc: Dict[str, Coordinate], dist: DistFn = _euclidean):
+        self.loc = loc
+        self.dist = dist
+        self.heaps: Dict[str, List[Tuple[float, str]]] = {}
+        self.size = 0
+        for o in objs:
+            self.heaps.setdefault(pick[o], []).append((dist(loc[pick[o]], loc[place[o]]), o))
+            self.size += 1
+        for h in self.heaps.values():
+            heapq.heapify(h)
+        self.index = GridIndex((s, loc[s]) for s in sorted(self.heaps))
+        self.rings_exact = is_at_least_euclidean(dist)
+        # (top leg, top obj, station); stale once that station's top changes
+        self.by_leg = [(*h[0], s) for s, h in self.heaps.items()]
+        heapq.heapify(self.by_leg)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def take(self, cur: Coordinate, cap: int) -> List[str]:
+        """Remove and return the (up to) *cap* cheapest objects as seen from *cur*."""
+        dist, loc, heaps, by_leg = self.dist, self.loc, self.heaps, self.by_leg
+        # (estimated_cost, obj, station) – same ranking as a scan over every object
+        tops: List[Tuple[float, str, str]] = []
+        scored = set()
+        popped: List[Tuple[float, str, str]] = []
+
+        def score(s: str):
+            if s in heaps and s not in scored:
+                scored.add(s)
+                h = heaps[s]
+                heapq.heappush(tops, (dist(cur, loc[s]) + h[0][0], h[0][1], s))
+
+        rings = self.index.rings(cur)
+        near = 0.0                      # no unscored station is closer than this …
+        leg = by_leg[0][0] if by_leg else math.inf     # … or has a shorter top leg
+        if not self.rings_exact:        # no valid bound: score every station up front
+            for s in heaps:
+                score(s)
+            near = leg = math.inf
+        turn = 0
+        batch: List[str] = []
+        while len(batch) < cap:
+            if tops and (tops[0][0] < near + leg or near == leg == math.inf):
+                _, o, s = heapq.heappop(tops)
+                h = heaps[s]
+                heapq.heappop(h)
+                batch.append(o)
+                if h:
+                    heapq.heappush(tops, (dist(cur, loc[s]) + h[0][0], h[0][1], s))
+                    heapq.heappush(by_leg, (*h[0], s))
+                else:
+                    del heaps[s]
+                    self.index.remove(s)
+                continue
+            if near == leg == math.inf:
+                break
+            turn ^= 1
+            if (turn and near < math.inf) or leg == math.inf:
+                keys, near = next(rings, ((), math.inf))
+                for s in keys:
+                    score(s)
+            else:
+                entry = heapq.heappop(by_leg)
+                popped.append(entry)
+                score(entry[2])
+                leg = by_leg[0][0] if by_leg else math.inf
+        # entries still naming a station's current top go back for the next batch
+        for entry in popped:
+            h = heaps.get(entry[2])
+            if h and h[0] == entry[:2]:
+                heapq.heappush(by_leg, entry)
+        self.size -= len(batch)
+        return batch
 
 
 # ---------------------------------------------------------------------------
-#  Public planner
+#  Pairing + single-robot planning
 # ---------------------------------------------------------------------------
 
-def sort_tasks(
-    tasks: List[Task],
-    station_loc: Dict[str, Coordinate],
-    start: Coordinate,
-    end: Coordinate | None = None,
-    cap: int = 3,
-) -> List[Task]:
-    """Return tasks ordered for efficient execution while holding ≤ *cap* items."""
+def _pair_tasks(tasks: List[Task] | TaskTable) -> Dict[str, Tuple[Task, Task]]:
+    """Map object → (pickTask, placeTask), dropping objects missing either half."""
+    if isinstance(tasks, TaskTable):
+        return tasks.task_pairs()           # paired on integer columns, Tasks built lazily
     # Build object → (pickTask, placeTask)
     pairs: Dict[str, Tuple[Task | None, Task | None]] = {}
     for t in tasks:
@@ -186,40 +379,112 @@ def sort_tasks(
         elif "place" in t.task_name.lower():
             pairs[obj_key][1] = t  # type: ignore[index]
 
-    complete_pairs: Dict[str, Tuple[Task, Task]] = {
+    return {
         k: (p, q)  # type: ignore[assignment]
         for k, (p, q) in pairs.items()
         if p is not None and q is not None
     }
+
+
+def _pair_stations(pairs: Dict[str, Tuple[Task, Task]]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Object → pick station and object → place station (from the columns for a table)."""
+    if isinstance(pairs, TablePairs):
+        return pairs.stations(0), pairs.stations(1)
+    return ({k: pick.station for k, (pick, _) in pairs.items()},
+            {k: place.station for k, (_, place) in pairs.items()})
+
+
+def _plan_pairs(complete_pairs: Dict[str, Tuple[Task, Task]], station_loc: Dict[str, Coordinate],
+                start: Coordinate, cap: int, dist: DistFn = _euclidean,
+                station_of: Tuple[Dict[str, str], Dict[str, str]] | None = None) -> List[Task]:
+    """Batch + order *complete_pairs* for one robot starting empty at *start*.
+
+    *station_of* is `_pair_stations(complete_pairs)` if the caller has it.
+    """
     if not complete_pairs:
         return []
 
-    pick_map = {k: pick.station for k, (pick, _) in complete_pairs.items()}
-    place_map = {k: place.station for k, (_, place) in complete_pairs.items()}
+    pick_map, place_map = station_of or _pair_stations(complete_pairs)
 
-    remaining = list(complete_pairs.keys())
+    queue = _BatchQueue(complete_pairs, pick_map, place_map, station_loc, dist)
     current = start
     plan: List[Task] = []
 
-    while remaining:
-        batch = _select_batch(remaining, pick_map, place_map, station_loc, current, cap)
+    while queue:
+        batch = queue.take(current, cap)
+
+        # -- Pick sequence, then place sequence ------------------------------
+        # one stop per distinct station, serving every batch object there
+        for stops, half in ((pick_map, 0), (place_map, 1)):
+            at: Dict[str, List[str]] = {}
+            for o in batch:
+                at.setdefault(stops[o], []).append(o)
+            for s in _tsp_order(list(at), station_loc, current, dist):
+                plan.extend(complete_pairs[o][half] for o in at[s])
+                current = station_loc[s]
+
+    return plan
+
 
-        # -- Pick sequence ---------------------------------------------------
-        pick_stations = [pick_map[o] for o in batch]
-        for s in _tsp_order(pick_stations, station_loc, current):
-            obj = next(o for o in batch if pick_map[o] == s)
-            plan.append(complete_pairs[obj][0])
-            current = station_loc[s]
+def _plan_cost(plan: List[Task], station_loc: Dict[str, Coordinate], start: Coordinate,
+               dist: DistFn = _euclidean) -> float:
+    """Travel length of executing *plan* from *start*."""
+    cost, cur = 0.0, start
+    for t in plan:
+        nxt = station_loc[t.station]
+        cost += dist(cur, nxt)
+        cur = nxt
+    return cost
 
-        # -- Place sequence --------------------------------------------------
-        place_stations = [place_map[o] for o in batch]
-        for s in _tsp_order(place_stations, station_loc, current):
-            obj = next(o for o in batch if place_map[o] == s)
-            plan.append(complete_pairs[obj][1])
-            current = station_loc[s]
 
-        for o in batch:
-            remaining.remove(o)
+# ---------------------------------------------------------------------------
+#  Public planner
+# ---------------------------------------------------------------------------
 
+def sort_tasks(
+    tasks: List[Task] | TaskTable,
+    station_loc: Dict[str, Coordinate],
+    start: Coordinate,
+    end: Coordinate | None = None,
+    cap: int = 3,
+    dist: DistFn | None = None,
+    local_search_ms: float | None = None,
+    time_budget_ms: float | None = None,
+    on_progress: ProgressFn | None = None,
+    rng: random.Random | None = None,
+    iterations: int | None = None,
+) -> List[Task]:
+    """Return tasks ordered for efficient execution while holding ≤ *cap* items.
+
+    *dist* scores station-to-station legs; defaults to straight-line distance.
+    Any metric gives the same plan, but nearest-neighbour and batch
+    selection only use the spatial index for metrics never shorter than the
+    straight line (Euclidean, `StationOracle.distance`, or functions marked
+    with `spatial_index.at_least_euclidean`); others are scanned linearly.
+    Each leg is evaluated at most once per call (`DistanceMatrix`); wrap
+    *dist* in a `DistanceCache` to also reuse lengths across calls.
+
+    Given *local_search_ms*, the greedy batch plan is then post-optimised by
+    `improve_plan` for at most that long (default ``None``: no polish).
+
+    With *time_budget_ms* the planner runs in anytime mode instead: the
+    greedy plan is available at once and improved until the deadline;
+    *on_progress(best_cost, elapsed_ms)* hears about every new best.  Its
+    random choices come from *rng*; *iterations* additionally caps it at
+    that many LNS moves, which makes a seeded run reproducible as long as
+    the moves fit in the budget.  Both budgets are hard upper bounds.
+
+    *tasks* may also be a columnar `TaskTable`.
+    """
+    pairs = _pair_tasks(tasks)
+    station_of = _pair_stations(pairs)
+    stations = sorted({*station_of[0].values(), *station_of[1].values()})
+    dist = DistanceMatrix.for_stations(station_loc, stations, dist or _euclidean, extra=(start,))
+    plan = _plan_pairs(pairs, station_loc, start, cap, dist, station_of)
+    if time_budget_ms is not None:
+        plan = anytime_plan(plan, station_loc, start, cap, dist, time_budget_ms, on_progress, rng=rng,
+                            iterations=iterations)
+    elif local_search_ms is not None:
+        plan = improve_plan(plan, station_loc, start, cap, dist, time_budget_ms=local_search_ms)
     # Optionally finish at *end* (movement task not modelled here)
     return plan
@@ -0,0 +1,151 @@
+"""multi_robot.py
+
+Split pick/place pairs across K robots and order each robot's share.
+
+Pipeline
+--------
+* **Seed** – parallel greedy insertion: the robot that would finish its
+  current route earliest takes the object whose pickup is nearest to where
+  it stands; that keeps routes compact *and* balanced.
+* **Per-robot plan** – every share is batched and ordered by the unchanged
+  single-robot machinery in `hamiltonian` (`_BatchQueue` + `_tsp_order`).
+* **Local search** – relocate / swap objects out of the makespan robot while
+  the longest route gets shorter (ties broken by total travel).
+* **Polish** – each final route gets the single-robot PDP local search
+  (`pdp_search.improve_plan`).
+
+Makespan is measured in travel distance under *dist*, like the single-robot
+planner's scoring.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+from models.tasks import Task
+from models.map import Coordinate
+from task_sorting.distance_matrix import DistanceMatrix
+from task_sorting.hamiltonian import DistFn, _euclidean, _pair_tasks, _plan_cost, _plan_pairs
+from task_sorting.pdp_search import improve_plan
+
+__all__ = [
+    "allocate_tasks",
+]
+
+
+# ---------------------------------------------------------------------------
+#  Helpers
+# ---------------------------------------------------------------------------
+
+def _route(objs: List[str], pairs: Dict[str, Tuple[Task, Task]], station_loc: Dict[str, Coordinate],
+           start: Coordinate, cap: int, dist: DistFn) -> Tuple[List[Task], float]:
+    wanted = set(objs)      # keep input order so ties break like `sort_tasks`
+    plan = _plan_pairs({o: p for o, p in pairs.items() if o in wanted}, station_loc, start, cap, dist)
+    return plan, _plan_cost(plan, station_loc, start, dist)
+
+
+def _seed(objs: List[str], pairs: Dict[str, Tuple[Task, Task]], station_loc: Dict[str, Coordinate],
+          starts: Sequence[Coordinate], dist: DistFn) -> List[List[str]]:
+    """Greedy parallel insertion (one object carried at a time as estimate)."""
+    share: List[List[str]] = [[] for _ in starts]
+    pos = list(starts)
+    busy = [0.0] * len(starts)
+    remaining = set(objs)
+    while remaining:
+        k = min(range(len(starts)), key=lambda r: busy[r])
+        o = min(remaining, key=lambda x: (dist(pos[k], station_loc[pairs[x][0].station]), x))
+        pick, place = station_loc[pairs[o][0].station], station_loc[pairs[o][1].station]
+        busy[k] += dist(pos[k], pick) + dist(pick, place)
+        pos[k] = place
+        share[k].append(o)
+        remaining.remove(o)
+    return share
+
+
+# ---------------------------------------------------------------------------
+#  Public allocator
+# ---------------------------------------------------------------------------
+
+def allocate_tasks(
+    tasks: List[Task],
+    station_loc: Dict[str, Coordinate],
+    starts: Sequence[Coordinate],
+    caps: int | Sequence[int] = 3,
+    dist: DistFn | None = None,
+    rounds: int = 50,
+    swap_candidates: int = 8,
+    local_search_ms: float | None = None,
+) -> List[List[Task]]:
+    """Return one ordered task list per robot, minimising the makespan.
+
+    *starts* gives each robot's start cell and *caps* its load limit (one int
+    for a homogeneous fleet).  *rounds* bounds the improving moves of the
+    local search; swaps only pair an object with the *swap_candidates*
+    objects of the other robot whose pickups are nearest.  Given
+    *local_search_ms*, each final route is then polished by `improve_plan`
+    for at most that long (opt-in, as in `sort_tasks`).  With a single robot
+    the result equals `sort_tasks` with the same *local_search_ms*.
+    """
+    if not starts:
+        raise ValueError("Need at least one robot start")
+    caps = [caps] * len(starts) if isinstance(caps, int) else list(caps)
+    if len(caps) != len(starts):
+        raise ValueError("caps and starts must have the same length")
+    if any(c < 1 for c in caps):
+        raise ValueError("Robot capacity must be at least 1")
+
+    pairs = _pair_tasks(tasks)
+    stations = sorted({t.station for pair in pairs.values() for t in pair})
+    dist = DistanceMatrix.for_stations(station_loc, stations, dist or _euclidean, extra=starts)
+    share = _seed(list(pairs), pairs, station_loc, starts, dist)
+    routes = [_route(share[k], pairs, station_loc, starts[k], caps[k], dist) for k in range(len(starts))]
+
+    memo: Dict[Tuple[int, frozenset], Tuple[List[Task], float]] = {}
+
+    def evaluate(k: int, objs: List[str]):
+        key = (k, frozenset(objs))
+        if key not in memo:
+            memo[key] = _route(objs, pairs, station_loc, starts[k], caps[k], dist)
+        return memo[key]
+
+    def pickup(o: str) -> Coordinate:
+        return station_loc[pairs[o][0].station]
+
+    for _ in range(rounds):
+        costs = [c for _, c in routes]
+        worst = max(range(len(routes)), key=costs.__getitem__)
+        makespan, total = costs[worst], sum(costs)
+        improved = False
+        for o in list(share[worst]):
+            rest = [x for x in share[worst] if x != o]
+            new_worst = evaluate(worst, rest)
+            for k in range(len(routes)):
+                if k == worst:
+                    continue
+                # relocate o to k, or swap it with one of k's objects
+                candidates = [(rest, share[k] + [o])]
+                near = sorted(share[k], key=lambda p: (dist(pickup(o), pickup(p)), p))[:swap_candidates]
+                candidates += [(rest + [p], [x for x in share[k] if x != p] + [o]) for p in near]
+                for a_objs, b_objs in candidates:
+                    a = new_worst if a_objs is rest else evaluate(worst, a_objs)
+                    b = evaluate(k, b_objs)
+                    others = [c for i, c in enumerate(costs) if i not in (worst, k)]
+                    new_span = max(others + [a[1], b[1]])
+                    new_total = total - costs[worst] - costs[k] + a[1] + b[1]
+                    if (new_span, new_total) < (makespan - 1e-9, total) or \
+                            (abs(new_span - makespan) <= 1e-9 and new_total < total - 1e-9):
+                        share[worst], share[k] = a_objs, b_objs
+                        routes[worst], routes[k] = a, b
+                        improved = True
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+        if not improved:
+            break
+
+    if local_search_ms is None:
+        return [plan for plan, _ in routes]
+    return [improve_plan(plan, station_loc, starts[k], caps[k], dist, time_budget_ms=local_search_ms)
+            for k, (plan, _) in enumerate(routes)]
@@ -0,0 +1,204 @@
+"""online.py
+
+Online (rolling-horizon) planning for one robot while orders keep arriving.
+
+`OnlinePlanner` owns the robot's *not-yet-started* suffix of the plan.
+New pick/place pairs are inserted into that suffix at the cheapest
+precedence- and capacity-feasible slots (`_PDPState._best_insertion`),
+starting from the load the robot really has (`Robot.carrying`) and the
+station it is heading to.  Optionally a short local search then polishes
+the suffix.  Each arrival therefore costs one O(n²) insertion scan instead
+of a full `sort_tasks` over everything.
+
+Failed actions are retried: a failed pick puts its pair back into the
+suffix and a failed place goes back in while the object is still on board.
+After *retries* failures of the same object it is given up (see `dropped`);
+an undeliverable object then stays on board and keeps its load slot.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from models.clock import action_kind
+from models.map import Coordinate
+from models.robot import Robot
+from models.tasks import Task
+from task_sorting.pdp_search import DistFn, _euclidean, _local_search, _PDPState
+
+__all__ = [
+    "OnlinePlanner",
+]
+
+
+class OnlinePlanner:
+    """Incrementally maintained plan for *robot* holding ≤ *cap* objects."""
+
+    def __init__(self, robot: Robot, station_loc: Dict[str, Coordinate], cap: int = 3,
+                 dist: DistFn | None = None, local_search_ms: float | None = 5.0, retries: int = 3):
+        if len(robot.carrying) > cap:
+            raise ValueError("Robot already carries more than the load limit")
+        self.robot = robot
+        self.station_loc = station_loc
+        self.cap = cap
+        self.dist = dist or _euclidean
+        self.local_search_ms = local_search_ms
+        self.retries = retries
+        self.current: Optional[Task] = None         # handed out, not reported back yet
+        self.dropped: List[Task] = []
+        self._pending: List[Task] = []
+        self._waiting: Dict[str, Task] = {}          # object -> half still missing its partner
+        self._failures: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @property
+    def pending(self) -> List[Task]:
+        """Copy of the not-yet-started plan."""
+        return list(self._pending)
+
+    # ---------------- planning ----------------
+    def _origin(self) -> Coordinate:
+        """Where the robot starts the pending suffix."""
+        if self.current is not None:
+            return self.station_loc[self.current.station]
+        return self.robot.pos
+
+    def _onboard(self) -> List[str]:
+        """Objects on board when the pending suffix starts."""
+        onboard = list(self.robot.carrying)
+        t = self.current
+        if t is not None and t.objects:
+            if action_kind(t.task_name) == "pick":
+                onboard.append(t.objects[0])        # planned as if it succeeds
+            elif t.objects[0] in onboard:
+                onboard.remove(t.objects[0])
+        return onboard
+
+    def _state(self, extra: Sequence[Task]) -> _PDPState:
+        return _PDPState(self._pending + list(extra), self.station_loc, self._origin(),
+                         self.cap, self.dist, self._onboard())
+
+    def _commit(self, state: _PDPState):
+        if self.local_search_ms is not None and len(state.seq) >= 4:
+            _local_search(state, time.perf_counter() + self.local_search_ms / 1000.0)
+        self._pending = [state.tasks[x] for x in state.seq]
+
+    def add_pair(self, pick: Task, place: Task):
+        """Insert one pick/place pair at its cheapest feasible slots."""
+        n = len(self._pending)
+        try:
+            state = self._state((pick, place))
+        except ValueError:
+            raise ValueError("No feasible slot: the robot cannot take on another object") from None
+        cost, a, b = state._best_insertion(list(range(n)), n, n + 1)
+        if cost == math.inf:
+            raise ValueError("No feasible slot: the robot cannot take on another object")
+        seq = state.seq[:n]
+        state.seq = seq[:a] + [n] + seq[a:b] + [n + 1] + seq[b:]
+        state._index()
+        self._commit(state)
+
+    def add_place(self, place: Task):
+        """Insert the place of an object already on board (always feasible)."""
+        key = place.objects[0]
+        if key not in self._onboard():
+            raise ValueError(f"Place of '{key}' precedes its pick")
+        state = self._state((place,))
+        n, d = len(self._pending), state.d
+        seq = state.seq[:n]
+        best = min(range(n + 1), key=lambda k: d(seq[k - 1] if k else None, n)
+                   + d(n, seq[k] if k < n else None) - d(seq[k - 1] if k else None, seq[k] if k < n else None))
+        state.seq = seq[:best] + [n] + seq[best:]
+        state._index()
+        self._commit(state)
+
+    def add(self, tasks: Iterable[Task]) -> int:
+        """Accept arriving tasks; returns how many entered the plan.
+
+        Picks and places are matched by first object (in any arrival order);
+        a half whose partner has not arrived yet waits.  Places of objects
+        already on board go in directly; tasks that are neither pick nor
+        place are ignored.
+        """
+        added = 0
+        for t in tasks:
+            if not t.objects:
+                continue
+            kind, key = action_kind(t.task_name), t.objects[0]
+            if kind == "other":
+                continue
+            if kind == "place" and key not in self._waiting and key in self._onboard():
+                self.add_place(t)
+                added += 1
+                continue
+            other = self._waiting.pop(key, None)
+            if other is None or action_kind(other.task_name) == kind:
+                self._waiting[key] = t              # a later half replaces an unmatched one
+                continue
+            pick, place = (t, other) if kind == "pick" else (other, t)
+            self.add_pair(pick, place)
+            added += 2
+        return added
+
+    # ---------------- execution ----------------
+    def next_task(self) -> Optional[Task]:
+        """Hand out the head of the plan (report it back with `done`)."""
+        if self.current is not None:
+            raise RuntimeError("Report the current task with done() first")
+        if not self._pending:
+            return None
+        self.current = self._pending.pop(0)
+        return self.current
+
+    def done(self, task: Task, ok: bool):
+        """Record the outcome of the task handed out by `next_task`."""
+        if task is not self.current:
+            raise ValueError("Task was not handed out by this planner")
+        self.current = None
+        if ok:
+            return
+        key = task.objects[0]
+        self._failures[key] = self._failures.get(key, 0) + 1
+        give_up = self._failures[key] > self.retries
+        if action_kind(task.task_name) == "pick":
+            place = next((t for t in self._pending if t.objects[0] == key and t is not task), None)
+            if place is None:
+                raise RuntimeError(f"Place of '{key}' is missing from the plan")
+            self._pending.remove(place)
+            if give_up:
+                self.dropped += [task, place]
+            else:
+                self.add_pair(task, place)
+        elif key in self.robot.carrying and not give_up:    # still on board → must be delivered
+            self.add_place(task)
+        else:                                       # nothing to deliver, or given up (stays on board)
+            self.dropped.append(task)
+
+    def run(self, arrivals: Iterable[Tuple[float, Sequence[Task]]] = ()) -> List[Tuple[float, Task, bool]]:
+        """Drive the robot until the plan is empty and no orders are left.
+
+        *arrivals* yields ``(time, tasks)`` in time order (robot clock).  Due
+        orders are added before every dispatch; an idle robot waits for the
+        next arrival.  Returns ``(finish_time, task, success)`` per action.
+        """
+        clock = self.robot.clock
+        feed = iter(arrivals)
+        upcoming = next(feed, None)
+        log: List[Tuple[float, Task, bool]] = []
+        while True:
+            while upcoming is not None and upcoming[0] <= clock.now():
+                self.add(upcoming[1])
+                upcoming = next(feed, None)
+            task = self.next_task()
+            if task is None:
+                if upcoming is None:
+                    return log
+                clock.sleep(upcoming[0] - clock.now())
+                continue
+            ok = self.robot.execute_task(task, self.station_loc)
+            self.done(task, ok)
+            log.append((clock.now(), task, ok))
@@ -0,0 +1,158 @@
+"""parallel.py
+
+Multi-start planning across a process pool.
+
+`parallel_sort_tasks` runs many seeded restarts of the `hamiltonian`
+pipeline on a `ProcessPoolExecutor` and keeps the cheapest plan:
+
+* restart 0 is the deterministic `sort_tasks` construction;
+* every other restart shuffles the object order and jitters the batching
+  distances (different batches → different basins);
+* each restart is then improved by the anytime PDP search with its own seed.
+
+The station distance matrix is filled once in the parent and published in a
+`multiprocessing.shared_memory` block; workers map it read-only instead of
+unpickling (or re-measuring) it per task.  Restarts return task indices,
+so only small lists cross process boundaries.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+from typing import Dict, List, Tuple
+
+from models.tasks import Task
+from models.map import Coordinate
+from task_sorting.distance_matrix import DistanceMatrix
+from task_sorting.hamiltonian import DistFn, _euclidean, _pair_tasks, _plan_cost, _plan_pairs
+from task_sorting.pdp_search import anytime_plan, improve_plan
+
+__all__ = [
+    "parallel_sort_tasks",
+]
+
+_JITTER = 0.25      # batching distances are scaled by U(1, 1 + _JITTER) in perturbed restarts
+
+# per-process state, set by `_init_worker`
+_worker: dict = {}
+
+
+# ---------------------------------------------------------------------------
+#  Worker side
+# ---------------------------------------------------------------------------
+
+def _init_worker(shm_name: str, points: List[Coordinate], tasks: List[Task],
+                 station_loc: Dict[str, Coordinate], start: Coordinate, cap: int,
+                 restart_ms: float | None):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    # the block may be rounded up to whole pages (Windows, macOS): map only the n² doubles
+    view = shm.buf[:len(points) ** 2 * 8]
+    _worker.update(
+        shm=shm,                    # keep the mapping alive for the process lifetime
+        view=view,
+        matrix=DistanceMatrix.over_buffer(points, view),
+        tasks=tasks,
+        index={id(t): i for i, t in enumerate(tasks)},
+        station_loc=station_loc,
+        start=start,
+        cap=cap,
+        restart_ms=restart_ms,
+    )
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    """Release the views on the shared block, then unmap it (`close` fails while they exist)."""
+    if "shm" not in _worker:
+        return
+    _worker.pop("matrix").data.release()
+    _worker.pop("view").release()
+    _worker.pop("shm").close()
+
+
+def _restart(seed: int, perturb: bool) -> Tuple[float, List[int]]:
+    w = _worker
+    return _plan_once(w["tasks"], w["index"], w["station_loc"], w["start"], w["cap"],
+                      w["matrix"], seed, perturb, w["restart_ms"])
+
+
+def _plan_once(tasks: List[Task], index: Dict[int, int], station_loc: Dict[str, Coordinate],
+               start: Coordinate, cap: int, dist: DistFn, seed: int, perturb: bool,
+               restart_ms: float | None) -> Tuple[float, List[int]]:
+    """One restart; returns (cost, plan as indices into *tasks*)."""
+    rng = random.Random(seed)
+    pairs = _pair_tasks(tasks)
+    build_dist = dist
+    if perturb:
+        keys = list(pairs)
+        rng.shuffle(keys)
+        pairs = {k: pairs[k] for k in keys}
+        build_dist = lambda a, b: dist(a, b) * (1.0 + _JITTER * rng.random())
+    plan = _plan_pairs(pairs, station_loc, start, cap, build_dist)
+    if restart_ms is None:
+        plan = improve_plan(plan, station_loc, start, cap, dist)
+    else:
+        plan = anytime_plan(plan, station_loc, start, cap, dist, restart_ms, seed=seed)
+    return _plan_cost(plan, station_loc, start, dist), [index[id(t)] for t in plan]
+
+
+# ---------------------------------------------------------------------------
+#  Public entry point
+# ---------------------------------------------------------------------------
+
+def parallel_sort_tasks(
+    tasks: List[Task],
+    station_loc: Dict[str, Coordinate],
+    start: Coordinate,
+    end: Coordinate | None = None,
+    cap: int = 3,
+    dist: DistFn | None = None,
+    restarts: int | None = None,
+    workers: int | None = None,
+    restart_ms: float | None = 200.0,
+    seed: int = 0,
+) -> List[Task]:
+    """Best of *restarts* seeded plans computed on *workers* processes.
+
+    Same contract as `hamiltonian.sort_tasks`.  Each restart spends up to
+    *restart_ms* in the anytime search (``None``: local search to a local
+    optimum only).  Restart *i* uses seed ``seed + i``; with
+    ``restart_ms=None`` the result depends only on the seed and restart
+    count, not on the worker count or machine load.  *dist* is only
+    evaluated in the calling process.
+    """
+    workers = workers or os.cpu_count() or 1
+    restarts = restarts or 2 * workers
+    pairs = _pair_tasks(tasks)
+    if not pairs:
+        return []
+    tasks = [t for pair in pairs.values() for t in pair]
+    index = {id(t): i for i, t in enumerate(tasks)}
+    stations = sorted({t.station for t in tasks})
+    matrix = DistanceMatrix.for_stations(station_loc, stations, dist or _euclidean, extra=(start,)).fill()
+    jobs = [(seed + i, i > 0) for i in range(restarts)]
+
+    if workers == 1:
+        results = [_plan_once(tasks, index, station_loc, start, cap, matrix, s, p, restart_ms)
+                   for s, p in jobs]
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(1, matrix.data.itemsize * len(matrix.data)))
+        try:
+            shm.buf[:len(matrix.data) * matrix.data.itemsize] = matrix.data.tobytes()
+            with ProcessPoolExecutor(
+                max_workers=min(workers, restarts),
+                initializer=_init_worker,
+                initargs=(shm.name, matrix.points, tasks, station_loc, start, cap, restart_ms),
+            ) as pool:
+                results = list(pool.map(_restart, *zip(*jobs)))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    # ties go to the lowest seed, keeping results reproducible
+    _, best = min(results, key=lambda r: r[0])
+    # Optionally finish at *end* (movement task not modelled here)
+    return [tasks[i] for i in best]
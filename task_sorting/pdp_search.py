@@ -0,0 +1,396 @@
+"""pdp_search.py
+
+Local search for the single-robot pickup-and-delivery problem.
+
+`sort_tasks` builds batches greedily and only reorders inside a batch; this
+module post-optimises the *whole* plan instead, moving work across batch
+boundaries and interleaving picks and places wherever that is shorter.
+
+Moves (all precedence- and capacity-feasible)
+---------------------------------------------
+* **Relocate** – take one object's pick *and* place out and re-insert both
+  at the cheapest feasible positions.
+* **Exchange** – swap the pick and place slots of two objects (load profile
+  unchanged, so always feasible).
+* **Or-opt** – move a run of 1–3 consecutive stops elsewhere.
+
+Every candidate is scored by *delta cost* (only the edges it touches); the
+feasibility check runs only for improving candidates.  The search stops at a
+local optimum or when the time budget runs out.
+
+Anytime mode
+------------
+`anytime_plan` keeps a feasible best plan at every instant and improves it
+until a deadline with large-neighbourhood search: *ruin* a few related
+objects, *recreate* them by cheapest insertion, polish with the moves above
+and accept by a simulated-annealing rule.  Each new best is reported to an
+optional progress callback.
+
+Reproducible runs
+-----------------
+A deadline makes the result depend on machine speed.  Given *iterations*,
+`anytime_plan` also stops after that many ruin-and-recreate moves and cools
+by move count rather than by time, so a seeded run that finishes its moves
+inside the budget returns the same plan every time.  The deadline stays a
+hard upper bound either way.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from models.tasks import Task
+from models.map import Coordinate
+
+__all__ = [
+    "improve_plan",
+    "anytime_plan",
+]
+
+DistFn = Callable[[Coordinate, Coordinate], float]
+ProgressFn = Callable[[float, float], None]     # (best_cost, elapsed_ms)
+
+_EPS = 1e-9
+
+
+def _euclidean(a: Coordinate, b: Coordinate) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+class _PDPState:
+    """Plan as a sequence of node ids plus the per-node data moves need.
+
+    *onboard* lists objects already carried at *start*: they count towards
+    the load, and their places may appear without a pick (``mate == -1``).
+    """
+
+    def __init__(self, plan: Sequence[Task], station_loc: Dict[str, Coordinate], start: Coordinate,
+                 cap: int, dist: DistFn, onboard: Sequence[str] = ()):
+        self.tasks = list(plan)
+        self.xy = [station_loc[t.station] for t in self.tasks]
+        self.start = start
+        self.cap = cap
+        self.dist = dist
+        self.load0 = len(onboard)
+        n = len(self.tasks)
+        self.is_pick = [False] * n
+        self.mate = [-1] * n
+        open_picks: Dict[str, int] = {}
+        carried = list(onboard)
+        for i, t in enumerate(self.tasks):
+            key = t.objects[0]
+            if "pick" in t.task_name.lower():
+                self.is_pick[i] = True
+                open_picks[key] = i
+            else:
+                p = open_picks.pop(key, None)
+                if p is None:
+                    if key not in carried:
+                        raise ValueError(f"Place of '{key}' precedes its pick")
+                    carried.remove(key)
+                    continue
+                self.mate[i], self.mate[p] = p, i
+        if open_picks:
+            raise ValueError(f"Picks without a place: {sorted(open_picks)}")
+        self._memo: Dict[Tuple[int | None, int], float] = {}
+        self.seq = list(range(n))
+        if not self.feasible(self.seq):
+            raise ValueError("Plan exceeds the load limit")
+        self._index()
+
+    # ---------------- bookkeeping ----------------
+    def _index(self):
+        self.pos = [0] * len(self.seq)
+        for i, node in enumerate(self.seq):
+            self.pos[node] = i
+
+    def d(self, a: int | None, b: int | None) -> float:
+        """Distance between nodes; ``None`` is the start (as *a*) or the open end (as *b*)."""
+        if b is None:
+            return 0.0
+        key = (a, b)
+        v = self._memo.get(key)
+        if v is None:
+            v = self._memo[key] = self.dist(self.start if a is None else self.xy[a], self.xy[b])
+        return v
+
+    def cost(self) -> float:
+        total, prev = 0.0, None
+        for node in self.seq:
+            total += self.d(prev, node)
+            prev = node
+        return total
+
+    def feasible(self, seq: Sequence[int]) -> bool:
+        load = self.load0
+        seen = set()
+        for node in seq:
+            if self.is_pick[node]:
+                load += 1
+                if load > self.cap:
+                    return False
+            else:
+                if self.mate[node] >= 0 and self.mate[node] not in seen:
+                    return False
+                load -= 1
+            seen.add(node)
+        return True
+
+    # ---------------- moves ----------------
+    def relocate(self, node: int) -> bool:
+        """Best re-insertion of the pick/place pair containing *node*."""
+        if self.mate[node] < 0:
+            return False                    # place of an object already onboard
+        p, q = (node, self.mate[node]) if self.is_pick[node] else (self.mate[node], node)
+        seq, d = self.seq, self.d
+        i, j = self.pos[p], self.pos[q]
+        prev_p = seq[i - 1] if i else None
+        next_q = seq[j + 1] if j + 1 < len(seq) else None
+        if j == i + 1:
+            gain = d(prev_p, p) + d(p, q) + d(q, next_q) - d(prev_p, next_q)
+        else:
+            next_p, prev_q = seq[i + 1], seq[j - 1]
+            gain = (d(prev_p, p) + d(p, next_p) - d(prev_p, next_p)
+                    + d(prev_q, q) + d(q, next_q) - d(prev_q, next_q))
+
+        rest = [x for x in seq if x != p and x != q]
+        cost, a, b = self._best_insertion(rest, p, q)
+        if cost - gain >= -_EPS:
+            return False
+        self.seq = rest[:a] + [p] + rest[a:b] + [q] + rest[b:]
+        self._index()
+        return True
+
+    def _best_insertion(self, rest: List[int], p: int, q: int) -> Tuple[float, int, int]:
+        """Cheapest feasible slots (a, b) for pick *p* / place *q* in *rest*.
+
+        The pair goes in as ``rest[:a] + [p] + rest[a:b] + [q] + rest[b:]``;
+        appending both at the end is always feasible.
+        """
+        d = self.d
+        m = len(rest)
+        loads, load = [], self.load0
+        for x in rest:
+            load += 1 if self.is_pick[x] else -1
+            loads.append(load)
+
+        best, best_at = math.inf, (m, m)
+        for a in range(m + 1):
+            before = loads[a - 1] if a else self.load0
+            if before >= self.cap:
+                continue
+            prev_a = rest[a - 1] if a else None
+            next_a = rest[a] if a < m else None
+            base = d(prev_a, next_a)
+            pick_in = d(prev_a, p) + d(p, next_a) - base
+            # b == a: pick and place back to back
+            delta = d(prev_a, p) + d(p, q) + d(q, next_a) - base
+            if delta < best:
+                best, best_at = delta, (a, a)
+            for b in range(a + 1, m + 1):
+                if loads[b - 1] >= self.cap:
+                    break           # carrying one more would exceed cap from here on
+                prev_b = rest[b - 1]
+                next_b = rest[b] if b < m else None
+                delta = pick_in + d(prev_b, q) + d(q, next_b) - d(prev_b, next_b)
+                if delta < best:
+                    best, best_at = delta, (a, b)
+        return best, best_at[0], best_at[1]
+
+    def ruin_recreate(self, picks: Sequence[int], rng: random.Random):
+        """Remove the objects of *picks* and re-insert them (random order) greedily."""
+        gone = set(picks) | {self.mate[p] for p in picks}
+        rest = [x for x in self.seq if x not in gone]
+        order = list(picks)
+        rng.shuffle(order)
+        for p in order:
+            _, a, b = self._best_insertion(rest, p, self.mate[p])
+            rest = rest[:a] + [p] + rest[a:b] + [self.mate[p]] + rest[b:]
+        self.seq = rest
+        self._index()
+
+    def exchange(self, u: int, v: int) -> bool:
+        """Swap the slots of the pairs containing *u* and *v* if that is shorter."""
+        pu = u if self.is_pick[u] else self.mate[u]
+        pv = v if self.is_pick[v] else self.mate[v]
+        if pu == pv:
+            return False
+        swap = {self.pos[pu]: pv, self.pos[pv]: pu,
+                self.pos[self.mate[pu]]: self.mate[pv], self.pos[self.mate[pv]]: self.mate[pu]}
+        seq, n = self.seq, len(self.seq)
+        edges = {e for k in swap for e in (k, k + 1) if e < n}
+        old = new = 0.0
+        for e in edges:
+            a, b = (seq[e - 1] if e else None), seq[e]
+            old += self.d(a, b)
+            new += self.d(swap.get(e - 1, a) if e else None, swap.get(e, b))
+        if new - old >= -_EPS:
+            return False
+        for k, node in swap.items():
+            seq[k] = node
+        self._index()
+        return True
+
+    def or_opt(self, i: int, length: int) -> bool:
+        """Move ``seq[i:i + length]`` to the first feasible position that is shorter."""
+        seq, d = self.seq, self.d
+        n = len(seq)
+        if i + length > n:
+            return False
+        first, last = seq[i], seq[i + length - 1]
+        prev = seq[i - 1] if i else None
+        nxt = seq[i + length] if i + length < n else None
+        gain = d(prev, first) + d(last, nxt) - d(prev, nxt)
+        rest = seq[:i] + seq[i + length:]
+        seg = seq[i:i + length]
+        for k in range(len(rest) + 1):
+            if k == i:
+                continue
+            a = rest[k - 1] if k else None
+            b = rest[k] if k < len(rest) else None
+            if d(a, first) + d(last, b) - d(a, b) - gain < -_EPS:
+                cand = rest[:k] + seg + rest[k:]
+                if self.feasible(cand):
+                    self.seq = cand
+                    self._index()
+                    return True
+        return False
+
+
+def improve_plan(
+    plan: Sequence[Task],
+    station_loc: Dict[str, Coordinate],
+    start: Coordinate,
+    cap: int = 3,
+    dist: DistFn | None = None,
+    time_budget_ms: float | None = None,
+    onboard: Sequence[str] = (),
+) -> List[Task]:
+    """Return *plan* improved by relocate / exchange / or-opt moves.
+
+    *plan* must be feasible (every place after its pick, never more than
+    *cap* objects on board).  Runs to a local optimum, or until
+    *time_budget_ms* has elapsed if given.  *onboard* objects are already
+    carried at *start*; their places need no pick in *plan*.
+    """
+    if len(plan) < 4:
+        return list(plan)
+    state = _PDPState(plan, station_loc, start, cap, dist or _euclidean, onboard)
+    deadline = None if time_budget_ms is None else time.perf_counter() + time_budget_ms / 1000.0
+    _local_search(state, deadline)
+    return [state.tasks[x] for x in state.seq]
+
+
+def _local_search(state: _PDPState, deadline: Optional[float]):
+    """Apply improving moves until none is left or *deadline* (perf_counter) passes."""
+
+    def expired() -> bool:
+        return deadline is not None and time.perf_counter() >= deadline
+
+    n = len(state.seq)
+    picks = [x for x in range(n) if state.is_pick[x]]
+    improved = True
+    while improved and not expired():
+        improved = False
+        for node in picks:
+            if expired():
+                break
+            improved |= state.relocate(node)
+        for a in range(len(picks)):
+            if expired():
+                break
+            for b in range(a + 1, len(picks)):
+                improved |= state.exchange(picks[a], picks[b])
+        for length in (1, 2, 3):
+            for i in range(n):
+                if expired():
+                    break
+                improved |= state.or_opt(i, length)
+
+
+def anytime_plan(
+    plan: Sequence[Task],
+    station_loc: Dict[str, Coordinate],
+    start: Coordinate,
+    cap: int = 3,
+    dist: DistFn | None = None,
+    time_budget_ms: float = 1000.0,
+    on_progress: ProgressFn | None = None,
+    seed: int | None = None,
+    rng: random.Random | None = None,
+    onboard: Sequence[str] = (),
+    iterations: int | None = None,
+) -> List[Task]:
+    """Improve feasible *plan* until *time_budget_ms* elapses; return the best found.
+
+    *on_progress(best_cost, elapsed_ms)* is called for the input plan right
+    away and again for every new best, so a dispatcher can always act on the
+    latest result.  The plan is never worse than the input.  Random choices
+    come from `rng`, else from ``Random(seed)``.  *onboard* as in `improve_plan`.
+    With *iterations* the search also stops after that many LNS moves and
+    anneals by move count: deterministic per seed if the moves fit in the
+    budget.  The deadline is never exceeded.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + time_budget_ms / 1000.0
+    state = _PDPState(plan, station_loc, start, cap, dist or _euclidean, onboard)
+    rng = rng if rng is not None else random.Random(seed)
+
+    def report(cost: float):
+        if on_progress is not None:
+            on_progress(cost, (time.perf_counter() - t0) * 1000.0)
+
+    best_seq, best_cost = list(state.seq), state.cost()
+    report(best_cost)
+    picks = [x for x in range(len(state.seq)) if state.is_pick[x]]
+    if len(picks) < 2:
+        return [state.tasks[x] for x in best_seq]
+
+    _local_search(state, deadline)
+    cur_cost = state.cost()
+    if cur_cost < best_cost - _EPS:
+        best_seq, best_cost = list(state.seq), cur_cost
+        report(best_cost)
+
+    def left() -> float:
+        """Share of the budget (moves if counted, else time) still to spend."""
+        share = (deadline - time.perf_counter()) / (deadline - t0)
+        if iterations is None or share <= 0:
+            return share
+        return 1.0 - done / iterations
+
+    # annealing temperature: a few percent of an average leg, cooled linearly
+    temp0 = 0.05 * best_cost / max(1, len(state.seq))
+    max_ruin = max(2, min(10, len(picks) // 4))
+    done = 0
+    while True:
+        share = left()
+        if share <= 0:
+            break
+        temp = temp0 * share
+        done += 1
+        saved = list(state.seq)
+
+        # related removal: a random seed object plus its nearest pickups
+        seed_p = rng.choice(picks)
+        k = rng.randint(2, max_ruin)
+        near = sorted(picks, key=lambda p: state.d(seed_p, p))[:k]
+        state.ruin_recreate(near, rng)
+        for p in near:
+            state.relocate(p)
+        cost = state.cost()
+
+        if cost < cur_cost - _EPS or (temp > 0 and rng.random() < math.exp((cur_cost - cost) / temp)):
+            cur_cost = cost
+            if cost < best_cost - _EPS:
+                _local_search(state, deadline)
+                cur_cost = state.cost()
+                best_seq, best_cost = list(state.seq), cur_cost
+                report(best_cost)
+        else:
+            state.seq = saved
+            state._index()
+    return [state.tasks[x] for x in best_seq]
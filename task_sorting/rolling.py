@@ -0,0 +1,84 @@
+"""rolling.py
+
+Rolling-horizon planning over a task stream.
+
+`rolling_sort_tasks` consumes tasks lazily (e.g. from
+`models.task_stream.iter_tasks`), pairs picks with places as they arrive
+and, whenever *wave* complete pairs are buffered, plans that wave with
+`hamiltonian.sort_tasks` from wherever the previous wave ended.  Each wave
+is yielded as soon as it is planned, so the first dispatch happens after
+reading *wave* orders, not the whole feed, and memory stays bounded by the
+wave size plus the halves still waiting for their partner.
+
+Waves always end empty-handed (every pick is placed within its wave), so
+they can be executed back to back under the same capacity limit.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, List, Set
+
+from models.clock import action_kind
+from models.map import Coordinate
+from models.tasks import Task
+from task_sorting.hamiltonian import DistFn, sort_tasks
+
+__all__ = [
+    "rolling_sort_tasks",
+]
+
+
+def rolling_sort_tasks(
+    tasks: Iterable[Task],
+    station_loc: Dict[str, Coordinate],
+    start: Coordinate,
+    cap: int = 3,
+    dist: DistFn | None = None,
+    wave: int = 200,
+    local_search_ms: float | None = None,
+) -> Iterator[List[Task]]:
+    """Yield one planned wave (list of tasks) per *wave* complete pairs.
+
+    Pairing follows `sort_tasks`: tasks are keyed by their first object and
+    a later pick / place for the same object replaces a half still waiting
+    for its partner.  A completed pair whose object is already in the
+    current wave closes that wave first, since `sort_tasks` keys a wave by
+    object.  Halves still unmatched when the stream ends are dropped.
+    *local_search_ms* (opt-in, as in `sort_tasks`) is spent per wave.
+    """
+    if wave <= 0:
+        raise ValueError("Wave size must be positive")
+    halves: Dict[str, List[Task | None]] = {}      # object -> [pick, place], waiting for a partner
+    ready: List[Task] = []
+    in_wave: Set[str] = set()                      # objects paired in `ready`
+    pos = start
+
+    def plan() -> List[Task]:
+        nonlocal pos
+        out = sort_tasks(ready, station_loc, pos, cap=cap, dist=dist, local_search_ms=local_search_ms)
+        ready.clear()
+        in_wave.clear()
+        if out:
+            pos = station_loc[out[-1].station]
+        return out
+
+    for t in tasks:
+        if not t.objects:
+            continue
+        kind = action_kind(t.task_name)
+        if kind == "other":
+            continue
+        key = t.objects[0]
+        half = halves.setdefault(key, [None, None])
+        half[kind == "place"] = t
+        if half[0] is not None and half[1] is not None:
+            del halves[key]
+            if key in in_wave:                     # object reused: plan its earlier pair first
+                yield plan()
+            ready += half
+            in_wave.add(key)
+            if len(in_wave) == wave:
+                yield plan()
+
+    if ready:
+        yield plan()
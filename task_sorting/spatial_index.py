@@ -0,0 +1,165 @@
+"""Uniform-grid spatial index over station coordinates.
+
+`GridIndex` buckets keyed points into square cells sized for a couple of
+points each and answers k-nearest and radius queries by scanning rings of
+cells outwards from the query, with O(1) deletion as stations are consumed.
+
+The ring scan uses the Euclidean distance to the unscanned cells as a lower
+bound and stops once that bound exceeds the k-th best candidate, so it is
+only exact for metrics never shorter than the straight line.  Those are
+recognised by `is_at_least_euclidean`: the planners' Euclidean helpers,
+`StationOracle.distance` (4-neighbour grid paths), functions marked with
+`at_least_euclidean` (e.g. Manhattan) and `DistanceMatrix` / `DistanceCache`
+wrappers around any of them.  Any other metric (time-scaled, diagonal moves
+of cost 1, …) is answered by a linear scan instead, so results never depend
+on the index.  Ties break by insertion order, matching a ``min`` over the
+original list.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Tuple
+
+from models.distances import StationOracle
+from models.map import Coordinate
+from task_sorting.distance_matrix import DistanceCache, DistanceMatrix
+
+DistFn = Callable[[Coordinate, Coordinate], float]
+
+
+def at_least_euclidean(fn: DistFn) -> DistFn:
+    """Mark *fn* as never shorter than the straight line (usable as a decorator)."""
+    fn.at_least_euclidean = True
+    return fn
+
+
+def is_at_least_euclidean(dist: DistFn | None) -> bool:
+    """Whether ring-scan bounds are valid for *dist* (see the module docs)."""
+    while isinstance(dist, (DistanceMatrix, DistanceCache)):
+        dist = dist.dist
+    if getattr(dist, "__func__", None) is StationOracle.distance:
+        return True
+    return getattr(dist, "at_least_euclidean", False)
+
+
+@at_least_euclidean
+def _euclidean(a: Coordinate, b: Coordinate) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+class GridIndex:
+    """Keys at 2-D points, bucketed in cells of side `cell`."""
+
+    def __init__(self, items: Iterable[Tuple[Hashable, Coordinate]], cell: float | None = None):
+        items = list(items)
+        self.xy: Dict[Hashable, Coordinate] = {}
+        self.rank: Dict[Hashable, int] = {}          # insertion order, for tie-breaks
+        self.buckets: Dict[Tuple[int, int], Dict[Hashable, None]] = {}
+        if cell is None:
+            xs = [p[0] for _, p in items] or [0]
+            ys = [p[1] for _, p in items] or [0]
+            area = max(1.0, (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1))
+            cell = max(1.0, math.sqrt(2.0 * area / max(1, len(items))))    # ~2 points per cell
+        self.cell = float(cell)
+        self._lo = [math.inf, math.inf]                 # cell-coordinate bounds ever used
+        self._hi = [-math.inf, -math.inf]
+        for key, p in items:
+            self.add(key, p)
+
+    # ---------------- contents ----------------
+    def _cell_of(self, p: Coordinate) -> Tuple[int, int]:
+        return int(math.floor(p[0] / self.cell)), int(math.floor(p[1] / self.cell))
+
+    def add(self, key: Hashable, p: Coordinate):
+        if key in self.xy:
+            self.remove(key)
+        self.xy[key] = p
+        self.rank.setdefault(key, len(self.rank))
+        c = self._cell_of(p)
+        self.buckets.setdefault(c, {})[key] = None
+        for axis in (0, 1):
+            self._lo[axis] = min(self._lo[axis], c[axis])
+            self._hi[axis] = max(self._hi[axis], c[axis])
+
+    def remove(self, key: Hashable):
+        c = self._cell_of(self.xy.pop(key))
+        bucket = self.buckets[c]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[c]
+
+    def __len__(self) -> int:
+        return len(self.xy)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.xy
+
+    # ---------------- scanning ----------------
+    def rings(self, q: Coordinate) -> Iterator[Tuple[List[Hashable], float]]:
+        """Yield ``(keys, bound)`` ring by ring outwards from *q*.
+
+        Every key not yielded yet is at least `bound` (straight-line) away
+        from *q*.  When the next ring would have more cells than keys are
+        left, all remaining keys come at once with ``bound = inf``.  Keys
+        already yielded may be removed between steps; nothing may be added.
+        """
+        size = self.cell
+        cx, cy = self._cell_of(q)
+        reach = max(abs(cx - self._lo[0]), abs(self._hi[0] - cx),
+                    abs(cy - self._lo[1]), abs(self._hi[1] - cy), 0)
+        total = len(self.xy)
+        seen = 0
+        r = 0
+        while seen < total:
+            cells = 1 if r == 0 else 8 * r
+            if r > reach or cells > total - seen:
+                # sparse leftovers: hand over everything beyond the scanned rings
+                rest = [k for c, bucket in self.buckets.items()
+                        if max(abs(c[0] - cx), abs(c[1] - cy)) >= r for k in bucket]
+                yield rest, math.inf
+                return
+            if r == 0:
+                ring = [(cx, cy)]
+            else:
+                ring = [(cx + i, cy + j) for i in range(-r, r + 1) for j in (-r, r)]
+                ring += [(cx + i, cy + j) for i in (-r, r) for j in range(-r + 1, r)]
+            keys = [k for c in ring for k in self.buckets.get(c, ())]
+            seen += len(keys)
+            # distance from q to the outside of the (2r+1)-cell square just scanned
+            bound = min(q[0] - (cx - r) * size, (cx + r + 1) * size - q[0],
+                        q[1] - (cy - r) * size, (cy + r + 1) * size - q[1])
+            yield keys, bound
+            r += 1
+
+    # ---------------- queries -----------------
+    def nearest(self, q: Coordinate, k: int = 1, dist: DistFn | None = None) -> List[Hashable]:
+        """The *k* keys closest to *q* under *dist* (nearest first)."""
+        dist = dist or _euclidean
+        if not is_at_least_euclidean(dist):         # ring bounds invalid: scan everything
+            return heapq.nsmallest(k, self.xy, key=lambda key: (dist(q, self.xy[key]), self.rank[key]))
+        best: List[Tuple[float, int, Hashable]] = []           # max-heap via negation
+        for keys, bound in self.rings(q):
+            for key in keys:
+                item = (-dist(q, self.xy[key]), -self.rank[key], key)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item[:2] > best[0][:2]:
+                    heapq.heapreplace(best, item)
+            if len(best) == k and bound > -best[0][0]:
+                break
+        return [key for *_, key in sorted(best, reverse=True)]
+
+    def within(self, q: Coordinate, radius: float) -> List[Hashable]:
+        """Keys at straight-line distance ≤ *radius* from *q* (insertion order)."""
+        if not self.xy:
+            return []
+        lo = self._cell_of((q[0] - radius, q[1] - radius))
+        hi = self._cell_of((q[0] + radius, q[1] + radius))
+        out = [key
+               for i in range(max(lo[0], self._lo[0]), min(hi[0], self._hi[0]) + 1)
+               for j in range(max(lo[1], self._lo[1]), min(hi[1], self._hi[1]) + 1)
+               for key in self.buckets.get((i, j), ())
+               if _euclidean(q, self.xy[key]) <= radius]
+        return sorted(out, key=self.rank.__getitem__)
@@ -1,9 +1,13 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 import itertools, math, random
 
-from models.tasks import Task
+from models.tasks import Task, TaskTable
 from models.map   import Coordinate
+from task_sorting.pdp_search import ProgressFn, anytime_plan
+
+
+DistFn = Callable[[Coordinate, Coordinate], float]
 
 
 # ───────────────────── helpers ──────────────────────
@@ -11,81 +15,104 @@ def _dist(a: Coordinate, b: Coordinate) -> int:
     return abs(a[0] - b[0]) + abs(a[1] - b[1])        # Manhattan
 
 
-def _path_cost(seq: List[str], loc: Dict[str, Coordinate]) -> int:
+def _path_cost(seq: List[str], loc: Dict[str, Coordinate],
+               dist: DistFn = _dist) -> int:
     """Sum of distances along a station-name sequence."""
-    return sum(_dist(loc[s1], loc[s2]) for s1, s2 in zip(seq, seq[1:]))
+    return sum(dist(loc[s1], loc[s2]) for s1, s2 in zip(seq, seq[1:]))
 
 
 def _best_perm(stations: List[str],
                loc: Dict[str, Coordinate],
-               start_pos: Coordinate) -> List[str]:
+               start_pos: Coordinate,
+               dist: DistFn = _dist) -> List[str]:
     """
     Return the cheapest ordering of `stations`, *starting* at `start_pos`.
     (Brute-force because len(stations) ≤ 3.)
     """
     best, best_cost = None, math.inf
     for perm in itertools.permutations(stations):
-        cost = _dist(start_pos, loc[perm[0]]) + _path_cost(list(perm), loc)
+        cost = dist(start_pos, loc[perm[0]]) + _path_cost(list(perm), loc, dist)
         if cost < best_cost:
             best, best_cost = perm, cost
     return list(best)
 
 
 # ───────────────────── main entry --––––─────────────
-def sort_tasks(tasks: List[Task],
+def sort_tasks(tasks: List[Task] | TaskTable,
                station_loc : Dict[str, Coordinate],
                start: Coordinate,
                end  : Coordinate,
-               cap: int = 3) -> List[Task]:
+               cap: int = 3,
+               dist: DistFn = _dist,
+               time_budget_ms: float | None = None,
+               on_progress: ProgressFn | None = None,
+               rng: random.Random | None = None,
+               iterations: int | None = None) -> List[Task]:
     """
     Return a new task list such that:
         • robot starts empty at `start`
         • never carries > `cap` objects
         • ends at `end`
+    `dist` scores legs (Manhattan by default; pass `oracle.distance` for
+    obstacle-aware lengths).
+    With `time_budget_ms` the batch plan is then improved (anytime LNS)
+    until that deadline; `on_progress(best_cost, elapsed_ms)` sees each
+    new best.
+    Batches are drawn from `rng` (a fresh OS-seeded generator if omitted).
+    `iterations` caps the anytime stage at that many LNS moves, so a seeded
+    call returns the same plan whenever they fit in `time_budget_ms`; the
+    deadline is never exceeded.
+    `tasks` may also be a columnar `TaskTable`.
     """
+    rng = rng if rng is not None else random.Random()
 
     # ---- 1. split tasks into pick/place pairs keyed by object ---- #
     # works because generate_tasks.py always outputs Pick then Place rows
-    pairs: Dict[str, Tuple[Task, Task]] = {}
-    for t in tasks:
-        key = f"{t.objects[0]}"          # object name is unique per pair
-        pairs.setdefault(key, [None, None])
-        if "pick" in t.task_name.lower():
-            pairs[key][0] = t
-        else:
-            pairs[key][1] = t
-    # sanity
-    pairs = {k: tuple(v) for k, v in pairs.items() if None not in v}
-
-    remaining = set(pairs.keys())
+    if isinstance(tasks, TaskTable):
+        # paired on the integer columns; Tasks are only built for the plan
+        pairs = tasks.task_pairs()
+        station_of = (pairs.stations(0), pairs.stations(1))
+    else:
+        pairs: Dict[str, Tuple[Task, Task]] = {}
+        for t in tasks:
+            key = f"{t.objects[0]}"          # object name is unique per pair
+            pairs.setdefault(key, [None, None])
+            if "pick" in t.task_name.lower():
+                pairs[key][0] = t
+            else:
+                pairs[key][1] = t
+        # sanity
+        pairs = {k: tuple(v) for k, v in pairs.items() if None not in v}
+        station_of = tuple({k: pair[half].station for k, pair in pairs.items()} for half in (0, 1))
+
+    # sorted once: dict order of str keys may differ between feeds;
+    # drawn objects are swap-removed, so every draw is O(1)
+    remaining = sorted(pairs)
     plan: List[Task] = []
     cur_pos = start
 
     # ---- 2. repeatedly load ≤ cap objects, then deliver them ---- #
     while remaining:
-        # ---- pick phase ---------------------------------------- #
-        batch = random.sample(remaining, k=min(cap, len(remaining)))
-        batch_picks  = [pairs[k][0] for k in batch]
-
-        # best order to *pick* this mini-TSP
-        pick_order_names = _best_perm(
-            [t.station for t in batch_picks], station_loc, cur_pos)
-        for name in pick_order_names:
-            task = next(t for t in batch_picks if t.station == name)
-            plan.append(task)
-            cur_pos = station_loc[name]
-
-        # ---- place phase --------------------------------------- #
-        batch_places = [pairs[k][1] for k in batch]
-        place_order_names = _best_perm(
-            [t.station for t in batch_places], station_loc, cur_pos)
-        for name in place_order_names:
-            task = next(t for t in batch_places if t.station == name)
-            plan.append(task)
-            cur_pos = station_loc[name]
-
-        # done with these objects
-        remaining -= set(batch)
+        batch = []
+        for _ in range(min(cap, len(remaining))):
+            j = rng.randrange(len(remaining))
+            remaining[j], remaining[-1] = remaining[-1], remaining[j]
+            batch.append(remaining.pop())
+
+        # ---- pick phase, then place phase ---------------------- #
+        # best order of the distinct stations (mini-TSP); every batch
+        # task at a station is served on the same visit
+        for half in (0, 1):
+            at: Dict[str, List[str]] = {}
+            for k in batch:
+                at.setdefault(station_of[half][k], []).append(k)
+            for name in _best_perm(list(at), station_loc, cur_pos, dist):
+                plan.extend(pairs[k][half] for k in at[name])
+                cur_pos = station_loc[name]
+
+    if time_budget_ms is not None:
+        plan = anytime_plan(plan, station_loc, start, cap, dist, time_budget_ms, on_progress, rng=rng,
+                            iterations=iterations)
 
     # optional: let caller move to END after plan is executed
     return plan
@@ -1,4 +1,35 @@
-from models.tasks import Task
+import random
+
+from models.tasks import Task, TaskTable
+from models.map import GridMap
+from models.movement import _a_star, PLANNERS, DStarLite
+from models.distances import StationOracle
+from models.robot import Robot
+from models.hpa import HierarchicalPlanner
+from models.clock import Clock, RealClock, SimClock
+from models.fleet import run_fleet
+from task_sorting.hamiltonian import sort_tasks, _plan_cost, _tsp_order, _tour_length, _two_opt, _nearest_neighbour, _BatchQueue
+from task_sorting.multi_robot import allocate_tasks
+from task_sorting.pdp_search import improve_plan
+from task_sorting.distance_matrix import DistanceMatrix, DistanceCache
+from task_sorting import parallel
+from task_sorting.parallel import parallel_sort_tasks
+from task_sorting import pdp_search, task_sorter
+from models.seeding import rng_stream
+from models.task_stream import iter_tasks, iter_chunks
+from task_sorting.rolling import rolling_sort_tasks
+from task_sorting.online import OnlinePlanner
+from task_sorting.spatial_index import GridIndex, at_least_euclidean, is_at_least_euclidean
+import benchmark
+from models import instrument
+from models.movement import plan_path
+import gc
+from multiprocessing import shared_memory
+import json
+from pathlib import Path
+import math
+import pytest
+from models.trajectory import Trajectory
 
 def test_from_csv_sorted():
     tasks = Task.from_csv("tasks.csv")
@@ -12,5 +43,588 @@ def test_from_csv_sorted():
     for task in tasks:
         print(f"{task.task_name} at {task.station} with {len(task.objects)} objects => {task.points} points")
 
+def test_station_oracle_matches_a_star():
+    grid = GridMap(rows=15, cols=15)
+    points = [(0, 0), (3, 12), (14, 14), (7, 7), (12, 1)]
+    for p in points:
+        grid.add_workstation(p)
+    grid.generate_random_obstacles(40, seed=7)
+
+    oracle = StationOracle(grid, points)
+    for a in points:
+        for b in points:
+            path = _a_star(a, b, grid.rows, grid.cols, grid.obstacles)
+            assert oracle.distance(a, b) == len(path) - 1
+            cached = oracle.path(a, b)
+            assert cached[0] == a and cached[-1] == b
+            assert len(cached) == len(path)
+            assert not set(cached) & grid.obstacles
+
+def test_route_cache_invalidates_only_affected_legs():
+    grid = GridMap(rows=10, cols=10)
+    robot = Robot(grid, (0, 0))
+    cache = robot.route_cache
+    robot.move_to((0, 9), smooth=False)
+    robot.move_to((0, 0), smooth=False)
+    robot.move_to((9, 0), smooth=False)
+    robot.move_to((0, 0), smooth=False)
+    robot.move_to((0, 9), smooth=False)        # repeated leg
+    assert (cache.hits, cache.misses) == (1, 4)
+
+    grid.add_obstacle((0, 5))                  # blocks both row-0 legs only
+    assert cache.invalidations == 2
+    robot.move_to((0, 0), smooth=False)        # replanned around the obstacle
+    robot.move_to((9, 0), smooth=False)        # untouched leg still cached
+    assert cache.hits == 2
+    assert robot.pos == (9, 0)
+
+    for _ in range(50):                        # throwaway robots must not keep listening
+        Robot(grid, (0, 0))
+    gc.collect()
+    grid.add_obstacle((5, 5))
+    assert len(grid._listeners) == 1
+    cache.close()
+    assert not grid._listeners
+
+def test_grid_map_views_and_flat_a_star():
+    grid = GridMap(rows=30, cols=30)
+    grid.add_workstation((0, 0))
+    grid.generate_random_obstacles(200, forbid={(29, 29)}, seed=1)
+    obstacles = set(grid.obstacles)
+    assert len(obstacles) == len(grid.obstacles) == 200
+    assert (0, 0) in grid.workstations and (0, 0) not in grid.obstacles
+    assert (-1, 0) not in grid.obstacles
+
+    # flat-index A* on the occupancy array == tuple A* on a plain set
+    flat = _a_star((0, 0), (29, 29), grid.rows, grid.cols, grid.obstacles)
+    tuples = _a_star((0, 0), (29, 29), grid.rows, grid.cols, obstacles)
+    assert flat == tuples
+
+def test_planners_return_equal_cost_paths():
+    """Every planner in PLANNERS must find a path of the same optimal length."""
+    for seed in range(60):
+        rng = random.Random(seed)
+        rows, cols = rng.randint(2, 20), rng.randint(2, 20)
+        grid = GridMap(rows, cols)
+        grid.generate_random_obstacles(int(rows * cols * rng.uniform(0, 0.35)), seed=seed)
+        free = [(r, c) for r in range(rows) for c in range(cols) if (r, c) not in grid.obstacles]
+        obstacles = grid.obstacles if seed % 2 else set(grid.obstacles)
+        for _ in range(5):
+            a, b = rng.choice(free), rng.choice(free)
+            lengths = set()
+            for name, planner in PLANNERS.items():
+                try:
+                    path = planner(a, b, rows, cols, obstacles)
+                except RuntimeError:
+                    lengths.add(None)
+                    continue
+                assert path[0] == a and path[-1] == b, name
+                assert all(abs(p[0] - q[0]) + abs(p[1] - q[1]) == 1 for p, q in zip(path, path[1:])), name
+                assert not set(path) & set(grid.obstacles), name
+                lengths.add(len(path))
+            assert len(lengths) == 1, (seed, a, b, lengths)
+
+def test_hierarchical_planner_paths_and_local_rebuild():
+    grid = GridMap(rows=40, cols=40)
+    grid.generate_random_obstacles(250, forbid={(0, 0), (39, 39), (20, 3)}, seed=11)
+    hpa = HierarchicalPlanner(grid, cluster_size=8)
+    for a, b in [((0, 0), (39, 39)), ((20, 3), (0, 0)), ((39, 39), (20, 3))]:
+        path = hpa.find_path(a, b)
+        optimal = _a_star(a, b, grid.rows, grid.cols, grid.obstacles)
+        assert path[0] == a and path[-1] == b
+        assert all(abs(p[0] - q[0]) + abs(p[1] - q[1]) == 1 for p, q in zip(path, path[1:]))
+        assert not set(path) & set(grid.obstacles)
+        assert len(optimal) <= len(path) <= 1.25 * len(optimal)
+
+    builds = hpa.cluster_builds
+    grid.add_obstacle((12, 12))                # interior of a single cluster
+    assert hpa.cluster_builds - builds <= 5
+    assert hpa._intra == HierarchicalPlanner(grid, cluster_size=8)._intra
+
+def test_d_star_lite_repairs_route_when_obstacles_appear():
+    rng = random.Random(5)
+    grid = GridMap(rows=25, cols=25)
+    grid.generate_random_obstacles(80, forbid={(0, 0), (24, 24)}, seed=5)
+    with DStarLite(grid, (0, 0), (24, 24)) as planner:
+        assert len(planner.path()) == len(_a_star((0, 0), (24, 24), 25, 25, grid.obstacles))
+    assert not grid._listeners
+
+    robot = Robot(grid, (0, 0))
+    for i, step in enumerate(robot.drive((24, 24))):
+        if i % 5 == 0:                          # block a cell on the current route
+            ahead = robot.replanner.path()[2:-1]
+            if ahead:
+                cell = rng.choice(ahead)
+                try:                            # ...unless that would cut the goal off
+                    _a_star(robot.pos, (24, 24), 25, 25, set(grid.obstacles) | {cell})
+                    grid.add_obstacle(cell)
+                except RuntimeError:
+                    pass
+        route = robot.replanner.path()
+        assert len(route) == len(_a_star(robot.pos, (24, 24), 25, 25, grid.obstacles))
+    assert robot.pos == (24, 24)
+    assert not {tuple(map(int, p)) for p in robot.path} & set(grid.obstacles) - {(0, 0)}
+
+def test_sim_clock_accounts_travel_and_action_time():
+    grid = GridMap(rows=5, cols=5)
+    clock = SimClock()
+    robot = Robot(grid, (0, 0), clock=clock, durations={"pick": 2.5, "step": 0.5})
+    robot.execute_task(Task("S1", ["A"], "Pick A", 10), {"S1": (0, 4)})
+    assert clock.now() == 4 * 0.5 + 2.5
+    assert Robot(grid, (0, 0), clock=RealClock()).durations["step"] == 0.0
+    with pytest.raises(TypeError):
+        Clock()
+
+def test_fleet_shares_clock_and_finishes_faster():
+    random.seed(0)
+    lookup = {"A": (0, 0), "B": (0, 9), "C": (9, 0), "D": (9, 9)}
+    tasks = []
+    for k in range(8):
+        a, b = random.sample(sorted(lookup), 2)
+        tasks += [Task(a, [f"O{k}"], f"Pick O{k}", 1), Task(b, [f"O{k}"], f"Place O{k}", 1)]
+
+    def makespan(n):
+        grid = GridMap(rows=10, cols=10)
+        clock = SimClock()
+        result = run_fleet([Robot(grid, (5, 5), clock=clock) for _ in range(n)], tasks, lookup)
+        times = [t for t, *_ in result["log"]]
+        assert len(times) == len(tasks) and times == sorted(times)
+        return result["makespan"]
+
+    assert makespan(4) < makespan(1)
+
+def test_allocate_tasks_splits_pairs_and_cuts_makespan():
+    rng = random.Random(3)
+    loc = {f"S{i}": (rng.randrange(30), rng.randrange(30)) for i in range(40)}
+    tasks = []
+    for k in range(20):
+        a, b = f"S{2 * k}", f"S{2 * k + 1}"
+        tasks += [Task(a, [f"O{k}"], f"Pick O{k}", 1), Task(b, [f"O{k}"], f"Place O{k}", 1)]
+
+    assert allocate_tasks(tasks, loc, [(0, 0)]) == [sort_tasks(tasks, loc, (0, 0))]
+    plans = allocate_tasks(tasks, loc, [(0, 0), (29, 29), (0, 29)], caps=[3, 2, 1], local_search_ms=200.0)
+    assert sorted(id(t) for p in plans for t in p) == sorted(map(id, tasks))
+    for plan, cap in zip(plans, [3, 2, 1]):
+        load = set()
+        for t in plan:
+            if "Pick" in t.task_name:
+                load.add(t.objects[0])
+            else:
+                load.remove(t.objects[0])          # placed only after its pick
+            assert len(load) <= cap
+    single = _plan_cost(sort_tasks(tasks, loc, (0, 0), local_search_ms=200.0), loc, (0, 0))
+    starts = [(0, 0), (29, 29), (0, 29)]
+    assert max(_plan_cost(p, loc, s) for p, s in zip(plans, starts)) < single
+
+def test_pdp_local_search_shortens_plan_and_stays_feasible():
+    rng = random.Random(5)
+    loc = {f"S{i}": (rng.randrange(50), rng.randrange(50)) for i in range(60)}
+    tasks = []
+    for k in range(30):
+        tasks += [Task(f"S{2 * k}", [f"O{k}"], f"Pick O{k}", 1), Task(f"S{2 * k + 1}", [f"O{k}"], f"Place O{k}", 1)]
+
+    greedy = sort_tasks(tasks, loc, (0, 0), local_search_ms=None)
+    better = improve_plan(greedy, loc, (0, 0), cap=3)
+    assert sorted(map(id, better)) == sorted(map(id, greedy))
+    assert _plan_cost(better, loc, (0, 0)) < 0.9 * _plan_cost(greedy, loc, (0, 0))
+    load = set()
+    for t in better:
+        if "Pick" in t.task_name:
+            load.add(t.objects[0])
+        else:
+            load.remove(t.objects[0])
+        assert len(load) <= 3
+    try:
+        improve_plan(greedy, loc, (0, 0), cap=2)
+        assert False, "plan over the load limit accepted"
+    except ValueError:
+        pass
+
+def test_anytime_mode_reports_improving_costs_within_budget():
+    rng = random.Random(7)
+    loc = {f"S{i}": (rng.randrange(50), rng.randrange(50)) for i in range(40)}
+    tasks = []
+    for k in range(20):
+        tasks += [Task(f"S{2 * k}", [f"O{k}"], f"Pick O{k}", 1), Task(f"S{2 * k + 1}", [f"O{k}"], f"Place O{k}", 1)]
+
+    class Counting(random.Random):                       # one choice() per LNS move
+        moves = 0
+        def choice(self, seq):
+            self.moves += 1
+            return super().choice(seq)
+
+    seen = []
+    search = Counting(7)
+    plan = sort_tasks(tasks, loc, (0, 0), time_budget_ms=60_000, on_progress=lambda c, ms: seen.append(c),
+                      rng=search, iterations=100)
+    assert search.moves == 100                           # stopped by the move cap, not the deadline
+    assert seen[0] == _plan_cost(sort_tasks(tasks, loc, (0, 0), local_search_ms=None), loc, (0, 0))
+    assert seen == sorted(seen, reverse=True) and len(seen) > 1
+    assert abs(seen[-1] - _plan_cost(plan, loc, (0, 0))) < 1e-6
+    assert sorted(map(id, plan)) == sorted(map(id, tasks))
+
+def test_held_karp_matches_brute_force_open_path():
+    import itertools
+    rng = random.Random(11)
+    for n in (4, 6, 7):
+        coords = {f"S{i}": (rng.randrange(40), rng.randrange(40)) for i in range(n)}
+        order = _tsp_order(list(coords), coords, (0, 0))
+        best = min(_tour_length(list(p), coords, (0, 0)) for p in itertools.permutations(coords))
+        assert sorted(order) == sorted(coords)
+        assert abs(_tour_length(order, coords, (0, 0)) - best) < 1e-9
+
+def test_distance_matrix_is_lazy_and_cache_is_bounded():
+    calls = []
+    def metric(a, b):
+        calls.append((a, b))
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    m = DistanceMatrix.for_stations({"A": (0, 0), "B": (3, 4)}, ["A", "B"], metric, extra=[(1, 1)])
+    assert len(m) == 3 and not calls
+    assert m((0, 0), (3, 4)) == m((0, 0), (3, 4)) == 7 and len(calls) == 1
+    assert m((9, 9), (0, 0)) == 18                      # unknown point: passes through
+    assert m.data is None                               # no n² buffer until filled
+    assert list(m.fill().data) == [m.between(i, j) for i in range(3) for j in range(3)] and len(calls) == 2 + 8
+
+    cache = DistanceCache(metric, capacity=2)
+    for p in [(0, 1), (0, 2), (0, 3), (0, 3)]:
+        cache((0, 0), p)
+    assert len(cache) == 2 and cache.evictions == 1 and cache.hits == 1
+
+def test_two_opt_reaches_local_optimum_on_large_tours():
+    rng = random.Random(2)
+    coords = {f"S{i}": (rng.random() * 100, rng.random() * 100) for i in range(200)}
+    tour = _nearest_neighbour(list(coords), coords, (0, 0))
+    better = _two_opt(tour, coords, (0, 0))
+    assert sorted(better) == sorted(coords)
+    assert _tour_length(better, coords, (0, 0)) < 0.9 * _tour_length(tour, coords, (0, 0))
+    again = _two_opt(better, coords, (0, 0))             # already 2-optimal: nothing left to gain
+    assert sorted(again) == sorted(coords)
+    assert _tour_length(again, coords, (0, 0)) == _tour_length(better, coords, (0, 0))
+
+def test_parallel_multistart_shares_matrix_and_beats_single_start():
+    rng = random.Random(3)
+    loc = {f"S{i}": (rng.randrange(60), rng.randrange(60)) for i in range(40)}
+    tasks = []
+    for k in range(20):
+        tasks += [Task(f"S{2 * k}", [f"O{k}"], f"Pick O{k}", 1), Task(f"S{2 * k + 1}", [f"O{k}"], f"Place O{k}", 1)]
+
+    inline = parallel_sort_tasks(tasks, loc, (0, 0), workers=1, restarts=4, restart_ms=None)
+    pooled = parallel_sort_tasks(tasks, loc, (0, 0), workers=2, restarts=4, restart_ms=None)
+    assert pooled == inline                     # same seeds, shared-memory matrix == local one
+    assert sorted(map(id, pooled)) == sorted(map(id, tasks))
+    single = sort_tasks(tasks, loc, (0, 0), local_search_ms=10_000)
+    assert _plan_cost(pooled, loc, (0, 0)) <= _plan_cost(single, loc, (0, 0)) + 1e-9
+
+    # a block rounded up to the page size (Windows, macOS) still maps the n² matrix
+    matrix = DistanceMatrix([(0, 0), (3, 4)], math.dist).fill()
+    shm = shared_memory.SharedMemory(create=True, size=4096)
+    try:
+        shm.buf[:32] = matrix.data.tobytes()
+        parallel._init_worker(shm.name, matrix.points, tasks, loc, (0, 0), 3, None)
+        assert parallel._worker["matrix"]((0, 0), (3, 4)) == 5.0
+        parallel._close_worker()                 # views released first, so no BufferError
+        assert "shm" not in parallel._worker
+    finally:
+        shm.close()
+        shm.unlink()
+
+def test_seeded_streams_make_runs_reproducible():
+    loc = {f"S{i}": (i, 2 * i % 7) for i in range(8)}
+    tasks = []
+    for k in range(4):
+        tasks += [Task(f"S{2 * k}", [f"O{k}"], f"Pick O{k}", 1), Task(f"S{2 * k + 1}", [f"O{k}"], f"Place O{k}", 1)]
+
+    def run(seed):
+        grid = GridMap(rows=10, cols=10)
+        grid.generate_random_obstacles(15, forbid=set(loc.values()), rng=rng_stream(seed, "obstacles"))
+        plan = task_sorter.sort_tasks(tasks, loc, (0, 0), (9, 9), rng=rng_stream(seed, "sorter"))
+        robot = Robot(grid, (0, 0), rng=rng_stream(seed, "robot"))
+        outcomes = [robot.execute_task(t, loc) for t in plan]
+        return set(grid.obstacles), [t.task_name for t in plan], outcomes, robot.path
+
+    assert run(7) == run(7)
+    assert rng_stream(7, "robot").random() != rng_stream(7, "sorter").random()
+
+    # a move count that fits in the budget makes the anytime stage repeatable too
+    plans = [sort_tasks(tasks, loc, (0, 0), rng=rng_stream(7, "sorter"), iterations=50, time_budget_ms=60_000)
+             for _ in range(2)]
+    assert plans[0] == plans[1]
+
+def test_seeded_sorting_keeps_the_deadline(monkeypatch):
+    loc = {f"S{i}": (i, 3 * i % 11) for i in range(12)}
+    tasks = []
+    for k in range(6):
+        tasks += [Task(f"S{2 * k}", [f"O{k}"], f"Pick O{k}", 1), Task(f"S{2 * k + 1}", [f"O{k}"], f"Place O{k}", 1)]
+
+    class Ticking:                                       # every clock read costs 1 ms
+        def __init__(self):
+            self.t = self.reads = 0
+        def perf_counter(self):
+            self.reads += 1
+            self.t += 0.001
+            return self.t
+
+    class Counting(random.Random):                       # one choice() per LNS move, ≥ 1 clock read each
+        moves = 0
+        def choice(self, seq):
+            self.moves += 1
+            return super().choice(seq)
+
+    for sorter in (sort_tasks, lambda *a, **kw: task_sorter.sort_tasks(*a, (9, 9), **kw)):
+        monkeypatch.setattr(pdp_search, "time", Ticking())
+        rng = Counting(1)
+        plan = sorter(tasks, loc, (0, 0), rng=rng, iterations=10_000, time_budget_ms=200)
+        assert 0 < rng.moves <= 200 and sorted(map(repr, plan)) == sorted(map(repr, tasks))
+
+    clock = Ticking()
+    monkeypatch.setattr(pdp_search, "time", clock)
+    sort_tasks(tasks, loc, (0, 0), rng=random.Random(1), local_search_ms=50)
+    assert clock.reads > 0                               # the local search watches its deadline
+
+def test_default_pipeline_is_reproducible(capsys):
+    import runpy
+
+    def run():
+        ns = runpy.run_path(str(Path(__file__).with_name("main.py")))
+        return [repr(t) for t in ns["task_list"]], list(ns["robot"].path), ns["clock"].now()
+
+    first = run()
+    assert first == run()
+    assert "RUN END" in capsys.readouterr().out
+
+def test_benchmark_records_metrics_and_flags_regressions(tmp_path):
+    rows = benchmark.bench_scenario(("tiny", 10, 10, 0.05, 5, 3, 2), seed=1, repeat=1)
+    benches = {r["bench"]: r for r in rows}
+    assert {f"search/{k}" for k in PLANNERS} <= benches.keys()
+    assert benches["search/astar"]["expanded"] > 0
+    assert benches["sort/task_sorter"]["cost"] > 0
+
+    old, new = tmp_path / "old.json", tmp_path / "new.csv"
+    benchmark.save(old, {}, rows)
+    worse = [dict(r, cost=r["cost"] * 2) if "cost" in r else r for r in rows]
+    benchmark.save(new, {}, worse)
+    assert benchmark.compare(old, old, tolerance=0.1, time_tolerance=0.25) == []
+    assert benchmark.compare(old, new, tolerance=0.1, time_tolerance=10.0)
+
+def test_instrumentation_records_only_when_enabled(tmp_path):
+    grid = GridMap(rows=15, cols=15)
+    grid.generate_random_obstacles(20, forbid={(0, 0), (14, 14)}, rng=random.Random(2))
+    loc = {f"S{i}": (i, (3 * i) % 15) for i in range(10)}
+    tasks = []
+    for k in range(5):
+        tasks += [Task(f"S{2 * k}", [f"O{k}"], f"Pick O{k}", 1), Task(f"S{2 * k + 1}", [f"O{k}"], f"Place O{k}", 1)]
+
+    instrument.reset()
+    plan_path(15, 15, (0, 0), (14, 14), grid.obstacles)
+    assert instrument.snapshot()["timers"] == {}
+
+    instrument.enable(trace=True)
+    try:
+        plan_path(15, 15, (0, 0), (14, 14), grid.obstacles)
+        _tsp_order(list(loc), loc, (0, 0))
+        snap = instrument.snapshot()
+        instrument.write_chrome_trace(tmp_path / "trace.json")
+    finally:
+        instrument.disable()
+        instrument.reset()
+    assert snap["timers"]["movement.plan_path"]["calls"] == 1
+    assert snap["timers"]["movement._a_star"]["calls"] == 1      # grid fast path not counted twice
+    assert "movement._a_star_flat" not in snap["timers"]
+    assert snap["counters"]["search.expanded"] > 0 and snap["peaks"]["search.frontier_peak"] > 0
+    assert snap["counters"]["elastic_band.iterations"] >= 1
+    assert snap["counters"]["held_karp.states"] == 10 * 2 ** 9
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {"movement.plan_path", "hamiltonian._held_karp"} <= {e["name"] for e in events}
+
+def test_task_table_round_trips_and_feeds_sorters():
+    loc = {f"S{i}": (i, (5 * i) % 11) for i in range(12)}
+    tasks = [Task("S0", ["X", "Y"], "Charge", 5)]
+    for k in range(6):
+        tasks += [Task(f"S{2 * k}", [f"O{k}"], f"Pick O{k}", 1), Task(f"S{2 * k + 1}", [f"O{k}"], f"Place O{k}", 1)]
+    table = TaskTable.from_tasks(tasks)
+    assert len(table) == len(tasks) and len(table.stations) == 12
+    assert [repr(t) for t in table.to_tasks()] == [repr(t) for t in tasks]
+    assert not hasattr(tasks[0], "__dict__")
+
+    plan = sort_tasks(table, loc, (0, 0), local_search_ms=None)
+    assert [repr(t) for t in plan] == [repr(t) for t in sort_tasks(tasks, loc, (0, 0), local_search_ms=None)]
+    plan = task_sorter.sort_tasks(table, loc, (0, 0), (9, 9), rng=random.Random(1))
+    assert sorted(t.task_name for t in plan) == sorted(t.task_name for t in tasks[1:])
+    pairs = table.task_pairs()
+    assert pairs.stations(1)["O2"] == "S5" and not pairs._tasks      # read off the columns
+    assert pairs["O2"] is pairs["O2"]
+
+    # points depend only on the file, not on what was loaded before
+    csv_path = str(Path(__file__).with_name("tasks.csv"))
+    points = [t.points for t in Task.from_csv(csv_path)]
+    assert [t.points for t in Task.from_csv(csv_path)] == points == list(TaskTable.from_csv(csv_path).points)
+    assert Task("S1", ["A"], "Pick A").points == Task("S1", ["A"], "Pick A").points == 200
+
+def test_streaming_feed_plans_first_wave_before_end_of_file(tmp_path):
+    loc = {f"S{i}": (i % 10, i // 10) for i in range(40)}
+    feed = tmp_path / "orders.jsonl"
+    lines = []
+    for k in range(20):
+        lines.append(json.dumps({"station": f"S{2 * k}", "objects": [f"O{k}"], "task_name": f"Pick O{k}", "points": 1}))
+        lines.append(json.dumps({"station": f"S{2 * k + 1}", "objects": f"O{k}", "task_name": f"Place O{k}"}))
+    lines.insert(5, json.dumps({"station": "S99", "objects": "Z", "task_name": "Pick Z"}))
+    feed.write_text("\n".join(lines) + "\n")
+
+    with pytest.raises(ValueError, match=":6: unknown station"):
+        list(iter_tasks(feed, stations=loc))
+    errors = []
+    assert [len(c) for c in iter_chunks(feed, 16, stations=loc, on_error=lambda n, m: errors.append(n))] == [16, 16, 8]
+    assert errors == [6]
+
+    read = []
+    def counted():
+        for t in iter_tasks(feed, stations=loc, on_error=lambda n, m: None):
+            read.append(t)
+            yield t
+    waves = rolling_sort_tasks(counted(), loc, (0, 0), wave=5, local_search_ms=None)
+    first = next(waves)
+    assert len(first) == 10 and len(read) == 10          # planned after reading 5 pairs only
+    rest = [t for w in waves for t in w]
+    assert sorted(t.task_name for t in first + rest) == sorted(t.task_name for t in read)
+    assert len(read) == 40
+
+    reused = [Task("S1", ["A"], "Pick A", 1), Task("S2", ["A"], "Place A", 1),
+              Task("S3", ["A"], "Pick A", 1), Task("S4", ["A"], "Place A", 1)]
+    waves = list(rolling_sort_tasks(reused, loc, (0, 0), wave=5))
+    assert [[t.station for t in w] for w in waves] == [["S1", "S2"], ["S3", "S4"]]
+
+def test_online_planner_inserts_arrivals_within_current_load():
+    loc = {f"S{i}": (i, (7 * i) % 12) for i in range(12)}
+    robot = Robot(GridMap(rows=12, cols=12), (0, 0), rng=random.Random(4))
+    robot.carrying = ["A", "B"]
+    online = OnlinePlanner(robot, loc, cap=3)
+    online.add([Task("S1", ["A"], "Place A", 1), Task("S2", ["B"], "Place B", 1)])
+    online.add([Task("S3", ["C"], "Pick C", 1)])
+    assert len(online) == 2                      # pick waits for its place
+    online.add([Task("S4", ["C"], "Place C", 1), Task("S5", ["D"], "Pick D", 1), Task("S6", ["D"], "Place D", 1)])
+    load = 2
+    for t in online.pending:                     # never more than cap, starting from what is onboard
+        load += 1 if "Pick" in t.task_name else -1
+        assert 0 <= load <= 3
+
+    arrivals = [(5.0 * k, [Task(f"S{(k + 7) % 12}", [f"O{k}"], f"Pick O{k}", 1),
+                           Task(f"S{(k + 2) % 12}", [f"O{k}"], f"Place O{k}", 1)]) for k in range(8)]
+    log = online.run(arrivals)
+    delivered = {t.objects[0] for _, t, ok in log if ok and "Place" in t.task_name}
+    given_up = {t.objects[0] for t in online.dropped}
+    assert delivered | given_up == {"A", "B", "C", "D"} | {f"O{k}" for k in range(8)}
+    assert robot.carrying == [] and len(online) == 0
+
+    class Unlucky(random.Random):                # every pick / place fails
+        def random(self):
+            return 0.0
+
+    robot = Robot(GridMap(rows=12, cols=12), (0, 0), rng=Unlucky())
+    robot.carrying = ["A"]
+    online = OnlinePlanner(robot, loc, cap=3, retries=2)
+    online.add([Task("S1", ["A"], "Place A", 1), Task("S2", ["B"], "Pick B", 1), Task("S3", ["B"], "Place B", 1)])
+    log = online.run()
+    assert len(log) == 6 and not any(ok for *_, ok in log)      # three tries each, then given up
+    assert sorted(t.task_name for t in online.dropped) == ["Pick B", "Place A", "Place B"]
+    assert robot.carrying == ["A"]
+
+    online.add([Task("S2", ["E"], "Pick E", 1), Task("S3", ["E"], "Place E", 1)])
+    pick = online.next_task()
+    online._pending.clear()
+    with pytest.raises(RuntimeError, match="Place of 'E'"):
+        online.done(pick, False)
+
+def test_objects_sharing_a_station_are_all_planned():
+    loc = {"A": (0, 5), "B": (4, 4), "C": (8, 1), "D": (2, 9)}
+    tasks = []
+    for k, (src, dst) in enumerate([("A", "B"), ("A", "C"), ("A", "B"), ("D", "C"), ("B", "A"), ("D", "A")]):
+        tasks += [Task(src, [f"O{k}"], f"Pick O{k}", 1), Task(dst, [f"O{k}"], f"Place O{k}", 1)]
+    for plan in (sort_tasks(tasks, loc, (0, 0), local_search_ms=None),
+                 sort_tasks(tasks, loc, (0, 0), local_search_ms=50.0),
+                 task_sorter.sort_tasks(tasks, loc, (0, 0), (9, 9), rng=random.Random(5))):
+        assert sorted(map(id, plan)) == sorted(map(id, tasks))
+        held = set()
+        for t in plan:
+            if "Pick" in t.task_name:
+                held.add(t.objects[0])
+            else:
+                held.remove(t.objects[0])
+            assert len(held) <= 3
+
+def test_grid_index_queries_match_brute_force():
+    rng = random.Random(6)
+    coords = {f"S{i}": (rng.randrange(40), rng.randrange(40)) for i in range(300)}
+    names = list(coords)
+    manhattan = at_least_euclidean(lambda a, b: abs(a[0] - b[0]) + abs(a[1] - b[1]))
+    index = GridIndex((s, coords[s]) for s in names)
+    for s in names[::3]:
+        index.remove(s)
+    alive = [s for s in names if s in index]
+    q = (17, 23)
+    assert index.nearest(q, k=5, dist=manhattan) == sorted(alive, key=lambda s: (manhattan(q, coords[s]), names.index(s)))[:5]
+    assert index.within(q, 6) == [s for s in alive if math.hypot(q[0] - coords[s][0], q[1] - coords[s][1]) <= 6]
+
+    def scan(dist):                                     # the O(n²) scan it replaces
+        tour, here, left = [], (0, 0), list(names)
+        while left:
+            nxt = min(left, key=lambda s: dist(here, coords[s]))
+            tour.append(nxt)
+            left.remove(nxt)
+            here = coords[nxt]
+        return tour
+
+    # metrics that can undercut the straight line fall back to scanning
+    chebyshev = lambda a, b: max(abs(a[0] - b[0]), abs(a[1] - b[1]))     # diagonal steps of cost 1
+    scaled = lambda a, b: 0.1 * math.hypot(a[0] - b[0], a[1] - b[1])     # seconds at 10 cells/s
+    assert not is_at_least_euclidean(chebyshev) and is_at_least_euclidean(DistanceMatrix([], manhattan))
+    for dist in (manhattan, chebyshev, scaled):
+        assert _nearest_neighbour(names, coords, (0, 0), dist) == scan(dist)
+
+    pick = {f"O{k}": names[k] for k in range(120)}
+    place = {f"O{k}": names[-1 - k] for k in range(120)}
+    queue = _BatchQueue(list(pick), pick, place, coords, chebyshev)
+    left = list(pick)
+    for cur in [(0, 0), (39, 0), (20, 20), (5, 35)] * 5:
+        expected = sorted(left, key=lambda o: (chebyshev(cur, coords[pick[o]]) + chebyshev(coords[pick[o]], coords[place[o]]), o))[:3]
+        assert sorted(queue.take(cur, 3)) == sorted(expected)
+        left = [o for o in left if o not in expected]
+
+def test_trajectory_packs_steps_and_reduces_metrics():
+    grid = GridMap(rows=6, cols=6)
+    clock = SimClock()
+    robot = Robot(grid, (0, 0), clock=clock, rng=random.Random(0))
+    robot.execute_task(Task("S1", ["A"], "Pick A", 1), {"S1": (0, 5)})
+    robot.move_to((5, 5), smooth=False)
+    traj = robot.trajectory
+    assert traj.rows.typecode == "h" and len(traj) == len(robot.path) == 11
+    assert robot.path[:3] == [(0.0, 0.0), (0.0, 1.0), (0.0, 2.0)] and robot.path[-1] == (5.0, 5.0)
+    assert list(robot.loaded_log) == [False] * 5 + [bool(robot.carrying)] * 6
+    assert traj.loaded_steps() == sum(robot.loaded_log)
+    assert traj.distance() == 10 and list(traj.times)[-1] == clock.now()
+
+    class Watching(Clock):                               # any non-sim clock: robot seen mid-leg
+        def __init__(self):
+            self.t, self.seen = 0.0, []
+        def now(self):
+            return self.t
+        def sleep(self, seconds):
+            self.seen.append(watched.pos)
+            self.t += seconds
+        async def wait(self, seconds):
+            self.sleep(seconds)
+
+    watched = Robot(grid, (0, 0), clock=Watching(), durations={"step": 1.0})
+    watched.move_to((0, 4), smooth=False)
+    assert watched.clock.seen == [(0, 0), (0, 1), (0, 2), (0, 3)]
+    assert list(watched.trajectory.times) == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    t = Trajectory((0, 0), extent=40_000)                # too wide for int16
+    t.extend([(i, 40_000) for i in range(1, 20)], True, 0.0, 0.5)
+    t.set_loaded(False, 9)
+    assert t.rows.typecode == "i" and t.times[-1] == 9.5
+    assert [i for i, f in enumerate(t.loaded) if not f] == [0, 9]
+    assert t.loaded_ratio() == 18 / 20
+
 if __name__ == "__main__":
     test_from_csv_sorted()